@@ -0,0 +1,266 @@
+import numpy as np
+from constants import AU, PLANET_RADII, EARTH_EQUATORIAL_RADIUS, START_JD_TT
+from timescale import delta_t as lookup_delta_t, tt_to_ut1
+from check_eclipse import eclipse_codes, PARTIAL
+from dense_output import interpolate_positions
+
+# 拟合贝塞尔根数所用的时段为食甚前后 ELEMENT_HOURS 小时，多项式阶数为 ELEMENT_DEGREE
+ELEMENT_HOURS = 3
+ELEMENT_DEGREE = 3
+ELEMENT_SAMPLES = 25
+ELEMENT_NAMES = ("x", "y", "d", "mu", "l1", "l2")
+# coords.get_initial 取的是从天体指向太阳的矢量，模拟坐标相对 ICRF 整体反向
+FRAME_SIGN = -1
+
+Rs = PLANET_RADII['Sun']
+Rm = PLANET_RADII['Moon']
+# 月球半径与地球赤道半径之比
+K_MOON = Rm / EARTH_EQUATORIAL_RADIUS
+
+
+class BesselianElements:
+    def __init__(self, t0, jd_tt, delta_t, coefs, tan_f1, tan_f2):
+        """
+        一次日食的贝塞尔根数
+        :param t0: 根数的参考时刻 (食甚)，相对模拟起点的小时数
+        :param jd_tt: t0 对应的儒略日 (TT)
+        :param delta_t: TT - UT1 (秒)
+        :param coefs: {name: 多项式系数 (最高次在前)}，自变量为相对 t0 的小时数
+                      x, y, l1, l2 以地球赤道半径为单位，d, mu 以度为单位
+        :param tan_f1, tan_f2: 半影锥、本影锥半顶角的正切
+        """
+        self.t0 = t0
+        self.jd_tt = jd_tt
+        self.delta_t = delta_t
+        self.coefs = coefs
+        self.tan_f1 = tan_f1
+        self.tan_f2 = tan_f2
+
+    def evaluate(self, t):
+        """
+        :param t: 相对 t0 的小时数，任意形状的数组
+        :return: {name: 与 t 同形状的数组}
+        """
+        t = np.asarray(t, dtype=np.float64)
+        return {name: np.polyval(self.coefs[name], t) for name in ELEMENT_NAMES}
+
+    def derivative(self, t):
+        """
+        各根数对时间的导数 (每小时)
+        """
+        t = np.asarray(t, dtype=np.float64)
+        return {name: np.polyval(np.polyder(self.coefs[name]), t) for name in ELEMENT_NAMES}
+
+
+def _rot_x(a):
+    c, s = np.cos(a), np.sin(a)
+    o, i = np.zeros_like(a), np.ones_like(a)
+    return np.stack([np.stack([i, o, o], -1), np.stack([o, c, s], -1), np.stack([o, -s, c], -1)], -2)
+
+
+def _rot_y(a):
+    c, s = np.cos(a), np.sin(a)
+    o, i = np.zeros_like(a), np.ones_like(a)
+    return np.stack([np.stack([c, o, -s], -1), np.stack([o, i, o], -1), np.stack([s, o, c], -1)], -2)
+
+
+def _rot_z(a):
+    c, s = np.cos(a), np.sin(a)
+    o, i = np.zeros_like(a), np.ones_like(a)
+    return np.stack([np.stack([c, s, o], -1), np.stack([-s, c, o], -1), np.stack([o, o, i], -1)], -2)
+
+
+def precession_matrix(jd_tt):
+    """
+    IAU 1976 岁差矩阵：J2000 平赤道坐标 -> 当天平赤道坐标
+    :param jd_tt: 儒略日 (TT)，(K,)
+    :return: (K, 3, 3)
+    """
+    T = (np.asarray(jd_tt, dtype=np.float64) - 2451545.0) / 36525
+    arcsec = np.pi / 180 / 3600
+    zeta = (2306.2181 * T + 0.30188 * T ** 2 + 0.017998 * T ** 3) * arcsec
+    z = (2306.2181 * T + 1.09468 * T ** 2 + 0.018203 * T ** 3) * arcsec
+    theta = (2004.3109 * T - 0.42665 * T ** 2 - 0.041833 * T ** 3) * arcsec
+    return _rot_z(-z) @ _rot_y(theta) @ _rot_z(-zeta)
+
+
+def nutation(jd_tt):
+    """
+    IAU 1980 章动的四个主项 (Meeus 第22章)，黄经章动的误差约 0.5 角秒，
+    对应交点角 (二分差) 的误差约 0.03 秒，食带经度误差约 15 米
+    :param jd_tt: 儒略日 (TT)
+    :return: 黄经章动、交角章动、平黄赤交角 (弧度)
+    """
+    T = (np.asarray(jd_tt, dtype=np.float64) - 2451545.0) / 36525
+    arcsec = np.pi / 180 / 3600
+    # 月球升交点黄经、太阳和月球的平黄经
+    omega = np.radians(125.04452 - 1934.136261 * T)
+    L = np.radians(280.4665 + 36000.7698 * T)
+    L_moon = np.radians(218.3165 + 481267.8813 * T)
+    dpsi = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * L) - 0.23 * np.sin(2 * L_moon)
+            + 0.21 * np.sin(2 * omega)) * arcsec
+    deps = (9.20 * np.cos(omega) + 0.57 * np.cos(2 * L) + 0.10 * np.cos(2 * L_moon)
+            - 0.09 * np.cos(2 * omega)) * arcsec
+    eps = (84381.448 - 46.8150 * T - 0.00059 * T ** 2 + 0.001813 * T ** 3) * arcsec
+    return dpsi, deps, eps
+
+
+def nutation_matrix(jd_tt):
+    """
+    章动矩阵：当天平赤道坐标 -> 当天真赤道坐标
+    :return: (K, 3, 3)
+    """
+    dpsi, deps, eps = nutation(jd_tt)
+    return _rot_x(-(eps + deps)) @ _rot_z(-dpsi) @ _rot_x(eps)
+
+
+def gmst(jd_ut1):
+    """
+    格林尼治平恒星时 (IAU 1982)，单位：度
+    """
+    d = np.asarray(jd_ut1, dtype=np.float64) - 2451545.0
+    T = d / 36525
+    return (280.46061837 + 360.98564736629 * d + 0.000387933 * T ** 2 - T ** 3 / 38710000) % 360
+
+
+def gast(jd_ut1, jd_tt):
+    """
+    格林尼治视恒星时 = 平恒星时 + 二分差 (黄经章动在赤道上的投影)，单位：度
+    二分差最大约 1.1 秒 (时间)，不计时食带经度偏差约 0.3 km
+    """
+    dpsi, _, eps = nutation(jd_tt)
+    return (gmst(jd_ut1) + np.degrees(dpsi * np.cos(eps))) % 360
+
+
+def _sample_positions(source, t, dt=None, velocities=None):
+    """
+    在任意时刻 (相对模拟起点的小时数) 取日、月、地位置
+    :param source: 模拟得到的轨迹 {name: (steps, 3)}，或 trajectory_store.ChebyshevTrajectory
+    """
+    if hasattr(source, "evaluate"):
+        return [source.evaluate(name, t) for name in ('Sun', 'Moon', 'Earth')]
+    if dt is None:
+        raise ValueError("Error: 'dt' is required when sampling simulated trajectories!")
+    u = t / dt
+    index = np.clip(np.floor(u).astype(int), 0, len(source['Sun']) - 2)
+    return interpolate_positions(source, index, u - index, velocities, dt)
+
+
+def shadow_geometry(sun, moon, earth, jd_tt, delta_t=None, rotation=None, frame_sign=FRAME_SIGN):
+    """
+    由日、月、地位置计算贝塞尔根数在各时刻的值
+    :param sun, moon, earth: 模拟坐标下的位置 (..., 3)，单位 AU
+    :param jd_tt: 各时刻的儒略日 (TT)，形状 (...)
+    :param delta_t: TT - UT1 (秒)，可与 jd_tt 广播，默认按 jd_tt 查 timescale.delta_t
+    :param rotation: 模拟坐标 (ICRF) 到当天真赤道坐标的旋转矩阵，可与 (..., 3, 3) 广播，
+                     默认按 jd_tt 计算岁差与章动
+    :return: {name: (...)}，以及半影锥、本影锥半顶角的正切
+    """
+    if rotation is None:
+        rotation = nutation_matrix(jd_tt) @ precession_matrix(jd_tt)
+    # 影轴方向：由月球指向太阳
+    axis = frame_sign * (sun - moon)
+    axis = (rotation @ axis[..., None])[..., 0]
+    distance = np.linalg.norm(axis, axis=-1)
+    g = axis / distance[..., None]
+    a = np.arctan2(g[..., 1], g[..., 0])
+    d = np.arcsin(g[..., 2])
+
+    # 基本平面坐标系：z 轴沿影轴，x 轴指向东，y 轴指向北
+    ex = np.stack([-np.sin(a), np.cos(a), np.zeros_like(a)], -1)
+    ey = np.stack([-np.sin(d) * np.cos(a), -np.sin(d) * np.sin(a), np.cos(d)], -1)
+    rm = (rotation @ (frame_sign * (moon - earth))[..., None])[..., 0] * (AU / EARTH_EQUATORIAL_RADIUS)
+    x = np.sum(rm * ex, axis=-1)
+    y = np.sum(rm * ey, axis=-1)
+    z = np.sum(rm * g, axis=-1)
+
+    # 半影锥、本影锥的半顶角
+    sin_f1 = (Rs + Rm) / (distance * AU)
+    sin_f2 = (Rs - Rm) / (distance * AU)
+    cos_f1 = np.sqrt(1 - sin_f1 ** 2)
+    cos_f2 = np.sqrt(1 - sin_f2 ** 2)
+    tan_f1 = sin_f1 / cos_f1
+    tan_f2 = sin_f2 / cos_f2
+    l1 = z * tan_f1 + K_MOON / cos_f1
+    l2 = z * tan_f2 - K_MOON / cos_f2
+
+    jd_ut1 = tt_to_ut1(jd_tt) if delta_t is None else jd_tt - delta_t / 86400
+    # a 为真赤经，mu 为影轴的格林尼治时角
+    mu = (gast(jd_ut1, jd_tt) - np.degrees(a)) % 360
+    elements = {"x": x, "y": y, "d": np.degrees(d), "mu": mu, "l1": l1, "l2": l2}
+    return elements, tan_f1, tan_f2
+
+
+def _fit_elements(source, t_center, dt, velocities, jd_start, delta_t, frame_sign, half_width, degree):
+    """
+    在 t_center 前后一起采样所有日食，逐列拟合多项式
+    :return: {name: (degree+1, K)}，以及 tan_f1, tan_f2 (K,)
+    """
+    offsets = np.linspace(-half_width, half_width, ELEMENT_SAMPLES)
+    t = t_center[None, :] + offsets[:, None]
+    sun, moon, earth = _sample_positions(source, t, dt, velocities)
+    jd_tt = jd_start + t / 24
+    # 一次日食的时长内岁差、章动和 ΔT 的变化可忽略，每次日食只用参考时刻的值
+    jd_center = jd_start + t_center / 24
+    rotation = (nutation_matrix(jd_center) @ precession_matrix(jd_center))[None]
+    if delta_t is None:
+        delta_t = lookup_delta_t(jd_center)[None]
+    elements, tan_f1, tan_f2 = shadow_geometry(sun, moon, earth, jd_tt, delta_t, rotation, frame_sign)
+    # mu 每小时增加约 15 度，拟合前先展开跨越 360 度的跳变
+    elements["mu"] = np.unwrap(elements["mu"], period=360, axis=0)
+    coefs = {name: np.polyfit(offsets, elements[name], degree) for name in ELEMENT_NAMES}
+    coefs["mu"][-1] %= 360
+    center = ELEMENT_SAMPLES // 2
+    return coefs, tan_f1[center], tan_f2[center]
+
+
+def besselian_elements(source, t_max, dt=None, velocities=None, jd_start=START_JD_TT, delta_t=None,
+                       frame_sign=FRAME_SIGN, half_width=ELEMENT_HOURS, degree=ELEMENT_DEGREE):
+    """
+    为若干次日食生成贝塞尔根数，所有日食一起采样和拟合
+    参考时刻取影轴离地心最近 (x^2+y^2 最小) 的时刻，即食甚
+    :param source: 模拟得到的轨迹 {name: (steps, 3)}，或 trajectory_store.ChebyshevTrajectory
+    :param t_max: 各次日食食甚的估计 (相对模拟起点的小时数)
+    :param dt: 轨迹的时间步长 (小时)，source 为轨迹字典时必须提供
+    :param velocities: 各天体的速度，给出时用三次埃尔米特插值
+    :param jd_start: 模拟起点的儒略日 (TT)
+    :param delta_t: TT - UT1 (秒)，默认每次日食取其参考时刻的 timescale.delta_t
+    :return: BesselianElements 的列表
+    """
+    t_max = np.atleast_1d(np.asarray(t_max, dtype=np.float64))
+    if len(t_max) == 0:
+        return []
+    coefs, _, _ = _fit_elements(source, t_max, dt, velocities, jd_start, delta_t, frame_sign, half_width, degree)
+
+    # 由 x(t), y(t) 多项式求 x^2+y^2 的极小点，修正食甚时刻后重新拟合
+    shift = np.zeros(len(t_max))
+    for k in range(len(t_max)):
+        px, py = coefs["x"][:, k], coefs["y"][:, k]
+        q = np.polyadd(np.polymul(px, px), np.polymul(py, py))
+        roots = np.roots(np.polyder(q))
+        roots = roots[(np.abs(roots.imag) < 1e-9) & (np.abs(roots.real) <= half_width)].real
+        if len(roots):
+            shift[k] = roots[np.argmin(np.polyval(q, roots))]
+    t0 = t_max + shift
+    if delta_t is None:
+        delta_t = lookup_delta_t(jd_start + t0 / 24)
+    delta_t = np.broadcast_to(delta_t, t0.shape)
+    coefs, tan_f1, tan_f2 = _fit_elements(source, t0, dt, velocities, jd_start, delta_t, frame_sign, half_width,
+                                          degree)
+    return [BesselianElements(t0[k], jd_start + t0[k] / 24, float(delta_t[k]),
+                              {name: coefs[name][:, k] for name in ELEMENT_NAMES}, tan_f1[k], tan_f2[k])
+            for k in range(len(t0))]
+
+
+def solar_eclipse_elements(source, eclipse_start, eclipse_type, eclipse_end, dt, velocities=None, **kwargs):
+    """
+    为 detect_accurate_times 等输出的每次日食生成贝塞尔根数
+    每次日食的整体过程记为 "partial"，以其起止时刻的中点作为食甚的初始估计
+    :param eclipse_start, eclipse_type, eclipse_end: 日食各阶段的起止时刻 (步) 与类型 (字符串或 uint8 编码)
+    :return: 与日食一一对应的 BesselianElements 列表
+    """
+    eclipse_start = np.asarray(eclipse_start, dtype=np.float64)
+    eclipse_end = np.asarray(eclipse_end, dtype=np.float64)
+    whole = eclipse_codes(eclipse_type) == PARTIAL
+    t_max = (eclipse_start[whole] + eclipse_end[whole]) / 2 * dt
+    return besselian_elements(source, t_max, dt, velocities, **kwargs)
@@ -1,94 +1,113 @@
-import numpy as np
-from constants import PLANET_MASS
-from coords import get_initial
-
-M_SUN = PLANET_MASS['Sun']
-
-
-def circular_orbit_3d_params(r0, v0):
-    """
-    根据初始位置和速度确定三维正圆轨道参数
-    :param r0: 初始位置 [x, y, z] (单位AU)
-    :param v0: 初始速度 [vx, vy, vz]
-    :return: 轨道半径, 角速度, 倾角, 升交点经度, 初始相位角
-    """
-    h = np.cross(r0, v0)
-    n = h / np.linalg.norm(h)
-
-    # 轨道倾角 (rad)
-    i = np.arccos(n[2])
-
-    # 升交点经度 (rad)
-    Omega = np.arctan2(n[0], -n[1])
-
-    # 轨道半径和角速度
-    r0_norm = np.linalg.norm(r0)
-    v0_norm = np.linalg.norm(v0)
-    a = 1 / (2 / r0_norm - v0_norm**2 / M_SUN)
-    omega = np.sqrt(M_SUN / a ** 3)
-
-    # 初始相位角 (从升交点起算)
-    x, y, z = r0
-    theta0 = np.arctan2(z / np.sin(i),
-                        x * np.cos(Omega) + y * np.sin(Omega))
-
-    return a, omega, i, Omega, theta0
-
-
-def circular_orbit_3d_position(a, omega, i, Omega, theta0, t):
-    """
-    计算三维正圆轨道在时间 t 的位置
-    :param a: 轨道半径
-    :param omega: 角速度 (rad/h)
-    :param i: 轨道倾角 (rad)
-    :param Omega: 升交点经度 (rad)
-    :param theta0: 初始相位角 (rad)
-    :param t: 时间
-    :return: 位置向量 [x, y, z]
-    """
-    theta = theta0 + omega * t
-
-    # 旋转到惯性系 (3-1-3欧拉旋转)
-    R = np.array([
-        [np.cos(Omega)*np.cos(theta) - np.sin(Omega)*np.sin(theta)*np.cos(i),
-         -np.cos(Omega)*np.sin(theta) - np.sin(Omega)*np.cos(theta)*np.cos(i),
-         np.sin(Omega)*np.sin(i)],
-
-        [np.sin(Omega)*np.cos(theta) + np.cos(Omega)*np.sin(theta)*np.cos(i),
-         -np.sin(Omega)*np.sin(theta) + np.cos(Omega)*np.cos(theta)*np.cos(i),
-         -np.cos(Omega)*np.sin(i)],
-
-        [np.sin(theta)*np.sin(i),
-         np.cos(theta)*np.sin(i),
-         np.cos(i)]
-    ])
-
-    return R @ np.array([a, 0, 0])
-
-
-def get_jupiter_orb_fn(Jupiter):
-    a, omega, i, Omega, theta0 = circular_orbit_3d_params(Jupiter.pos, Jupiter.velocity)
-
-    def orb_fn(t):
-        return circular_orbit_3d_position(a, omega, i, Omega, theta0, t)
-    return orb_fn
-
-
-if __name__ == "__main__":
-    import matplotlib.pyplot as plt
-
-    # 生成轨道点
-    times = np.linspace(0, 8*365*24, 1000)  # 12年周期
-    orb_fn = get_jupiter_orb_fn(get_initial("Jupiter"))
-    positions = np.array([orb_fn(t) for t in times])
-
-    # 绘制
-    fig = plt.figure(figsize=(10, 8))
-    ax = fig.add_subplot(111, projection='3d')
-    ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], label="Jupiter's Orbit")
-    ax.scatter([0], [0], [0], color='yellow', s=200, label='Sun')
-    ax.set_xlabel('X (AU)')
-    ax.set_ylabel('Y (AU)')
-    ax.set_zlabel('Z (AU)')
-    ax.legend()
-    plt.show()
+import numpy as np
+from constants import PLANET_MASS
+
+M_SUN = PLANET_MASS['Sun']
+
+
+def circular_orbit_3d_params(r0, v0):
+    """
+    根据初始位置和速度确定三维正圆轨道参数
+    :param r0: 初始位置 [x, y, z] (单位AU)
+    :param v0: 初始速度 [vx, vy, vz]
+    :return: 轨道半径, 角速度, 倾角, 升交点经度, 初始相位角
+    """
+    h = np.cross(r0, v0)
+    n = h / np.linalg.norm(h)
+
+    # 轨道倾角 (rad)
+    i = np.arccos(n[2])
+
+    # 升交点经度 (rad)
+    Omega = np.arctan2(n[0], -n[1])
+
+    # 轨道半径和角速度
+    r0_norm = np.linalg.norm(r0)
+    v0_norm = np.linalg.norm(v0)
+    a = 1 / (2 / r0_norm - v0_norm**2 / M_SUN)
+    omega = np.sqrt(M_SUN / a ** 3)
+
+    # 初始相位角 (从升交点起算)
+    x, y, z = r0
+    theta0 = np.arctan2(z / np.sin(i),
+                        x * np.cos(Omega) + y * np.sin(Omega))
+
+    return a, omega, i, Omega, theta0
+
+
+def circular_orbit_3d_position(a, omega, i, Omega, theta0, t):
+    """
+    计算三维正圆轨道在时间 t 的位置
+    :param a: 轨道半径
+    :param omega: 角速度 (rad/h)
+    :param i: 轨道倾角 (rad)
+    :param Omega: 升交点经度 (rad)
+    :param theta0: 初始相位角 (rad)
+    :param t: 时间
+    :return: 位置向量 [x, y, z]
+    """
+    theta = theta0 + omega * t
+
+    # 旋转到惯性系 (3-1-3欧拉旋转)
+    R = np.array([
+        [np.cos(Omega)*np.cos(theta) - np.sin(Omega)*np.sin(theta)*np.cos(i),
+         -np.cos(Omega)*np.sin(theta) - np.sin(Omega)*np.cos(theta)*np.cos(i),
+         np.sin(Omega)*np.sin(i)],
+
+        [np.sin(Omega)*np.cos(theta) + np.cos(Omega)*np.sin(theta)*np.cos(i),
+         -np.sin(Omega)*np.sin(theta) + np.cos(Omega)*np.cos(theta)*np.cos(i),
+         -np.cos(Omega)*np.sin(i)],
+
+        [np.sin(theta)*np.sin(i),
+         np.cos(theta)*np.sin(i),
+         np.cos(i)]
+    ])
+
+    return R @ np.array([a, 0, 0])
+
+
+def circular_orbit_3d_positions(params, t):
+    """
+    批量计算多个三维正圆轨道在时间 t 的位置
+    :param params: 轨道参数数组 (A, 5)，每行为 circular_orbit_3d_params 的返回值
+    :param t: 时间，标量或任意形状的数组
+    :return: 位置数组 (*t.shape, A, 3)
+    """
+    params = np.asarray(params, dtype=np.float64).reshape(-1, 5)
+    a, omega, i, Omega, theta0 = params.T
+    theta = theta0 + omega * np.asarray(t, dtype=np.float64)[..., None]
+
+    # 等价于 circular_orbit_3d_position 中 R @ [a, 0, 0]，只需旋转矩阵的第一列
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+    x = (np.cos(Omega)*cos_theta - np.sin(Omega)*sin_theta*np.cos(i)) * a
+    y = (np.sin(Omega)*cos_theta + np.cos(Omega)*sin_theta*np.cos(i)) * a
+    z = (sin_theta*np.sin(i)) * a
+    return np.stack([x, y, z], axis=-1)
+
+
+def get_jupiter_orb_fn(Jupiter):
+    a, omega, i, Omega, theta0 = circular_orbit_3d_params(Jupiter.pos, Jupiter.velocity)
+
+    def orb_fn(t):
+        return circular_orbit_3d_position(a, omega, i, Omega, theta0, t)
+    return orb_fn
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from coords import get_initial
+
+    # 生成轨道点
+    times = np.linspace(0, 8*365*24, 1000)  # 12年周期
+    orb_fn = get_jupiter_orb_fn(get_initial("Jupiter"))
+    positions = np.array([orb_fn(t) for t in times])
+
+    # 绘制
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection='3d')
+    ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], label="Jupiter's Orbit")
+    ax.scatter([0], [0], [0], color='yellow', s=200, label='Sun')
+    ax.set_xlabel('X (AU)')
+    ax.set_ylabel('Y (AU)')
+    ax.set_zlabel('Z (AU)')
+    ax.legend()
+    plt.show()
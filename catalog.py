@@ -0,0 +1,38 @@
+import numpy as np
+from check_eclipse import check_sun_eclipse, check_moon_eclipse, detect_streaming, eclipse_codes
+
+
+def resume_chunks(simulator, years, chunk_steps=65536):
+    """
+    从模拟器的当前状态续算，产出轨迹块
+    第一块为检查点中保存的最近轨迹加上当前位置，使跨越续算起点的日月食也能完整检测
+    """
+    if simulator.history is not None and simulator.history.shape[1] > 0:
+        pos, _ = simulator.get_state()
+        history = np.concatenate([simulator.history, pos[:, None, :]], axis=1)
+        step0 = int(round(simulator.time / simulator.dt))
+        yield {b.name: history[i] for i, b in enumerate(simulator.bodies)}, \
+            np.arange(step0 - history.shape[1] + 1, step0 + 1)
+    yield from simulator.stream_rk4(years, chunk_steps)
+
+
+def extend_catalog(simulator, catalog, years, fine_steps, check_funs=(check_sun_eclipse, check_moon_eclipse),
+                   tolerance=1):
+    """
+    在已有的日月食列表后续算 years 年，只积分新增的时段并追加新检测到的日月食
+    :param simulator: 处于原模拟末状态的模拟器 (可由 load_checkpoint 恢复)
+    :param catalog: 与 detect_streaming 返回格式相同的列表，每个检测函数对应一组 (start, type, end)
+    :param tolerance: 判断为同一阶段的最大开始时刻差 (步)
+    :return: 追加后的列表，类型为 uint8 编码
+    """
+    new_results = detect_streaming(resume_chunks(simulator, years), fine_steps, check_funs)
+    extended = []
+    for (start, types, end), (new_start, new_types, new_end) in zip(catalog, new_results):
+        start, types, end = np.asarray(start, dtype=np.float64), eclipse_codes(types), np.asarray(end, dtype=np.float64)
+        # 补全的最近轨迹中已经检测过的阶段不重复追加
+        repeated = [any(tp == old_tp and abs(s - old_s) <= tolerance for old_s, old_tp in zip(start[-4:], types[-4:]))
+                    for s, tp in zip(new_start, new_types)]
+        keep = ~np.array(repeated, dtype=bool)
+        extended.append((np.concatenate([start, new_start[keep]]), np.concatenate([types, new_types[keep]]),
+                         np.concatenate([end, new_end[keep]])))
+    return extended
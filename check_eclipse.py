@@ -1,142 +1,705 @@
-import numpy as np
-from constants import PLANET_RADII, AU
-
-# 加载天体半径（单位：AU）
-Rs = PLANET_RADII['Sun'] / AU
-Re = PLANET_RADII['Earth'] / AU
-Rm = PLANET_RADII['Moon'] / AU
-
-
-def check_sun_eclipse(sun_pos, moon_pos, earth_pos, t_range, type=None):
-    sun_pos = np.array(sun_pos, dtype=np.float64)
-    moon_pos = np.array(moon_pos, dtype=np.float64)
-    earth_pos = np.array(earth_pos, dtype=np.float64)
-    # 将坐标原点移到太阳位置
-    moon_pos -= sun_pos
-    earth_pos -= sun_pos
-    # 检查地球和太阳是否在月球两侧
-    dot0 = np.sum((earth_pos-moon_pos)*earth_pos, axis=-1)
-    # 计算月球本影锥和半影锥的顶点
-    center1 = moon_pos * Rs / (Rs - Rm)
-    center2 = moon_pos * Rs / (Rs + Rm)
-    # 计算地球/月球到两个顶点的向量
-    re1 = earth_pos - center1
-    re2 = earth_pos - center2
-    re1_norm = np.linalg.norm(re1, axis=-1)
-    re2_norm = np.linalg.norm(re2, axis=-1)
-    rm1 = moon_pos - center1
-    rm2 = moon_pos - center2
-    rm1_norm = np.linalg.norm(rm1, axis=-1)
-    rm2_norm = np.linalg.norm(rm2, axis=-1)
-
-    # 计算点积和用于判断的阈值
-    dot1 = np.sum(re1*rm1, axis=-1)
-    dot2 = np.sum(re2*rm2, axis=-1)
-    threshold1 = np.linalg.norm(np.cross(re1, rm1, axis=-1), axis=-1)**2 - \
-        (Re**2*rm1_norm**2+re1_norm**2*Rm**2+2*Re*Rm*np.abs(dot1))
-    threshold2 = np.linalg.norm(np.cross(re2, rm2, axis=-1), axis=-1)**2 - \
-        (Re**2*rm2_norm**2+re2_norm**2*Rm**2+2*Re*Rm*dot2)
-
-    # 定义日食的条件
-    conditions = [
-        ((threshold1 < 0) & (dot1 > 0) & (dot0 > 0)) | (re1_norm < Re),   # 全食
-        (threshold1 < 0) & (dot1 <= 0) & (dot0 > 0) & (re1_norm > Re),   # 环食
-        (threshold2 < 0) & (threshold1 >= 0) & (dot0 > 0)   # 偏食
-    ]
-    choices = ["total", "annular", "partial"]
-    eclipse_types = np.select(conditions, choices, default=None)
-    # 筛选出满足条件的时间步
-    if type is None:
-        mask = eclipse_types != None
-    else:
-        mask = eclipse_types == type
-    filtered_times = t_range[mask]
-    return filtered_times, eclipse_types
-
-
-def check_moon_eclipse(sun_pos, moon_pos, earth_pos, t_range, type=None):
-    sun_pos = np.array(sun_pos, dtype=np.float64)
-    moon_pos = np.array(moon_pos, dtype=np.float64)
-    earth_pos = np.array(earth_pos, dtype=np.float64)
-    # 将坐标原点移到太阳位置
-    moon_pos -= sun_pos
-    earth_pos -= sun_pos
-    # 检查月球和太阳是否在地球两侧
-    dot0 = np.sum((moon_pos-earth_pos)*(earth_pos), axis=-1)
-    # 计算地球本影锥的顶点
-    center1 = earth_pos * Rs / (Rs - Re)
-    # 计算地球/月球到两个顶点的向量
-    rm1 = moon_pos - center1
-    re1 = earth_pos - center1
-    rm1_norm = np.linalg.norm(rm1, axis=-1)
-    re1_norm = np.linalg.norm(re1, axis=-1)
-
-    # 计算点积和用于判断的阈值
-    dot1 = np.sum(rm1*re1, axis=-1)
-    threshold1 = np.linalg.norm(np.cross(re1, rm1, axis=-1), axis=-1)**2 - \
-        (Rm**2*re1_norm**2+rm1_norm**2*Re**2+2*Re*Rm*dot1)
-    threshold2 = np.linalg.norm(np.cross(re1, rm1, axis=-1), axis=-1)**2 - \
-        (Rm**2*re1_norm**2+rm1_norm**2*Re**2-2*Re*Rm*dot1)
-
-    # 定义月食的条件
-    conditions = [
-        ((threshold2 < 0) & (dot1 > 0) & (dot0 > 0)) | (rm1_norm < Rm),    # 全食
-        (threshold1 < 0) & (threshold2 > 0) & (dot0 > 0)      # 偏食
-    ]
-    choices = ["total", "partial"]
-    eclipse_types = np.select(conditions, choices, default=None)
-    # 筛选出满足条件的时间步
-    if type is None:
-        mask = eclipse_types != None
-    else:
-        mask = eclipse_types == type
-    filtered_times = t_range[mask]
-    return filtered_times, eclipse_types
-
-
-def detect_accurate_times(check_fun, trajectories, filtered_times, eclipse_types, fine_steps):
-    eclipse_start = []
-    eclipse_type = []
-    eclipse_end = []
-    # 生成细时间步用于插值
-    fine_t_range = (np.arange(fine_steps+1) / fine_steps)[:, None].repeat(3, axis=-1)
-    # 检测发生日/月食的临界点
-    for t in filtered_times:
-        # 检测开始偏食的时间点
-        if eclipse_types[t-1] is None:
-            # 轨道数据直接用割线估计处理
-            fine_sun = trajectories['Sun'][t] * fine_t_range + trajectories['Sun'][t-1] * (1-fine_t_range)
-            fine_earth = trajectories['Earth'][t] * fine_t_range + trajectories['Earth'][t-1] * (1-fine_t_range)
-            fine_moon = trajectories['Moon'][t] * fine_t_range + trajectories['Moon'][t-1] * (1-fine_t_range)
-            fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth, fine_t_range[:, 0])
-            eclipse_start.append(t-1+fine_filtered_times[0])
-            eclipse_type.append("partial")
-        # 检测退出偏食的时间点
-        if eclipse_types[t+1] is None:
-            # 轨道数据直接用割线估计处理
-            fine_sun = trajectories['Sun'][t+1] * fine_t_range + trajectories['Sun'][t] * (1-fine_t_range)
-            fine_earth = trajectories['Earth'][t+1] * fine_t_range + trajectories['Earth'][t] * (1-fine_t_range)
-            fine_moon = trajectories['Moon'][t+1] * fine_t_range + trajectories['Moon'][t] * (1-fine_t_range)
-            fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth, fine_t_range[:, 0])
-            eclipse_end.append(t+fine_filtered_times[-1])
-        if eclipse_types[t] != "partial":
-            # 检测从偏食转变为全食/环食的时间点
-            if eclipse_types[t-1] != eclipse_types[t]:
-                # 轨道数据直接用割线估计处理
-                fine_sun = trajectories['Sun'][t] * fine_t_range + trajectories['Sun'][t-1] * (1-fine_t_range)
-                fine_earth = trajectories['Earth'][t] * fine_t_range + trajectories['Earth'][t-1] * (1-fine_t_range)
-                fine_moon = trajectories['Moon'][t] * fine_t_range + trajectories['Moon'][t-1] * (1-fine_t_range)
-                fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth,
-                                                   fine_t_range[:, 0], eclipse_types[t])
-                eclipse_start.insert(-1, t-1+fine_filtered_times[0])
-                eclipse_type.insert(-1, eclipse_types[t])
-            # 检测从全食/环食转变为偏食的时间点
-            if eclipse_types[t+1] != eclipse_types[t]:
-                # 轨道数据直接用割线估计处理
-                fine_sun = trajectories['Sun'][t+1] * fine_t_range + trajectories['Sun'][t] * (1-fine_t_range)
-                fine_earth = trajectories['Earth'][t+1] * fine_t_range + trajectories['Earth'][t] * (1-fine_t_range)
-                fine_moon = trajectories['Moon'][t+1] * fine_t_range + trajectories['Moon'][t] * (1-fine_t_range)
-                fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth,
-                                                   fine_t_range[:, 0], eclipse_types[t])
-                eclipse_end.append(t+fine_filtered_times[-1])
-    return eclipse_start, eclipse_type, eclipse_end
+import numpy as np
+from constants import PLANET_RADII, AU
+from dense_output import interpolate_positions
+from roots import illinois
+from eclipse_geometry import eclipse_magnitude, obscuration
+
+# 加载天体半径（单位：AU）
+Rs = PLANET_RADII['Sun'] / AU
+Re = PLANET_RADII['Earth'] / AU
+Rm = PLANET_RADII['Moon'] / AU
+
+# 食的类型编码，用 uint8 数组保存长时间序列的判断结果，只在输出时转换为字符串
+NO_ECLIPSE = 0
+PARTIAL = 1
+TOTAL = 2
+ANNULAR = 3
+ECLIPSE_NAMES = np.array([None, "partial", "total", "annular"], dtype=object)
+ECLIPSE_CODES = {name: code for code, name in enumerate(ECLIPSE_NAMES)}
+
+# 合并判断日月食时每块处理的时间步数：块小则中间数组能留在缓存中，块大则循环开销小
+CLASSIFY_CHUNK = 16384
+
+# 求食甚时在每个食阶段内的采样点数
+GREATEST_SAMPLES = 64
+
+# 各接触对应的影子函数及其穿过0的方向：(函数名, 由正变负时的接触, 由负变正时的接触)
+SOLAR_CONTACTS = (
+    ("threshold2", "C1", "C4"),    # 半影锥与地球外切：初亏、复圆
+    ("threshold1", "C2", "C3"),    # 本影/伪本影锥与地球外切：食既、生光
+)
+LUNAR_CONTACTS = (
+    ("threshold3", "P1", "P4"),    # 月球与半影外切
+    ("threshold1", "U1", "U4"),    # 月球与本影外切：初亏、复圆
+    ("threshold2", "U2", "U3"),    # 月球与本影内切：食既、生光
+)
+
+
+def eclipse_names(codes):
+    """
+    将类型编码数组转换为字符串 (无食为 None) 的 object 数组
+    """
+    return ECLIPSE_NAMES[np.asarray(codes)]
+
+
+def eclipse_codes(eclipse_types):
+    """
+    将类型数组统一转换为 uint8 编码，已是 uint8 编码时不复制
+    字符串 (无食为 None) 数组按类型名转换，其他整数数组按编码处理，其他类型报错
+    """
+    eclipse_types = np.asarray(eclipse_types)
+    if eclipse_types.dtype == np.uint8:
+        return eclipse_types
+    if eclipse_types.size == 0:
+        return np.zeros(eclipse_types.shape, dtype=np.uint8)
+    if eclipse_types.dtype.kind in 'iu':
+        if eclipse_types.min() < 0 or eclipse_types.max() >= len(ECLIPSE_NAMES):
+            raise ValueError("Error: eclipse type code is not valid!")
+        return eclipse_types.astype(np.uint8)
+    if eclipse_types.dtype.kind not in 'OU':
+        raise TypeError(f"Error: eclipse type dtype '{eclipse_types.dtype}' is not valid!")
+    names = eclipse_types.astype(object)
+    codes = np.zeros(names.shape, dtype=np.uint8)
+    for code, name in enumerate(ECLIPSE_NAMES[1:], 1):
+        codes[names == name] = code
+    return codes
+
+
+def _select_codes(conditions, codes, shape):
+    """
+    与 np.select 相同的规则 (靠前的条件优先)，直接生成 uint8 编码
+    """
+    result = np.zeros(shape, dtype=np.uint8)
+    for condition, code in reversed(list(zip(conditions, codes))):
+        result[condition] = code
+    return result
+
+
+def _classify_result(conditions, codes, shape, t_range, type, as_codes):
+    """
+    check_sun_eclipse / check_moon_eclipse 的公共部分：生成类型数组并筛选时间步
+    """
+    result = _select_codes(conditions, codes, shape)
+    # 筛选出满足条件的时间步
+    if type is None:
+        mask = result != NO_ECLIPSE
+    else:
+        if type not in ECLIPSE_CODES:
+            raise KeyError(f"Error: eclipse type '{type}' is not valid!")
+        mask = result == ECLIPSE_CODES[type]
+    filtered_times = _filter_times(t_range, mask)
+    return filtered_times, result if as_codes else eclipse_names(result)
+
+
+def _filter_times(t_range, mask):
+    """
+    按掩码筛选时间步；带批量维度 (B, T) 时返回每个成员各自的时间步列表
+    """
+    if mask.ndim == 1:
+        return t_range[mask]
+    return [t_range[m] for m in mask.reshape(-1, mask.shape[-1])]
+
+
+def sun_shadow_functions(sun_pos, moon_pos, earth_pos):
+    """
+    日食判断所用的连续影子函数，各量随时间连续变化，穿过0的时刻即为各接触时刻
+    :return: {"dot0": 地球与太阳在月球两侧时为正,
+              "dot1": 地球在月球本影锥顶点之外 (伪本影一侧) 时为负,
+              "threshold1": 地球与本影/伪本影锥相交时为负,
+              "threshold2": 地球与半影锥相交时为负,
+              "re1_norm": 地心到本影锥顶点的距离}
+    """
+    sun_pos = np.array(sun_pos, dtype=np.float64)
+    moon_pos = np.array(moon_pos, dtype=np.float64)
+    earth_pos = np.array(earth_pos, dtype=np.float64)
+    # 将坐标原点移到太阳位置
+    moon_pos -= sun_pos
+    earth_pos -= sun_pos
+    # 检查地球和太阳是否在月球两侧
+    dot0 = np.sum((earth_pos-moon_pos)*earth_pos, axis=-1)
+    # 计算月球本影锥和半影锥的顶点
+    center1 = moon_pos * Rs / (Rs - Rm)
+    center2 = moon_pos * Rs / (Rs + Rm)
+    # 计算地球/月球到两个顶点的向量
+    re1 = earth_pos - center1
+    re2 = earth_pos - center2
+    re1_norm = np.linalg.norm(re1, axis=-1)
+    re2_norm = np.linalg.norm(re2, axis=-1)
+    rm1 = moon_pos - center1
+    rm2 = moon_pos - center2
+    rm1_norm = np.linalg.norm(rm1, axis=-1)
+    rm2_norm = np.linalg.norm(rm2, axis=-1)
+
+    # 计算点积和用于判断的阈值
+    dot1 = np.sum(re1*rm1, axis=-1)
+    dot2 = np.sum(re2*rm2, axis=-1)
+    threshold1 = np.linalg.norm(np.cross(re1, rm1, axis=-1), axis=-1)**2 - \
+        (Re**2*rm1_norm**2+re1_norm**2*Rm**2+2*Re*Rm*np.abs(dot1))
+    threshold2 = np.linalg.norm(np.cross(re2, rm2, axis=-1), axis=-1)**2 - \
+        (Re**2*rm2_norm**2+re2_norm**2*Rm**2+2*Re*Rm*dot2)
+    return {"dot0": dot0, "dot1": dot1, "threshold1": threshold1, "threshold2": threshold2, "re1_norm": re1_norm}
+
+
+def check_sun_eclipse(sun_pos, moon_pos, earth_pos, t_range, type=None, as_codes=False):
+    """
+    :param type: 只筛选该类型的时间步，默认筛选所有发生日食的时间步
+    :param as_codes: 为 True 时类型以 uint8 编码 (NO_ECLIPSE/PARTIAL/TOTAL/ANNULAR) 返回，否则为字符串或 None
+    """
+    shadow = sun_shadow_functions(sun_pos, moon_pos, earth_pos)
+    dot0, dot1, re1_norm = shadow["dot0"], shadow["dot1"], shadow["re1_norm"]
+    threshold1, threshold2 = shadow["threshold1"], shadow["threshold2"]
+
+    # 定义日食的条件
+    conditions = [
+        ((threshold1 < 0) & (dot1 > 0) & (dot0 > 0)) | (re1_norm < Re),   # 全食
+        (threshold1 < 0) & (dot1 <= 0) & (dot0 > 0) & (re1_norm > Re),   # 环食
+        (threshold2 < 0) & (threshold1 >= 0) & (dot0 > 0)   # 偏食
+    ]
+    return _classify_result(conditions, [TOTAL, ANNULAR, PARTIAL], dot0.shape, t_range, type, as_codes)
+
+
+def moon_shadow_functions(sun_pos, moon_pos, earth_pos):
+    """
+    月食判断所用的连续影子函数，各量随时间连续变化，穿过0的时刻即为各接触时刻
+    :return: {"dot0": 月球与太阳在地球两侧时为正,
+              "dot1": 月球在地球本影锥顶点之内时为正,
+              "threshold1": 月球与本影相交时为负,
+              "threshold2": 月球完全进入本影时为负,
+              "threshold3": 月球与半影相交时为负,
+              "rm1_norm": 月心到本影锥顶点的距离}
+    """
+    sun_pos = np.array(sun_pos, dtype=np.float64)
+    moon_pos = np.array(moon_pos, dtype=np.float64)
+    earth_pos = np.array(earth_pos, dtype=np.float64)
+    # 将坐标原点移到太阳位置
+    moon_pos -= sun_pos
+    earth_pos -= sun_pos
+    # 检查月球和太阳是否在地球两侧
+    dot0 = np.sum((moon_pos-earth_pos)*(earth_pos), axis=-1)
+    # 计算地球本影锥的顶点
+    center1 = earth_pos * Rs / (Rs - Re)
+    # 计算地球/月球到两个顶点的向量
+    rm1 = moon_pos - center1
+    re1 = earth_pos - center1
+    rm1_norm = np.linalg.norm(rm1, axis=-1)
+    re1_norm = np.linalg.norm(re1, axis=-1)
+
+    # 计算点积和用于判断的阈值
+    dot1 = np.sum(rm1*re1, axis=-1)
+    threshold1 = np.linalg.norm(np.cross(re1, rm1, axis=-1), axis=-1)**2 - \
+        (Rm**2*re1_norm**2+rm1_norm**2*Re**2+2*Re*Rm*dot1)
+    threshold2 = np.linalg.norm(np.cross(re1, rm1, axis=-1), axis=-1)**2 - \
+        (Rm**2*re1_norm**2+rm1_norm**2*Re**2-2*Re*Rm*dot1)
+    # 地球半影锥的顶点在日地之间，月球与地球在顶点同侧
+    center2 = earth_pos * Rs / (Rs + Re)
+    rm2 = moon_pos - center2
+    re2 = earth_pos - center2
+    dot2 = np.sum(rm2*re2, axis=-1)
+    threshold3 = np.linalg.norm(np.cross(re2, rm2, axis=-1), axis=-1)**2 - \
+        (Rm**2*np.sum(re2**2, axis=-1)+np.sum(rm2**2, axis=-1)*Re**2+2*Re*Rm*dot2)
+    return {"dot0": dot0, "dot1": dot1, "threshold1": threshold1, "threshold2": threshold2,
+            "threshold3": threshold3, "rm1_norm": rm1_norm}
+
+
+def check_moon_eclipse(sun_pos, moon_pos, earth_pos, t_range, type=None, as_codes=False):
+    """
+    :param type: 只筛选该类型的时间步，默认筛选所有发生月食的时间步
+    :param as_codes: 为 True 时类型以 uint8 编码 (NO_ECLIPSE/PARTIAL/TOTAL) 返回，否则为字符串或 None
+    """
+    shadow = moon_shadow_functions(sun_pos, moon_pos, earth_pos)
+    dot0, dot1, rm1_norm = shadow["dot0"], shadow["dot1"], shadow["rm1_norm"]
+    threshold1, threshold2 = shadow["threshold1"], shadow["threshold2"]
+
+    # 定义月食的条件
+    conditions = [
+        ((threshold2 < 0) & (dot1 > 0) & (dot0 > 0)) | (rm1_norm < Rm),    # 全食
+        (threshold1 < 0) & (threshold2 > 0) & (dot0 > 0)      # 偏食
+    ]
+    return _classify_result(conditions, [TOTAL, PARTIAL], dot0.shape, t_range, type, as_codes)
+
+
+def sun_eclipse_magnitudes(sun_pos, moon_pos, earth_pos):
+    """
+    日食的食分、遮挡面积比与 gamma，对任意形状的时间序列一起计算
+    gamma 为影轴到地心的距离，食分与遮挡面积比取地面上离影轴最近的点 (中心食时为影轴与地面的交点) 的值，
+    长度均以判断日食所用的地球半径 Re 为单位，与 check_sun_eclipse 的判断一致
+    :return: {"magnitude": 食分, "obscuration": 遮挡面积比, "gamma": gamma}，月球不在日地之间时食分为0；
+             食分的定义见 eclipse_geometry.eclipse_magnitude
+    """
+    sun_pos = np.asarray(sun_pos, dtype=np.float64)
+    m = np.asarray(moon_pos, dtype=np.float64) - sun_pos
+    e = np.asarray(earth_pos, dtype=np.float64) - sun_pos
+    # 影轴方向：由月球指向太阳
+    m_norm = np.linalg.norm(m, axis=-1)
+    g = -m / m_norm[..., None]
+    rm = (m - e) / Re
+    z = np.sum(rm * g, axis=-1)
+    gamma = np.linalg.norm(rm - z[..., None] * g, axis=-1)
+
+    # 半影锥、本影锥在地面最近点处的半径
+    sin_f1 = (Rs + Rm) / m_norm
+    sin_f2 = (Rs - Rm) / m_norm
+    cos_f1 = np.sqrt(1 - sin_f1 ** 2)
+    cos_f2 = np.sqrt(1 - sin_f2 ** 2)
+    zeta = np.sqrt(np.clip(1 - gamma ** 2, 0, None))
+    L1 = (z - zeta) * sin_f1 / cos_f1 + Rm / Re / cos_f1
+    L2 = (z - zeta) * sin_f2 / cos_f2 - Rm / Re / cos_f2
+    distance = np.clip(gamma - 1, 0, None)
+    magnitude = eclipse_magnitude(distance, L1, L2)
+    occurring = (z > 0) & (distance < L1)
+    return {
+        "magnitude": np.where(occurring, magnitude, 0.0),
+        "obscuration": np.where(occurring, obscuration(distance, L1, L2), 0.0),
+        "gamma": gamma,
+    }
+
+
+def moon_eclipse_magnitudes(sun_pos, moon_pos, earth_pos):
+    """
+    月食的本影食分、半影食分与 gamma，对任意形状的时间序列一起计算
+    食分为月面进入本影/半影的深度与月球直径之比，gamma 为月心到地影轴的距离 (以 Re 为单位)
+    :return: {"umbral_magnitude": 本影食分, "penumbral_magnitude": 半影食分, "gamma": gamma}，
+             月球不在地球背日一侧时食分为0
+    """
+    sun_pos = np.asarray(sun_pos, dtype=np.float64)
+    m = np.asarray(moon_pos, dtype=np.float64) - sun_pos
+    e = np.asarray(earth_pos, dtype=np.float64) - sun_pos
+    # 地影轴方向：由太阳指向地球
+    e_norm = np.linalg.norm(e, axis=-1)
+    a = e / e_norm[..., None]
+    r = m - e
+    depth = np.sum(r * a, axis=-1)
+    sigma = np.linalg.norm(r - depth[..., None] * a, axis=-1)
+    # 月球所在处本影、半影的半径
+    umbra = Re - depth * (Rs - Re) / e_norm
+    penumbra = Re + depth * (Rs + Re) / e_norm
+    behind = depth > 0
+    return {
+        "umbral_magnitude": np.where(behind, np.clip((umbra + Rm - sigma) / (2 * Rm), 0, None), 0.0),
+        "penumbral_magnitude": np.where(behind, np.clip((penumbra + Rm - sigma) / (2 * Rm), 0, None), 0.0),
+        "gamma": sigma / Re,
+    }
+
+
+def classify_eclipses(sun_pos, moon_pos, earth_pos, chunk_size=CLASSIFY_CHUNK):
+    """
+    一次遍历同时判断日食和月食，判断规则与 check_sun_eclipse / check_moon_eclipse 相同
+    按块处理并复用预先分配的缓冲区，额外内存只有块大小的若干数组和两个 uint8 结果
+    月球相对太阳的位置 m、地球相对太阳的位置 e 对两种判断共用，各影锥顶点都在 m 或 e 所在直线上，
+    因此所有叉积都正比于 e×m，只需计算一次
+    :param sun_pos, moon_pos, earth_pos: 轨迹 (steps, 3)
+    :return: 日食类型编码 (steps,), 月食类型编码 (steps,)
+    """
+    steps = len(sun_pos)
+    solar = np.zeros(steps, dtype=np.uint8)
+    lunar = np.zeros(steps, dtype=np.uint8)
+    # 影锥顶点的位置系数
+    k1 = Rs / (Rs - Rm)
+    k2 = Rs / (Rs + Rm)
+    K1 = Rs / (Rs - Re)
+
+    size = max(1, min(chunk_size, steps))
+    m, e, c, r = (np.empty((size, 3)) for _ in range(4))
+    ee, mm, cc, rr, rm, dot0, dot1, t1, t2 = (np.empty(size) for _ in range(9))
+    for start in range(0, steps, size):
+        n = min(size, steps - start)
+        sl = slice(start, start + n)
+        m_, e_, c_, r_ = m[:n], e[:n], c[:n], r[:n]
+        ee_, mm_, cc_, rr_, rm_ = ee[:n], mm[:n], cc[:n], rr[:n], rm[:n]
+        dot0_, dot1_, t1_, t2_ = dot0[:n], dot1[:n], t1[:n], t2[:n]
+        # 将坐标原点移到太阳位置
+        np.subtract(moon_pos[sl], sun_pos[sl], out=m_)
+        np.subtract(earth_pos[sl], sun_pos[sl], out=e_)
+        np.einsum('ij,ij->i', e_, e_, out=ee_)
+        np.einsum('ij,ij->i', m_, m_, out=mm_)
+        np.einsum('ij,ij->i', e_, m_, out=dot0_)
+        # |e×m|^2
+        for i, j, k in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+            np.multiply(e_[:, j], m_[:, k], out=c_[:, i])
+            c_[:, i] -= e_[:, k] * m_[:, j]
+        np.einsum('ij,ij->i', c_, c_, out=cc_)
+        # 日食要求地球和太阳在月球两侧，月食要求相反的 dot0 符号
+        np.subtract(ee_, dot0_, out=dot0_)
+
+        # 日食：月球本影锥 (顶点 k1*m) 与半影锥 (顶点 k2*m)
+        solar_ = solar[sl]
+        for k, is_umbra in ((k2, False), (k1, True)):
+            # r = e - k*m 为顶点到地球的向量，月球到顶点的向量为 (1-k)*m
+            np.multiply(m_, k, out=r_)
+            np.subtract(e_, r_, out=r_)
+            np.einsum('ij,ij->i', r_, r_, out=rr_)
+            np.einsum('ij,ij->i', r_, m_, out=rm_)
+            np.multiply(rm_, 1 - k, out=dot1_)
+            threshold = t1_ if is_umbra else t2_
+            np.subtract(cc_, Re ** 2 * mm_, out=threshold)
+            threshold *= (1 - k) ** 2
+            threshold -= Rm ** 2 * rr_
+            threshold -= 2 * Re * Rm * (np.abs(dot1_) if is_umbra else dot1_)
+        aligned = dot0_ > 0
+        # 与 check_sun_eclipse 中 np.select 的优先级相同：偏食 < 环食 < 全食
+        solar_[(t2_ < 0) & (t1_ >= 0) & aligned] = PARTIAL
+        solar_[(t1_ < 0) & (dot1_ <= 0) & aligned & (rr_ > Re ** 2)] = ANNULAR
+        solar_[((t1_ < 0) & (dot1_ > 0) & aligned) | (rr_ < Re ** 2)] = TOTAL
+
+        # 月食：地球本影锥 (顶点 K1*e)
+        # r = m - K1*e 为顶点到月球的向量，地球到顶点的向量为 (1-K1)*e
+        np.multiply(e_, K1, out=r_)
+        np.subtract(m_, r_, out=r_)
+        np.einsum('ij,ij->i', r_, r_, out=rr_)
+        np.einsum('ij,ij->i', r_, e_, out=rm_)
+        np.multiply(rm_, 1 - K1, out=dot1_)
+        np.subtract(cc_, Rm ** 2 * ee_, out=t1_)
+        t1_ *= (1 - K1) ** 2
+        t1_ -= Re ** 2 * rr_
+        np.add(t1_, 2 * Re * Rm * dot1_, out=t2_)
+        t1_ -= 2 * Re * Rm * dot1_
+        lunar_ = lunar[sl]
+        aligned = dot0_ < 0
+        lunar_[(t1_ < 0) & (t2_ > 0) & aligned] = PARTIAL
+        lunar_[((t2_ < 0) & (dot1_ > 0) & aligned) | (rr_ < Rm ** 2)] = TOTAL
+    return solar, lunar
+
+
+def _edge_bounds(occurring):
+    """
+    轨迹首尾正在发生的食过程所占的范围之外的区间 [first, last]，与 trim_edge_eclipses 的规则相同
+    带批量维度 (..., T) 时对每条轨迹分别计算
+    """
+    steps = occurring.shape[-1]
+    first = np.where(occurring[..., 0], np.argmin(occurring, axis=-1), 0)
+    last = np.where(occurring[..., -1], steps - 1 - np.argmin(occurring[..., ::-1], axis=-1), steps - 1)
+    every = occurring.all(axis=-1)
+    return np.where(every, 0, first), np.where(every, -1, last)
+
+
+def trim_edge_eclipses(filtered_times, eclipse_types):
+    """
+    去掉与轨迹首尾相连的食过程：这些过程的开始或结束不在轨迹范围内，无法插值出准确时刻
+    """
+    first, last = _edge_bounds(eclipse_codes(eclipse_types) != NO_ECLIPSE)
+    return filtered_times[(filtered_times >= first) & (filtered_times <= last)]
+
+
+def _fine_positions(trajectories, t, fine_t_range, velocities=None, dt=None):
+    """
+    在第 t-1 步与第 t 步之间插值出细时间步上的日、月、地位置
+    不给出速度时用割线估计，给出速度时用三次埃尔米特插值，保留轨道的曲率
+    """
+    s = fine_t_range[:, 0]
+    return interpolate_positions(trajectories, np.full(len(s), t - 1), s, velocities, dt)
+
+
+def detect_accurate_times(check_fun, trajectories, filtered_times, eclipse_types, fine_steps, offset=0,
+                          velocities=None, dt=None):
+    """
+    :param offset: 轨迹第0步对应的全局时间步，输出的时刻均加上该偏移
+    :param velocities: 各天体的速度 {name: (steps, 3)} (AU/h)，如 simulate_rk4(with_velocity=True) 的返回值，
+                       给出时在相邻两步之间用三次埃尔米特插值代替割线估计，粗步长取数小时也能保持精度
+    :param dt: 轨迹的时间步长 (小时)
+    """
+    eclipse_start = []
+    eclipse_type = []
+    eclipse_end = []
+    # 生成细时间步用于插值
+    fine_t_range = (np.arange(fine_steps+1) / fine_steps)[:, None].repeat(3, axis=-1)
+    # 检测发生日/月食的临界点
+    for t in filtered_times:
+        # 检测开始偏食的时间点
+        if eclipse_types[t-1] is None:
+            fine_sun, fine_moon, fine_earth = _fine_positions(trajectories, t, fine_t_range, velocities, dt)
+            fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth, fine_t_range[:, 0])
+            eclipse_start.append(offset+t-1+fine_filtered_times[0])
+            eclipse_type.append("partial")
+        # 检测退出偏食的时间点
+        if eclipse_types[t+1] is None:
+            fine_sun, fine_moon, fine_earth = _fine_positions(trajectories, t+1, fine_t_range, velocities, dt)
+            fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth, fine_t_range[:, 0])
+            eclipse_end.append(offset+t+fine_filtered_times[-1])
+        if eclipse_types[t] != "partial":
+            # 检测从偏食转变为全食/环食的时间点
+            if eclipse_types[t-1] != eclipse_types[t]:
+                fine_sun, fine_moon, fine_earth = _fine_positions(trajectories, t, fine_t_range, velocities, dt)
+                fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth,
+                                                   fine_t_range[:, 0], eclipse_types[t])
+                eclipse_start.insert(-1, offset+t-1+fine_filtered_times[0])
+                eclipse_type.insert(-1, eclipse_types[t])
+            # 检测从全食/环食转变为偏食的时间点
+            if eclipse_types[t+1] != eclipse_types[t]:
+                fine_sun, fine_moon, fine_earth = _fine_positions(trajectories, t+1, fine_t_range, velocities, dt)
+                fine_filtered_times, _ = check_fun(fine_sun, fine_moon, fine_earth,
+                                                   fine_t_range[:, 0], eclipse_types[t])
+                eclipse_end.append(offset+t+fine_filtered_times[-1])
+    return eclipse_start, eclipse_type, eclipse_end
+
+
+def _transitions(codes):
+    """
+    类型发生变化的时间步：第 i 步与第 i+1 步类型不同，且不属于与轨迹首尾相连的食过程
+    :param codes: 类型编码 (T,) 或带批量维度的 (B, T)
+    :return: 展平后的下标 (K,)，即 b*T + i
+    """
+    codes = codes.reshape(-1, codes.shape[-1])
+    first, last = _edge_bounds(codes != NO_ECLIPSE)
+    member, index = np.nonzero(codes[:, :-1] != codes[:, 1:])
+    keep = (index >= first[member]) & (index < last[member])
+    return member[keep] * codes.shape[-1] + index[keep]
+
+
+def _phase_edges(check_fun, trajectories, codes, index, fine_steps, velocities=None, dt=None, block=1024):
+    """
+    在所有变化点一起细分插值，得到各类阶段的开始与结束时刻
+    :param trajectories: 展平的轨迹 {name: (T, 3)}，codes 与 index 的下标均指向它
+    :return: {类型编码: (开始时刻, 结束时刻)}，整个食过程记为偏食，全食/环食等内层阶段单独记录；
+             同类阶段均按时间先后排列
+    """
+    before, after = codes[index], codes[index + 1]
+
+    # 对所有变化点一起细分，得到细时间步上的类型 (K, fine_steps+1)
+    fine_s = np.arange(fine_steps + 1) / fine_steps
+    fine_types = np.empty((len(index), fine_steps + 1), dtype=np.uint8)
+    for b in range(0, len(index), block):
+        i = index[b:b + block, None]
+        sun, moon, earth = interpolate_positions(trajectories, i, np.broadcast_to(fine_s, (len(i), fine_steps + 1)),
+                                                 velocities, dt)
+        n = sun.shape[0] * sun.shape[1]
+        _, types = check_fun(sun.reshape(n, 3), moon.reshape(n, 3), earth.reshape(n, 3), np.arange(n),
+                             as_codes=True)
+        fine_types[b:b + block] = types.reshape(len(i), fine_steps + 1)
+
+    def first_fraction(mask):
+        return np.argmax(mask, axis=1) / fine_steps
+
+    def last_fraction(mask):
+        return (fine_steps - np.argmax(mask[:, ::-1], axis=1)) / fine_steps
+
+    occurring = fine_types != NO_ECLIPSE
+    begin = before == NO_ECLIPSE
+    finish = after == NO_ECLIPSE
+    edges = {PARTIAL: (index[begin] + first_fraction(occurring[begin]),
+                       index[finish] + last_fraction(occurring[finish]))}
+    for code in (TOTAL, ANNULAR):
+        begin = after == code
+        finish = before == code
+        edges[code] = (index[begin] + first_fraction(fine_types[begin] == code),
+                       index[finish] + last_fraction(fine_types[finish] == code))
+    return edges
+
+
+def _pair_phases(edges):
+    """
+    同类阶段的第k个开始与第k个结束配对，按结束时刻排序，使内层阶段排在所属食过程之前
+    没有结束时刻的阶段 (在轨迹末尾仍未结束) 被去掉
+    :param edges: _phase_edges 的返回值
+    :return: (eclipse_start, eclipse_type, eclipse_end)，类型为 uint8 编码
+    """
+    starts, ends, types = [], [], []
+    for code, (start, end) in edges.items():
+        starts.append(start[:len(end)])
+        ends.append(end)
+        types.append(np.full(len(end), code, dtype=np.uint8))
+    eclipse_start = np.concatenate(starts)
+    eclipse_end = np.concatenate(ends)
+    eclipse_type = np.concatenate(types)
+    order = np.argsort(eclipse_end, kind='stable')
+    return eclipse_start[order], eclipse_type[order], eclipse_end[order]
+
+
+def detect_accurate_times_batched(check_fun, trajectories, eclipse_types, fine_steps, offset=0, velocities=None,
+                                  dt=None, block=1024, as_codes=False):
+    """
+    detect_accurate_times 的向量化版本：用数组差分找出所有类型变化的时间步，分块一次性插值细分并判断，
+    不对单个事件做 Python 循环
+    与轨迹首尾相连的食过程被去掉 (同 trim_edge_eclipses)
+    :param eclipse_types: check_fun 在粗时间步上的判断结果，字符串或 uint8 编码均可
+    :param block: 每次一起细分的变化点个数，限制临时数组的大小
+    :param as_codes: 为 True 时返回的类型为 uint8 编码
+    :return: (eclipse_start, eclipse_type, eclipse_end) 数组，顺序与 detect_accurate_times 相同
+    """
+    codes = eclipse_codes(eclipse_types)
+    eclipse_start, eclipse_type, eclipse_end = _pair_phases(_phase_edges(check_fun, trajectories, codes,
+                                                                         _transitions(codes), fine_steps,
+                                                                         velocities, dt, block))
+    return eclipse_start + offset, eclipse_type if as_codes else eclipse_names(eclipse_type), eclipse_end + offset
+
+
+def find_contacts(shadow_fun, trajectories, velocities=None, dt=None, xtol=1e-6, contacts=None):
+    """
+    用影子函数在相邻两步之间变号的位置作为初始区间，以伊利诺伊法求出各接触时刻
+    所有接触一起求解，每次迭代只调用一次 shadow_fun
+    :param shadow_fun: sun_shadow_functions 或 moon_shadow_functions
+    :param trajectories: 模拟得到的轨迹 {name: (steps, 3)}
+    :param velocities: 各天体的速度，给出时步间用三次埃尔米特插值，否则线性插值
+    :param dt: 时间步长 (小时)
+    :param xtol: 接触时刻的容差 (步)
+    :param contacts: 接触定义，默认按 shadow_fun 取 SOLAR_CONTACTS 或 LUNAR_CONTACTS
+    :return: 按时间排序的接触时刻 (步) 与接触名称，如 "C1", "U2"
+    """
+    if contacts is None:
+        contacts = SOLAR_CONTACTS if shadow_fun is sun_shadow_functions else LUNAR_CONTACTS
+    shadow = shadow_fun(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'])
+    # 只考虑三个天体排列在同一侧的时段
+    aligned = (shadow["dot0"][:-1] > 0) & (shadow["dot0"][1:] > 0)
+
+    index, which, names, fa, fb = [], [], [], [], []
+    for i, (key, entering, leaving) in enumerate(contacts):
+        g = shadow[key]
+        steps = np.flatnonzero(aligned & ((g[:-1] < 0) != (g[1:] < 0)))
+        index.append(steps)
+        which.append(np.full(len(steps), i))
+        names.append(np.where(g[steps] >= 0, entering, leaving))
+        fa.append(g[steps])
+        fb.append(g[steps + 1])
+    index = np.concatenate(index)
+    if len(index) == 0:
+        return np.zeros(0), np.zeros(0, dtype='<U2')
+    names = np.concatenate(names)
+    which = np.concatenate(which)
+
+    def f(s, active):
+        sun, moon, earth = interpolate_positions(trajectories, index[active], s, velocities, dt)
+        values = shadow_fun(sun, moon, earth)
+        # 每个区间取各自接触对应的影子函数
+        return np.stack([values[key] for key, _, _ in contacts])[which[active], np.arange(len(active))]
+
+    s = illinois(f, np.zeros(len(index)), np.ones(len(index)), np.concatenate(fa), np.concatenate(fb), xtol)
+    times = index + s
+    order = np.argsort(times, kind='stable')
+    return times[order], names[order]
+
+
+def _positions_at(trajectories, t, velocities=None, dt=None):
+    """
+    在任意时刻 t (步，可为小数) 插值日、月、地位置
+    """
+    index = np.clip(np.floor(t).astype(int), 0, len(trajectories['Sun']) - 2)
+    return interpolate_positions(trajectories, index, t - index, velocities, dt)
+
+
+def greatest_eclipse(magnitude_fun, trajectories, eclipse_start, eclipse_end, velocities=None, dt=None,
+                     samples=GREATEST_SAMPLES):
+    """
+    求每个食阶段内 gamma 取极小的时刻 (食甚) 及该时刻的食分等量，所有阶段一起计算
+    先在各阶段内等间隔的 samples 个时刻上求 gamma，再用极小点附近三点的抛物线修正；
+    日/月相对运动近似匀速时 gamma^2 近似为时间的二次函数，修正后误差远小于采样间隔
+    :param magnitude_fun: sun_eclipse_magnitudes 或 moon_eclipse_magnitudes
+    :param eclipse_start, eclipse_end: 各阶段的起止时刻 (步)，如 detect_accurate_times_batched 的输出
+    :param velocities: 各天体的速度，给出时步间用三次埃尔米特插值
+    :param dt: 时间步长 (小时)
+    :return: 食甚时刻 (步)，{name: 食甚时的值}
+    """
+    eclipse_start = np.asarray(eclipse_start, dtype=np.float64)
+    eclipse_end = np.asarray(eclipse_end, dtype=np.float64)
+    step = (eclipse_end - eclipse_start) / (samples - 1)
+    t = eclipse_start[:, None] + step[:, None] * np.arange(samples)
+    gamma2 = magnitude_fun(*_positions_at(trajectories, t, velocities, dt))["gamma"] ** 2
+
+    rows = np.arange(len(t))
+    k = np.clip(np.argmin(gamma2, axis=1), 1, samples - 2)
+    g0, g1, g2 = gamma2[rows, k - 1], gamma2[rows, k], gamma2[rows, k + 1]
+    curvature = g0 - 2 * g1 + g2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shift = np.where(curvature > 0, 0.5 * (g0 - g2) / curvature, 0.0)
+    t_max = np.clip(t[rows, k] + np.clip(shift, -1, 1) * step, eclipse_start, eclipse_end)
+    return t_max, magnitude_fun(*_positions_at(trajectories, t_max, velocities, dt))
+
+
+def detect_streaming(chunks, fine_steps, check_funs=(check_sun_eclipse, check_moon_eclipse), dt=None):
+    """
+    逐块检测日/月食并插值出准确时刻，只保留各阶段的起止时刻，内存占用与模拟时长无关
+    相邻两块重叠一步，每个类型变化点恰好在某一块中被细分一次；跨越块边界的阶段在全部块处理完后配对
+    :param chunks: 轨迹块的迭代器，如 ThreeBodySimulator.stream_rk4，相邻两块重叠一步；
+                   块中带有速度 (stream_rk4(with_velocity=True)) 时使用埃尔米特插值
+    :param fine_steps: 插值的细分步数
+    :param check_funs: 依次使用的检测函数
+    :param dt: 轨迹的时间步长 (小时)，块中带有速度时必须提供
+    :return: 每个检测函数对应一组 (eclipse_start, eclipse_type, eclipse_end) 数组，
+             类型为 uint8 编码，与 detect_accurate_times_batched(as_codes=True) 的格式相同
+    """
+    edges = [{code: ([], []) for code in (PARTIAL, TOTAL, ANNULAR)} for _ in check_funs]
+    started = [False] * len(check_funs)
+    for chunk in chunks:
+        trajectories, t_range = chunk[:2]
+        velocities = chunk[2] if len(chunk) > 2 else None
+
+        for k, check_fun in enumerate(check_funs):
+            _, codes = check_fun(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'], t_range,
+                                 as_codes=True)
+            index = np.flatnonzero(codes[:-1] != codes[1:])
+            if not started[k]:
+                # 模拟开始时正在发生的食过程没有开始时刻，跳过其中的变化点
+                clear = np.flatnonzero(codes == NO_ECLIPSE)
+                if len(clear) == 0:
+                    continue
+                index = index[index >= clear[0]]
+                started[k] = True
+            phases = _phase_edges(check_fun, trajectories, codes, index, fine_steps, velocities, dt)
+            for code, (start, end) in phases.items():
+                edges[k][code][0].append(start + t_range[0])
+                edges[k][code][1].append(end + t_range[0])
+
+    # 模拟结束时仍未结束的阶段没有结束时刻，配对时去掉
+    return [_pair_phases({code: (np.concatenate([np.empty(0)] + starts), np.concatenate([np.empty(0)] + ends))
+                          for code, (starts, ends) in phase_edges.items()})
+            for phase_edges in edges]
+
+
+def ensemble_contact_spread(check_fun, trajectories, t_range, fine_steps, window=48, block=1024):
+    """
+    统计集合预报中每次日/月食各阶段起止时刻的离散程度
+    所有成员的轨迹展平后一起细分插值 (同 detect_accurate_times_batched)，
+    再按 (成员, 开始时刻) 排序后用二分查找为每个基准事件匹配各成员的事件
+    :param check_fun: check_sun_eclipse 或 check_moon_eclipse
+    :param trajectories: 集合轨迹 {name: (B, steps, 3)}，第0个成员作为基准
+    :param t_range: 时间步序号
+    :param fine_steps: 插值的细分步数
+    :param window: 与基准事件匹配时允许的最大开始时间差 (步)
+    :param block: 每次一起细分的变化点个数
+    :return: 按基准事件排列的列表，每项包含类型、各成员的起止时刻及其均值和标准差 (步)
+    """
+    _, codes = check_fun(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'], t_range, as_codes=True)
+    members, steps = codes.shape
+    flat = {name: traj.reshape(-1, 3) for name, traj in trajectories.items()}
+    codes = codes.reshape(-1)
+    start, types, end = _pair_phases(_phase_edges(check_fun, flat, codes, _transitions(codes), fine_steps,
+                                                  block=block))
+    member = (start // steps).astype(int)
+    start = start - member * steps
+    end = end - member * steps
+
+    base = member == 0
+    base_start, base_type = start[base], types[base]
+    starts = np.full((len(base_start), members), np.nan)
+    ends = np.full((len(base_start), members), np.nan)
+    # 以 成员*span + 开始时刻 为键排序，span 大于轨迹长度加两倍窗口，不同成员的事件不会落入同一窗口
+    span = steps + 2 * window + 1
+    for code in np.unique(base_type):
+        rows = np.flatnonzero(base_type == code)
+        candidates = np.flatnonzero(types == code)
+        keys = member[candidates] * span + start[candidates]
+        order = np.argsort(keys, kind='stable')
+        keys, candidates = keys[order], candidates[order]
+        # 每个基准事件在每个成员中开始时刻最接近的同类事件：二分位置两侧的候选取较近者
+        query = np.arange(members) * span + base_start[rows, None]
+        pos = np.searchsorted(keys, query)
+        below = np.clip(pos - 1, 0, len(keys) - 1)
+        above = np.clip(pos, 0, len(keys) - 1)
+        nearest = np.where(np.abs(keys[below] - query) <= np.abs(keys[above] - query), below, above)
+        found = np.abs(keys[nearest] - query) <= window
+        chosen = candidates[nearest]
+        starts[rows] = np.where(found, start[chosen], np.nan)
+        ends[rows] = np.where(found, end[chosen], np.nan)
+
+    spread = []
+    for k, type in enumerate(eclipse_names(base_type)):
+        spread.append({
+            'type': type,
+            'start': starts[k],
+            'end': ends[k],
+            'start_mean': np.nanmean(starts[k]),
+            'start_std': np.nanstd(starts[k]),
+            'end_mean': np.nanmean(ends[k]),
+            'end_std': np.nanstd(ends[k]),
+            # 预报出该事件的成员比例
+            'detected': np.mean(~np.isnan(starts[k])),
+        })
+    return spread
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def hermite_quintic(p0, v0, a0, p1, v1, a1, h, s):
+    """
+    五次埃尔米特插值：由区间两端的位置、速度、加速度得到区间内任意时刻的位置和速度
+    :param p0, v0, a0: 区间起点的位置、速度、加速度 (..., 3)
+    :param p1, v1, a1: 区间终点的位置、速度、加速度 (..., 3)
+    :param h: 区间长度 (小时)，标量或可与 p0[..., 0] 广播的数组
+    :param s: 归一化时间 (t - t0) / h，取值 [0, 1]，形状 (..., ) 与 p0[..., 0] 可广播
+    :return: 插值得到的位置和速度
+    """
+    s = np.asarray(s, dtype=np.float64)[..., None]
+    h = np.asarray(h, dtype=np.float64)[..., None]
+    s2 = s * s
+    s3 = s2 * s
+    s4 = s3 * s
+    s5 = s4 * s
+
+    # 基函数
+    h0 = 1 - 10 * s3 + 15 * s4 - 6 * s5
+    h1 = s - 6 * s3 + 8 * s4 - 3 * s5
+    h2 = (s2 - 3 * s3 + 3 * s4 - s5) / 2
+    h3 = 10 * s3 - 15 * s4 + 6 * s5
+    h4 = -4 * s3 + 7 * s4 - 3 * s5
+    h5 = (s3 - 2 * s4 + s5) / 2
+    pos = h0 * p0 + h1 * h * v0 + h2 * h * h * a0 + h3 * p1 + h4 * h * v1 + h5 * h * h * a1
+
+    # 基函数对 s 的导数
+    d0 = -30 * s2 + 60 * s3 - 30 * s4
+    d1 = 1 - 18 * s2 + 32 * s3 - 15 * s4
+    d2 = (2 * s - 9 * s2 + 12 * s3 - 5 * s4) / 2
+    d4 = -12 * s2 + 28 * s3 - 15 * s4
+    d5 = (3 * s2 - 8 * s3 + 5 * s4) / 2
+    vel = (d0 * (p0 - p1)) / h + d1 * v0 + d2 * h * a0 + d4 * v1 + d5 * h * a1
+    return pos, vel
+
+
+def hermite_cubic(p0, v0, p1, v1, h, s):
+    """
+    三次埃尔米特插值：只用区间两端的位置和速度，积分器每步都已得到这些量，无需重新积分
+    :param p0, v0: 区间起点的位置、速度 (..., 3)
+    :param p1, v1: 区间终点的位置、速度 (..., 3)
+    :param h: 区间长度 (小时)
+    :param s: 归一化时间 (t - t0) / h，取值 [0, 1]，形状 (..., ) 与 p0[..., 0] 可广播
+    :return: 插值得到的位置
+    """
+    s = np.asarray(s, dtype=np.float64)[..., None]
+    s2 = s * s
+    s3 = s2 * s
+    h00 = 2 * s3 - 3 * s2 + 1
+    h10 = s3 - 2 * s2 + s
+    h01 = -2 * s3 + 3 * s2
+    h11 = s3 - s2
+    return h00 * p0 + h10 * h * v0 + h01 * p1 + h11 * h * v1
+
+
+def interpolate_positions(trajectories, index, s, velocities=None, dt=None):
+    """
+    在第 index 步与第 index+1 步之间的归一化时刻 s 处插值日、月、地位置，index 与 s 为同形状的数组
+    不给出速度时线性插值，给出速度时用三次埃尔米特插值
+    :param trajectories: 轨迹 {name: (steps, 3)}
+    :param velocities: 各天体的速度 {name: (steps, 3)}
+    :param dt: 时间步长 (小时)，给出 velocities 时必须提供
+    :return: [日, 月, 地] 的位置，各为 (*index.shape, 3)
+    """
+    if velocities is not None and dt is None:
+        raise ValueError("Error: 'dt' is required for Hermite interpolation!")
+    positions = []
+    for name in ('Sun', 'Moon', 'Earth'):
+        p0 = trajectories[name][index]
+        p1 = trajectories[name][index + 1]
+        if velocities is None:
+            positions.append(p0 + (p1 - p0) * s[..., None])
+        else:
+            positions.append(hermite_cubic(p0, velocities[name][index], p1, velocities[name][index + 1], dt, s))
+    return positions
@@ -0,0 +1,31 @@
+import numpy as np
+
+# 日食的食分与遮挡面积比都由基本平面上观测点到影轴的距离 separation 与该处的半影、本影半径 L1, L2 给出：
+# 太阳的半径为 (L1+L2)/2，月球的半径为 (L1-L2)/2 (L2 < 0 时月球较大)
+
+
+def eclipse_magnitude(separation, L1, L2):
+    """
+    食分：日面直径被月面遮住的比例 (L1-separation)/(L1+L2)
+    位于本影/伪本影中 (separation < |L2|) 时按 NASA 日食表的约定取月面与日面视直径之比 (L1-L2)/(L1+L2)，
+    全食时大于1、环食时小于1
+    """
+    return np.where(separation < np.abs(L2), (L1 - L2) / (L1 + L2), (L1 - separation) / (L1 + L2))
+
+
+def obscuration(separation, L1, L2):
+    """
+    日面被月面遮住的面积比例
+    """
+    separation = np.asarray(separation, dtype=np.float64)
+    r_sun = (L1 + L2) / 2
+    k = (L1 - L2) / 2 / r_sun
+    s = separation / r_sun
+    with np.errstate(invalid='ignore', divide='ignore'):
+        c1 = np.clip((s * s + k * k - 1) / (2 * s * k), -1, 1)
+        c2 = np.clip((s * s + 1 - k * k) / (2 * s), -1, 1)
+        area = k * k * np.arccos(c1) + np.arccos(c2) - \
+            0.5 * np.sqrt(np.clip((-s + k + 1) * (s + k - 1) * (s - k + 1) * (s + k + 1), 0, None))
+    result = area / np.pi
+    result = np.where(s >= 1 + k, 0.0, result)
+    return np.where(s <= np.abs(1 - k), np.minimum(1.0, k * k), result)
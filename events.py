@@ -0,0 +1,61 @@
+import numpy as np
+from check_eclipse import ECLIPSE_NAMES, eclipse_codes
+from constants import START_JD_TT
+
+# 日月食事件记录：时刻为儒略日 (TT)，类型为 check_eclipse 中的 uint8 编码
+# 日食的 magnitude 为食分，月食的 magnitude 为本影食分；gamma 为食甚时影轴与地心 (月心) 的距离
+# obscuration 只对日食、penumbral_magnitude 只对月食有意义，另一种食中为 nan
+EVENT_DTYPE = np.dtype([
+    ("start", np.float64),
+    ("max", np.float64),
+    ("end", np.float64),
+    ("type", np.uint8),
+    ("magnitude", np.float64),
+    ("obscuration", np.float64),
+    ("penumbral_magnitude", np.float64),
+    ("gamma", np.float64),
+])
+EVENT_KINDS = ("solar_eclipses", "lunar_eclipses")
+
+
+def make_events(eclipse_start, eclipse_type, eclipse_max, eclipse_end, magnitudes, dt, jd_start=START_JD_TT):
+    """
+    把检测结果整理为结构化数组，不经过文本输出
+    :param eclipse_start, eclipse_type, eclipse_max, eclipse_end: 各阶段的起止时刻、食甚 (步) 与类型 (字符串或编码)
+    :param magnitudes: check_eclipse.greatest_eclipse 返回的食甚时各量
+    :param dt: 时间步长 (小时)
+    :param jd_start: 第0步的儒略日 (TT)
+    :return: EVENT_DTYPE 的结构化数组
+    """
+    events = np.zeros(len(eclipse_start), dtype=EVENT_DTYPE)
+    events["start"] = jd_start + np.asarray(eclipse_start, dtype=np.float64) * dt / 24
+    events["max"] = jd_start + np.asarray(eclipse_max, dtype=np.float64) * dt / 24
+    events["end"] = jd_start + np.asarray(eclipse_end, dtype=np.float64) * dt / 24
+    events["type"] = eclipse_codes(eclipse_type)
+    events["magnitude"] = magnitudes["magnitude"] if "magnitude" in magnitudes else magnitudes["umbral_magnitude"]
+    events["obscuration"] = magnitudes.get("obscuration", np.nan)
+    events["penumbral_magnitude"] = magnitudes.get("penumbral_magnitude", np.nan)
+    events["gamma"] = magnitudes["gamma"]
+    return events
+
+
+def event_types(events):
+    """
+    事件类型的字符串数组
+    """
+    return ECLIPSE_NAMES[events["type"]]
+
+
+def save_events(path, solar_events, lunar_events):
+    """
+    以二进制 (npz) 保存日食、月食事件，读写都不经过文本解析
+    """
+    np.savez(path, **dict(zip(EVENT_KINDS, (solar_events, lunar_events))))
+
+
+def load_events(path):
+    """
+    :return: {"solar_eclipses": 结构化数组, "lunar_eclipses": 结构化数组}，可直接传给 evaluate.evaluate
+    """
+    with np.load(path) as data:
+        return {kind: data[kind].astype(EVENT_DTYPE) for kind in EVENT_KINDS}
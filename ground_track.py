@@ -0,0 +1,178 @@
+import numpy as np
+from constants import EARTH_FLATTENING, EARTH_EQUATORIAL_RADIUS
+from besselian import ELEMENT_NAMES, ELEMENT_HOURS
+
+# 食带的采样间隔 (分钟)
+TRACK_MINUTES = 1
+# 求本影界限时的迭代次数
+LIMIT_ITERATIONS = 4
+# 简化中心线与界限时允许的最大偏差 (km)，远小于食带宽度和中心线位置的误差
+TRACK_TOLERANCE_KM = 1.0
+# 地球椭球的第一偏心率的平方
+E2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+
+
+def _stack(elements_list, t):
+    """
+    所有日食的根数在各自的采样时刻一起求值
+    :param t: 相对各自参考时刻的小时数 (K, S)
+    :return: 根数 {name: (K, S)}，对时间的导数 {name: (K, S)}，tan_f2 (K, 1)
+    """
+    values, rates = {}, {}
+    for name in ELEMENT_NAMES:
+        coefs = np.stack([elements.coefs[name] for elements in elements_list])
+        derivative = coefs[:, :-1] * np.arange(coefs.shape[1] - 1, 0, -1)
+        # 逐列 Horner 求值
+        values[name] = np.zeros(t.shape)
+        for k in range(coefs.shape[1]):
+            values[name] = values[name] * t + coefs[:, k:k + 1]
+        rates[name] = np.zeros(t.shape)
+        for k in range(derivative.shape[1]):
+            rates[name] = rates[name] * t + derivative[:, k:k + 1]
+    tan_f2 = np.array([elements.tan_f2 for elements in elements_list])[:, None]
+    return values, rates, tan_f2
+
+
+def _ellipsoid_frame(d):
+    """
+    为处理地球扁率，把基本平面的 y 轴按 1/rho1 拉伸后，地球变为单位球
+    :return: rho1, rho2, sin d1, cos d1, sin(d1-d2), cos(d1-d2)
+    """
+    sin_d, cos_d = np.sin(d), np.cos(d)
+    rho1 = np.sqrt(1 - E2 * cos_d ** 2)
+    rho2 = np.sqrt(1 - E2 * sin_d ** 2)
+    sin_d1 = sin_d / rho1
+    cos_d1 = np.sqrt(1 - E2) * cos_d / rho1
+    sin_d12 = E2 * sin_d * cos_d / (rho1 * rho2)
+    cos_d12 = np.sqrt(1 - E2) / (rho1 * rho2)
+    return rho1, rho2, sin_d1, cos_d1, sin_d12, cos_d12
+
+
+def _to_geographic(xi, eta, mu, d):
+    """
+    基本平面上的点 (xi, eta) 投影到地球椭球表面 (朝向太阳的一侧)，得到大地经纬度
+    :return: 纬度、经度 (度，东经为正)，zeta；不与地球相交处为 nan
+    """
+    rho1, rho2, sin_d1, cos_d1, sin_d12, cos_d12 = _ellipsoid_frame(d)
+    eta1 = eta / rho1
+    with np.errstate(invalid='ignore'):
+        zeta1 = np.sqrt(1 - xi ** 2 - eta1 ** 2)
+    sin_phi1 = eta1 * cos_d1 + zeta1 * sin_d1
+    cos_phi1_cos_H = zeta1 * cos_d1 - eta1 * sin_d1
+    H = np.arctan2(xi, cos_phi1_cos_H)
+    phi1 = np.arcsin(np.clip(sin_phi1, -1, 1))
+    lat = np.degrees(np.arctan(np.tan(phi1) / np.sqrt(1 - E2)))
+    lon = (np.degrees(H - mu) + 180) % 360 - 180
+    zeta = rho2 * (zeta1 * cos_d12 - eta1 * sin_d12)
+    return lat, lon, zeta
+
+
+def _surface_points(lat, lon):
+    """
+    经纬度 (度) 对应的地面点 (以赤道半径为半径的球面)，单位 km，用于度量折线的偏差
+    """
+    phi, lam = np.radians(lat), np.radians(lon)
+    return EARTH_EQUATORIAL_RADIUS * np.stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)],
+                                              -1)
+
+
+def simplify_track(points, tolerance=TRACK_TOLERANCE_KM):
+    """
+    Douglas-Peucker 折线简化：反复保留离当前保留点连线最远的采样点，直到其余点的偏差都不超过 tolerance
+    偏差按地面点之间的直线距离计算，避免经度跨越 ±180 度时出错
+    :param points: 折线 (n, 2) [纬度, 经度]
+    :param tolerance: 允许的最大偏差 (km)
+    :return: 保留点的掩码 (n,)，首尾点总是保留
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[[0, -1]] = True
+    xyz = _surface_points(points[:, 0], points[:, 1])
+    pending = [(0, n - 1)]
+    while pending:
+        first, last = pending.pop()
+        if last - first < 2:
+            continue
+        a, chord = xyz[first], xyz[last] - xyz[first]
+        offset = xyz[first + 1:last] - a
+        length2 = chord @ chord
+        s = np.clip(offset @ chord / length2, 0, 1) if length2 > 0 else np.zeros(len(offset))
+        distance = np.linalg.norm(offset - s[:, None] * chord, axis=1)
+        k = np.argmax(distance)
+        if distance[k] > tolerance:
+            middle = first + 1 + k
+            keep[middle] = True
+            pending += [(first, middle), (middle, last)]
+    return keep
+
+
+def ground_tracks(elements_list, step_minutes=TRACK_MINUTES, half_width=ELEMENT_HOURS,
+                  iterations=LIMIT_ITERATIONS, tolerance=TRACK_TOLERANCE_KM):
+    """
+    计算全食/环食的中心线以及本影 (伪本影) 的南北界限，所有日食的所有采样时刻一起计算
+    界限上的观测者在其本地食甚时恰好位于本影边缘：(u, v) 与影子的相对速度 (a, b) 垂直且 |(u, v)| = |L2|
+    :param elements_list: besselian.BesselianElements 的列表
+    :param step_minutes: 采样间隔 (分钟)
+    :param half_width: 在参考时刻前后采样的时长 (小时)，不应超过根数的拟合区间
+    :param tolerance: 用 simplify_track 简化各折线时允许的最大偏差 (km)，为 None 时返回全部采样点
+    :return: 与 elements_list 一一对应的字典列表，时刻为相对模拟起点的小时数，折线为简化后保留的采样点
+             "time": 中心线各点的时刻, "central": 中心线 (n, 2) [纬度, 经度],
+             "type": 中心线各点的类型 ("total" 或 "annular"),
+             "north", "south": 南北界限 (m, 2)，以及对应的时刻 "north_time", "south_time"
+             影轴不与地球相交 (非中心食) 时中心线为空
+    """
+    if len(elements_list) == 0:
+        return []
+    offsets = np.arange(-half_width, half_width + 1e-9, step_minutes / 60)
+    t = np.broadcast_to(offsets, (len(elements_list), len(offsets)))
+    values, rates, tan_f2 = _stack(elements_list, t)
+    x, y, l2 = values["x"], values["y"], values["l2"]
+    d, mu = np.radians(values["d"]), np.radians(values["mu"])
+    mu_rate, d_rate = np.radians(rates["mu"]), np.radians(rates["d"])
+    sin_d, cos_d = np.sin(d), np.cos(d)
+
+    # 中心线：影轴与椭球的交点
+    lat, lon, zeta = _to_geographic(x, y, mu, d)
+    L2 = l2 - zeta * tan_f2
+    central_type = np.where(L2 < 0, "total", "annular")
+
+    # 南北界限：从中心线出发迭代，每次用当前估计的 zeta 更新 L2 与相对速度
+    limits = {}
+    for name, side in (("north", 1), ("south", -1)):
+        xi, eta, z = x, y, np.where(np.isnan(zeta), 0.0, zeta)
+        for _ in range(iterations):
+            a = rates["x"] - mu_rate * (z * cos_d - eta * sin_d)
+            b = rates["y"] - (mu_rate * xi * sin_d - z * d_rate)
+            n = np.hypot(a, b)
+            L = np.abs(l2 - z * tan_f2)
+            # 影子大体自西向东移动，其运动方向左侧为北界
+            xi = x - side * L * b / n
+            eta = y + side * L * a / n
+            limit_lat, limit_lon, z = _to_geographic(xi, eta, mu, d)
+            z = np.where(np.isnan(z), 0.0, z)
+        limits[name] = (limit_lat, limit_lon)
+
+    def simplified(points):
+        return np.ones(len(points), dtype=bool) if tolerance is None else simplify_track(points, tolerance)
+
+    tracks = []
+    for k, elements in enumerate(elements_list):
+        time = offsets + elements.t0
+        on_earth = ~np.isnan(lat[k])
+        central = np.stack([lat[k][on_earth], lon[k][on_earth]], -1)
+        types = central_type[k][on_earth]
+        # 全食与环食相互转变处的两个采样点总是保留
+        keep = simplified(central)
+        change = np.flatnonzero(types[:-1] != types[1:])
+        keep[change] = keep[change + 1] = True
+        track = {"time": time[on_earth][keep], "central": central[keep], "type": types[keep]}
+        for name, (limit_lat, limit_lon) in limits.items():
+            valid = ~np.isnan(limit_lat[k])
+            points = np.stack([limit_lat[k][valid], limit_lon[k][valid]], -1)
+            keep = simplified(points)
+            track[name] = points[keep]
+            track[name + "_time"] = time[valid][keep]
+        tracks.append(track)
+    return tracks
@@ -0,0 +1,91 @@
+import math
+import numpy as np
+
+# 斯图姆夫函数在 |z| < STUMPFF_SERIES_LIMIT 时使用级数展开
+# C = sum (-z)^k/(2k+2)!, S = sum (-z)^k/(2k+3)!，取到 k=7 时截断误差低于 1e-17
+STUMPFF_SERIES_LIMIT = 0.1
+_C_COEFS = tuple((-1) ** k / math.factorial(2 * k + 2) for k in range(8))[::-1]
+_S_COEFS = tuple((-1) ** k / math.factorial(2 * k + 3) for k in range(8))[::-1]
+
+
+def _stumpff_series(z):
+    c = np.full_like(z, _C_COEFS[0])
+    s = np.full_like(z, _S_COEFS[0])
+    for coef_c, coef_s in zip(_C_COEFS[1:], _S_COEFS[1:]):
+        c = c * z + coef_c
+        s = s * z + coef_s
+    return c, s
+
+
+def stumpff(z):
+    """
+    计算斯图姆夫函数 C(z), S(z)
+    |z| 较小时使用级数展开，避免 1-cos, x-sin x 的相消误差
+    :param z: 数组
+    :return: C(z), S(z)
+    """
+    z = np.asarray(z, dtype=np.float64)
+    small = np.abs(z) < STUMPFF_SERIES_LIMIT
+    # 短步长下绝大多数情况都落在级数范围内
+    if np.all(small):
+        return _stumpff_series(z)
+
+    c = np.zeros_like(z)
+    s = np.zeros_like(z)
+    c[small], s[small] = _stumpff_series(z[small])
+
+    # 椭圆情形
+    pos = ~small & (z > 0)
+    x = np.sqrt(z[pos])
+    c[pos] = (1 - np.cos(x)) / z[pos]
+    s[pos] = (x - np.sin(x)) / x ** 3
+
+    # 双曲情形
+    neg = ~small & (z < 0)
+    x = np.sqrt(-z[neg])
+    c[neg] = (np.cosh(x) - 1) / (-z[neg])
+    s[neg] = (np.sinh(x) - x) / x ** 3
+    return c, s
+
+
+def kepler_drift(r, v, mu, dt, tol=1e-15, max_iter=50):
+    """
+    用普适变量法求解二体问题，将相对位置、速度沿开普勒轨道推进 dt
+    :param r: 相对位置 (..., 3)
+    :param v: 相对速度 (..., 3)
+    :param mu: 中心引力参数 GM (...)
+    :param dt: 推进的时间 (小时)，标量或可广播的数组
+    :return: 推进后的位置和速度
+    """
+    r = np.asarray(r, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    mu = np.asarray(mu, dtype=np.float64)
+    sqrt_mu = np.sqrt(mu)
+
+    r0 = np.linalg.norm(r, axis=-1)
+    rv0 = np.sum(r * v, axis=-1) / sqrt_mu
+    alpha = 2 / r0 - np.sum(v * v, axis=-1) / mu
+
+    # 牛顿迭代求解普适开普勒方程
+    chi = sqrt_mu * dt / r0
+    for _ in range(max_iter):
+        chi2 = chi * chi
+        c, s = stumpff(alpha * chi2)
+        f = rv0 * chi2 * c + (1 - alpha * r0) * chi2 * chi * s + r0 * chi - sqrt_mu * dt
+        df = rv0 * chi * (1 - alpha * chi2 * s) + (1 - alpha * r0) * chi2 * c + r0
+        delta = f / df
+        chi = chi - delta
+        if np.all(np.abs(delta) <= tol * np.maximum(np.abs(chi), 1e-300)):
+            break
+
+    # 拉格朗日系数
+    chi2 = chi * chi
+    c, s = stumpff(alpha * chi2)
+    f = 1 - chi2 / r0 * c
+    g = dt - chi2 * chi / sqrt_mu * s
+    new_r = f[..., None] * r + g[..., None] * v
+    rn = np.linalg.norm(new_r, axis=-1)
+    fdot = sqrt_mu / (rn * r0) * (alpha * chi2 * s - 1) * chi
+    gdot = 1 - chi2 / rn * c
+    new_v = fdot[..., None] * r + gdot[..., None] * v
+    return new_r, new_v
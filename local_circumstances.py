@@ -0,0 +1,124 @@
+import numpy as np
+from constants import EARTH_EQUATORIAL_RADIUS, EARTH_FLATTENING
+from eclipse_geometry import eclipse_magnitude, obscuration
+
+# 求食甚与各接触时刻的迭代次数，每次迭代对所有观测者一起计算
+ITERATIONS = 4
+
+
+def observer_geocentric(lat, lon, height=0.0):
+    """
+    观测者的地心坐标参数
+    :param lat: 大地纬度 (度)，任意形状的数组
+    :param lon: 经度 (度)，东经为正
+    :param height: 海拔 (米)
+    :return: rho*sin(phi'), rho*cos(phi') (以地球赤道半径为单位)，以及经度、纬度 (弧度)
+    """
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    h = np.asarray(height, dtype=np.float64) / (EARTH_EQUATORIAL_RADIUS * 1000)
+    u = np.arctan((1 - EARTH_FLATTENING) * np.tan(phi))
+    rho_sin = (1 - EARTH_FLATTENING) * np.sin(u) + h * np.sin(phi)
+    rho_cos = np.cos(u) + h * np.cos(phi)
+    return rho_sin, rho_cos, lam, phi
+
+
+def _fundamental(elements, t, rho_sin, rho_cos, lam):
+    """
+    观测者在基本平面上相对影轴的位置及其变化率
+    :return: u, v (观测者到影轴的矢量), a, b (u, v 的变化率，每小时), zeta, L1, L2, 时角 H, 赤纬 d
+    """
+    e = elements.evaluate(t)
+    de = elements.derivative(t)
+    H = np.radians(e["mu"]) + lam
+    d = np.radians(e["d"])
+    mu_rate = np.radians(de["mu"])
+    d_rate = np.radians(de["d"])
+    sin_d, cos_d = np.sin(d), np.cos(d)
+    sin_H, cos_H = np.sin(H), np.cos(H)
+
+    xi = rho_cos * sin_H
+    eta = rho_sin * cos_d - rho_cos * cos_H * sin_d
+    zeta = rho_sin * sin_d + rho_cos * cos_H * cos_d
+    xi_rate = mu_rate * rho_cos * cos_H
+    eta_rate = mu_rate * xi * sin_d - zeta * d_rate
+
+    u = e["x"] - xi
+    v = e["y"] - eta
+    a = de["x"] - xi_rate
+    b = de["y"] - eta_rate
+    L1 = e["l1"] - zeta * elements.tan_f1
+    L2 = e["l2"] - zeta * elements.tan_f2
+    return u, v, a, b, zeta, L1, L2, H, d
+
+
+def _contact(elements, t, rho_sin, rho_cos, lam, sign, umbral, iterations):
+    """
+    以食甚为初值迭代求接触时刻，sign=-1 为开始、+1 为结束
+    :param umbral: False 求半影接触 (初亏、复圆)，True 求本影/伪本影接触 (食既、生光)
+    :return: 接触时刻 (相对根数参考时刻的小时数)，观测者看不到该接触时为 nan
+    """
+    for _ in range(iterations):
+        u, v, a, b, _, L1, L2, _, _ = _fundamental(elements, t, rho_sin, rho_cos, lam)
+        L = np.abs(L2) if umbral else L1
+        n2 = a * a + b * b
+        n = np.sqrt(n2)
+        S = (a * v - u * b) / (n * L)
+        with np.errstate(invalid='ignore'):
+            t = t - (u * a + v * b) / n2 + sign * L / n * np.sqrt(1 - S * S)
+    return t
+
+
+def local_circumstances(elements, lat, lon, height=0.0, iterations=ITERATIONS):
+    """
+    一次日食在大量观测点上的本地情况，所有观测点一起向量化计算
+    :param elements: besselian.BesselianElements
+    :param lat, lon, height: 观测点的纬度、经度 (度，东经为正) 与海拔 (米)，可广播的任意形状数组
+    :return: 字典，各项与观测点数组同形状，时刻为相对模拟起点的小时数，观测点看不到的接触为 nan
+             "max": 食甚时刻, "magnitude": 食分, "obscuration": 遮挡面积比, "sun_altitude": 食甚时的太阳高度 (度),
+             "c1", "c2", "c3", "c4": 四个接触时刻, "central": 食甚时位于本影 (全食) 或伪本影 (环食) 中,
+             "visible": 食甚时发生日食且太阳在地平线以上
+             食分的定义见 eclipse_geometry.eclipse_magnitude
+    """
+    rho_sin, rho_cos, lam, phi = observer_geocentric(lat, lon, height)
+    rho_sin, rho_cos, lam, phi = np.broadcast_arrays(rho_sin, rho_cos, lam, phi)
+    shape = rho_sin.shape
+    rho_sin, rho_cos, lam, phi = (x.ravel() for x in (rho_sin, rho_cos, lam, phi))
+
+    # 牛顿迭代求 u^2+v^2 的极小点 (食甚)
+    t = np.zeros(rho_sin.shape)
+    for _ in range(iterations):
+        u, v, a, b, _, _, _, _, _ = _fundamental(elements, t, rho_sin, rho_cos, lam)
+        t = t - (u * a + v * b) / (a * a + b * b)
+    u, v, a, b, zeta, L1, L2, H, d = _fundamental(elements, t, rho_sin, rho_cos, lam)
+    separation = np.hypot(u, v)
+    eclipsed = separation < L1
+    central = separation < np.abs(L2)
+    sun_altitude = np.degrees(np.arcsin(np.sin(phi) * np.sin(d) + np.cos(phi) * np.cos(d) * np.cos(H)))
+
+    # 接触时刻只对能看到偏食 (或中心食) 的观测点计算
+    contacts = {}
+    for name, sign, umbral in (("c1", -1, False), ("c2", -1, True), ("c3", 1, True), ("c4", 1, False)):
+        index = np.flatnonzero(central if umbral else eclipsed)
+        contacts[name] = np.full(t.shape, np.nan)
+        contacts[name][index] = _contact(elements, t[index], rho_sin[index], rho_cos[index], lam[index], sign,
+                                         umbral, iterations) + elements.t0
+
+    result = {
+        "max": t + elements.t0,
+        "magnitude": np.where(eclipsed, eclipse_magnitude(separation, L1, L2), 0.0),
+        "obscuration": np.where(eclipsed, obscuration(separation, L1, L2), 0.0),
+        "sun_altitude": sun_altitude,
+        "central": central,
+        "visible": eclipsed & (sun_altitude > 0),
+        **contacts,
+    }
+    return {name: value.reshape(shape) for name, value in result.items()}
+
+
+def eclipse_tables(elements_list, lat, lon, height=0.0, iterations=ITERATIONS):
+    """
+    对 besselian.solar_eclipse_elements 给出的每次日食计算所有观测点的本地情况
+    :return: 与 elements_list 一一对应的 local_circumstances 结果列表
+    """
+    return [local_circumstances(elements, lat, lon, height, iterations) for elements in elements_list]
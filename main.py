@@ -1,99 +1,145 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import time
-from astropy.time import Time
-from astropy import units as u
-from simulate import ThreeBodySimulator
-from coords import get_initial
-from check_eclipse import check_sun_eclipse, check_moon_eclipse, detect_accurate_times
-import sys
-
-sys.stdout = open('record.log', mode='w', encoding='utf-8')
-
-coarse_step = 0.5
-fine_steps = 100
-total_lenth = 50
-
-
-def double_accuracy_simulation():
-    # 初始化天体
-    sun_body = get_initial("Sun")
-    earth_body = get_initial("Earth")
-    moon_body = get_initial("Moon")
-    jupiter_body = get_initial("Jupiter")
-    venus_body = get_initial("Venus")
-    saturn_body = get_initial("Saturn")
-    planet_list = [sun_body, earth_body, moon_body]
-    aux_planet_list = [jupiter_body, venus_body, saturn_body]
-    # 创建模拟器（时间步长为粗步长）
-    simulator = ThreeBodySimulator(
-        bodies=planet_list,
-        aux_list=aux_planet_list,
-        dt=coarse_step
-    )
-    # 运行50年模拟
-    print("Start coarse simulation...")
-    start_time = time.time()
-    trajectories, t_range = simulator.simulate_rk4(years=total_lenth)
-    # 运行绘图
-    # plot_trajectories(trajectories)
-    print("Coarse simulation time:", time.time()-start_time)
-    print("Start detecting solar eclipses...")
-    start_time = time.time()
-    filtered_times, eclipse_types = check_sun_eclipse(trajectories['Sun'],
-                                                      trajectories['Moon'],
-                                                      trajectories['Earth'],
-                                                      t_range)
-    solar_eclipse_start, solar_eclipse_type, solar_eclipse_end = detect_accurate_times(
-        check_sun_eclipse, trajectories, filtered_times, eclipse_types, fine_steps)
-    print("Solar eclipse calculation time:", time.time()-start_time)
-    print("Start detecting lunar eclipses...")
-    start_time = time.time()
-    filtered_times, eclipse_types = check_moon_eclipse(trajectories['Sun'],
-                                                       trajectories['Moon'],
-                                                       trajectories['Earth'],
-                                                       t_range)
-    lunar_eclipse_start, lunar_eclipse_type, lunar_eclipse_end = detect_accurate_times(
-        check_moon_eclipse, trajectories, filtered_times, eclipse_types, fine_steps)
-    print("Lunar eclipse calculation time:", time.time()-start_time)
-    return solar_eclipse_start, solar_eclipse_type, solar_eclipse_end, lunar_eclipse_start, lunar_eclipse_type, lunar_eclipse_end
-
-
-def plot_trajectories(trajectories):
-    fig = plt.figure(figsize=(12, 8))
-    ax = fig.add_subplot(111, projection='3d')
-
-    for name, pos_list in trajectories.items():
-        positions = np.array(pos_list)
-        ax.plot(positions[:, 0], positions[:, 1], positions[:, 2],
-                label=name, alpha=0.7)
-
-    ax.set_xlabel('X (AU)')
-    ax.set_ylabel('Y (AU)')
-    ax.set_zlabel('Z (AU)')
-    ax.set_title('8 Year Orbital Trajectories')
-    ax.legend()
-    plt.show()
-
-
-START = Time(2025, format='jyear') + 6 * u.hour
-print(f"Simulate solar and lunar eclipses during year 2025 and {2025+total_lenth}")
-print("Initial time:", START.iso)
-solar_eclipse_start, solar_eclipse_type, solar_eclipse_end, lunar_eclipse_start, lunar_eclipse_type, lunar_eclipse_end = double_accuracy_simulation()
-print("Simulation ended. Print results:")
-print("=" * 60)
-print("Times of solar eclipses:")
-for start_time, type, end_time in zip(solar_eclipse_start, solar_eclipse_type, solar_eclipse_end):
-    print("-" * 60)
-    print("Start time:", (START + start_time * coarse_step * u.hour).iso)
-    print("Type:", type)
-    print("Max time:", (START + (start_time + end_time) / 2 * coarse_step * u.hour).iso)
-    print("End time", (START + end_time * coarse_step * u.hour).iso)
-print("=" * 60)
-print("Times of lunar eclipses:")
-for start_time, type, end_time in zip(lunar_eclipse_start, lunar_eclipse_type, lunar_eclipse_end):
-    print("-" * 60)
-    print("Start time:", (START + start_time * coarse_step * u.hour).iso)
-    print("Type:", type)
-    print("Max time:", (START + (start_time + end_time) / 2 * coarse_step * u.hour).iso)
-    print("End time", (START + end_time * coarse_step * u.hour).iso)
+import numpy as np
+import time
+from simulate import ThreeBodySimulator
+from check_eclipse import check_sun_eclipse, check_moon_eclipse, detect_accurate_times_batched, greatest_eclipse, \
+    sun_eclipse_magnitudes, moon_eclipse_magnitudes
+from syzygy import classify_near_syzygies
+from events import make_events, event_types, save_events
+from timescale import tt_to_utc, iso_format
+from constants import START_JD_TT
+import sys
+
+coarse_step = 0.5
+fine_steps = 100
+total_lenth = 50
+
+
+def detect_events(trajectories, dt, fine_steps, jd_start=START_JD_TT, verbose=True):
+    """
+    由模拟轨迹检测日月食：在朔、望前后分类，插值出各阶段的起止时刻，再求食甚及食甚时的食分
+    :param trajectories: 模拟得到的轨迹 {name: (steps, 3)}
+    :param dt: 时间步长 (小时)
+    :param fine_steps: 插值的细分步数
+    :param jd_start: 轨迹第0步的儒略日 (TT)
+    :param verbose: 是否输出各阶段的耗时
+    :return: 日食、月食的事件记录 (events.EVENT_DTYPE)
+    """
+    start_time = time.time()
+    # 只在月球接近黄道的朔、望前后判断日月食
+    solar_types, lunar_types = classify_near_syzygies(trajectories, dt)
+    if verbose:
+        print("Eclipse classification time:", time.time()-start_time)
+    start_time = time.time()
+    solar_eclipse_start, solar_eclipse_type, solar_eclipse_end = detect_accurate_times_batched(
+        check_sun_eclipse, trajectories, solar_types, fine_steps)
+    if verbose:
+        print("Solar eclipse calculation time:", time.time()-start_time)
+    start_time = time.time()
+    lunar_eclipse_start, lunar_eclipse_type, lunar_eclipse_end = detect_accurate_times_batched(
+        check_moon_eclipse, trajectories, lunar_types, fine_steps)
+    if verbose:
+        print("Lunar eclipse calculation time:", time.time()-start_time)
+    # 以 gamma 的极小点作为食甚，同时求出食甚时的食分
+    start_time = time.time()
+    solar_eclipse_max, solar_magnitudes = greatest_eclipse(
+        sun_eclipse_magnitudes, trajectories, solar_eclipse_start, solar_eclipse_end)
+    lunar_eclipse_max, lunar_magnitudes = greatest_eclipse(
+        moon_eclipse_magnitudes, trajectories, lunar_eclipse_start, lunar_eclipse_end)
+    if verbose:
+        print("Greatest eclipse calculation time:", time.time()-start_time)
+    # 整理为结构化的事件记录，直接交给 evaluate.evaluate，不必解析日志
+    solar_events = make_events(solar_eclipse_start, solar_eclipse_type, solar_eclipse_max, solar_eclipse_end,
+                               solar_magnitudes, dt, jd_start)
+    lunar_events = make_events(lunar_eclipse_start, lunar_eclipse_type, lunar_eclipse_max, lunar_eclipse_end,
+                               lunar_magnitudes, dt, jd_start)
+    return solar_events, lunar_events
+
+
+def double_accuracy_simulation():
+    from coords import get_initial
+    # 初始化天体
+    sun_body = get_initial("Sun")
+    earth_body = get_initial("Earth")
+    moon_body = get_initial("Moon")
+    jupiter_body = get_initial("Jupiter")
+    venus_body = get_initial("Venus")
+    saturn_body = get_initial("Saturn")
+    planet_list = [sun_body, earth_body, moon_body]
+    aux_planet_list = [jupiter_body, venus_body, saturn_body]
+    # 创建模拟器（时间步长为粗步长）
+    simulator = ThreeBodySimulator(
+        bodies=planet_list,
+        aux_list=aux_planet_list,
+        dt=coarse_step
+    )
+    # 运行50年模拟
+    print("Start coarse simulation...")
+    start_time = time.time()
+    trajectories, t_range = simulator.simulate_rk4(years=total_lenth)
+    # 运行绘图
+    # plot_trajectories(trajectories)
+    print("Coarse simulation time:", time.time()-start_time)
+    print("Start detecting solar and lunar eclipses...")
+    return detect_events(trajectories, coarse_step, fine_steps)
+
+
+def plot_trajectories(trajectories):
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(12, 8))
+    ax = fig.add_subplot(111, projection='3d')
+
+    for name, pos_list in trajectories.items():
+        positions = np.array(pos_list)
+        ax.plot(positions[:, 0], positions[:, 1], positions[:, 2],
+                label=name, alpha=0.7)
+
+    ax.set_xlabel('X (AU)')
+    ax.set_ylabel('Y (AU)')
+    ax.set_zlabel('Z (AU)')
+    ax.set_title('8 Year Orbital Trajectories')
+    ax.legend()
+    plt.show()
+
+
+def print_header(years):
+    # 模拟起点为 2025 年 1 月 1 日 00:00 UTC，积分时间与 TT 一致；事件时刻按 TT 输出，与 NASA 星表的 TD 对应
+    print(f"Simulate solar and lunar eclipses during year 2025 and {2025+years}")
+    print("Initial time (UTC):", iso_format(tt_to_utc(START_JD_TT)))
+    print("Initial time (TT):", iso_format(START_JD_TT))
+
+
+def print_events(solar_events, lunar_events):
+    """
+    按 evaluate.parse_log_file 能解析的格式输出日食、月食列表
+    """
+    print("Simulation ended. Print results:")
+    sections = (
+        ("Times of solar eclipses:", solar_events, (("Magnitude", "magnitude"), ("Obscuration", "obscuration"))),
+        ("Times of lunar eclipses:", lunar_events,
+         (("Umbral magnitude", "magnitude"), ("Penumbral magnitude", "penumbral_magnitude"))),
+    )
+    for title, events, fields in sections:
+        print("=" * 60)
+        print(title)
+        # 所有时刻一次换算和格式化
+        start_iso, max_iso, end_iso, max_utc_iso = (iso_format(jd) for jd in (
+            events['start'], events['max'], events['end'], tt_to_utc(events['max'])))
+        for i, type in enumerate(event_types(events)):
+            event = events[i]
+            print("-" * 60)
+            print("Start time:", start_iso[i])
+            print("Type:", type)
+            print("Max time:", max_iso[i])
+            print("End time", end_iso[i])
+            print("Max time (UTC):", max_utc_iso[i])
+            for label, field in fields:
+                print(f"{label}: {event[field]:.4f}")
+            print(f"Gamma: {event['gamma']:.4f}")
+
+
+if __name__ == "__main__":
+    sys.stdout = open('record.log', mode='w', encoding='utf-8')
+    print_header(total_lenth)
+    solar_events, lunar_events = double_accuracy_simulation()
+    save_events('events.npz', solar_events, lunar_events)
+    print_events(solar_events, lunar_events)
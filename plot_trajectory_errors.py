@@ -4,12 +4,12 @@ import time
 from astropy.time import Time
 from astropy import units as u
 import sys
-import json
 from jplephem.spk import SPK
 from constants import AU
 from simulate import ThreeBodySimulator
 from coords import get_initial
 from check_eclipse import check_sun_eclipse, check_moon_eclipse, detect_accurate_times
+from trajectory_store import ChebyshevTrajectory
 
  
 sys.stdout = open('record.log', mode = 'w',encoding='utf-8')
@@ -17,72 +17,57 @@ sys.stdout = open('record.log', mode = 'w',encoding='utf-8')
 coarse_step = 1
 fine_steps = 100
 total_lenth = 50
+# 读取DE440时每块的时刻个数
+DE440_CHUNK = 100000
 
-def load_de440_data(start_time, time_steps, step_hours=1):
+def load_de440_data(start_time, time_steps, step_hours=1, chunk_size=DE440_CHUNK):
     """
     读取DE440星历表数据
+    每个数据段对一整块时刻只调用一次 compute，按 chunk_size 分块限制临时数组的大小
     
     参数:
     start_time: astropy Time对象，起始时间
     time_steps: int, 总时间步数
     step_hours: float, 每步的小时数
+    chunk_size: int, 每次传给 jplephem 的时刻个数
     
     返回:
     dict: 包含各个天体位置的字典，格式与trajectories相同
     """
-    # 加载DE421星历表
+    # 加载DE440星历表
     kernel = SPK.open('de440.bsp')
     
-    # 创建时间序列
-    times = start_time + np.arange(time_steps) * step_hours * u.hour
-    
-    # 转换为Julian日期
-    jd = times.jd
+    # 创建时间序列 (Julian日期)
+    jd = start_time.jd + np.arange(time_steps) * step_hours / 24
     
     # 初始化结果字典
-    positions = {
-        'Sun': [],
-        'Earth': [],
-        'Moon': [],
-        'Jupiter': []
-    }
+    positions = {body: np.empty((time_steps, 3)) for body in ('Sun', 'Earth', 'Moon', 'Jupiter')}
     
     # DE440中的ID对照:
     # Sun = 10
     # Earth-Moon barycenter = 3
     # Moon (relative to Earth) = 301
     # Jupiter = 5
+    earth_mass = 5.97237e24  # kg
+    moon_mass = 7.342e22     # kg
     
-    for t in jd:
-        # 获取太阳相对于太阳系重心的位置 (转换为AU)
-        sun_pos = kernel[0,10].compute(t) / AU  # km to AU
-        
-        # 获取地球-月亮质心相对于太阳系重心的位置
-        earth_moon_pos = kernel[0,3].compute(t) / AU
-        
-        # 获取月球相对于地球的位置
-        moon_rel_earth = kernel[3,301].compute(t) / AU
+    for start in range(0, time_steps, chunk_size):
+        t = jd[start:start + chunk_size]
+        rows = slice(start, start + len(t))
+        # compute 对时刻数组返回 (3, n)，转置为 (n, 3)，并由 km 转换为 AU
+        sun_pos = kernel[0,10].compute(t).T / AU
+        earth_moon_pos = kernel[0,3].compute(t).T / AU
+        moon_rel_earth = kernel[3,301].compute(t).T / AU
+        jupiter_pos = kernel[0,5].compute(t).T / AU
         
         # 计算地球和月球的绝对位置
-        earth_mass = 5.97237e24  # kg
-        moon_mass = 7.342e22     # kg
-        
         earth_pos = earth_moon_pos - (moon_mass/earth_mass) * moon_rel_earth
-        moon_pos = earth_pos + moon_rel_earth
-        
-        # 获取木星相对于太阳系重心的位置
-        jupiter_pos = kernel[0,5].compute(t) / AU
-        
-        # 存储位置数据
-        positions['Sun'].append(sun_pos)
-        positions['Earth'].append(earth_pos)
-        positions['Moon'].append(moon_pos)
-        positions['Jupiter'].append(jupiter_pos)
-    
-    # 转换为numpy数组
-    for body in positions:
-        positions[body] = np.array(positions[body])
+        positions['Sun'][rows] = sun_pos
+        positions['Earth'][rows] = earth_pos
+        positions['Moon'][rows] = earth_pos + moon_rel_earth
+        positions['Jupiter'][rows] = jupiter_pos
     
+    kernel.close()
     return positions
 
 def compare_and_plot(de440_positions, simulated_positions, start_time, step_hours=1):
@@ -154,14 +139,8 @@ filtered_times, eclipse_types = check_moon_eclipse(trajectories['Sun'],
                                                 t_range)
 moon_eclipse_start, moon_eclipse_type, moon_eclipse_end = detect_accurate_times(check_moon_eclipse, trajectories, filtered_times, eclipse_types, fine_steps)
 
-# 保存轨道数据到文件
-with open('trajectories.json', 'w') as f:
-        # 将轨道数据转换为可序列化的格式
-    serializable_trajectories = {}
-    for body, positions in trajectories.items():
-        # 将numpy数组转换为列表
-        serializable_trajectories[body] = positions.tolist()
-    json.dump(serializable_trajectories, f)
+# 保存轨道数据到文件 (分段切比雪夫系数压缩，可在任意时刻求值)
+ChebyshevTrajectory.fit(trajectories, coarse_step).save('trajectories.npz')
 
 # 假设您已经有了模拟得到的trajectories数据
 # 使用相同的起始时间和时间步数获取DE421数据
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def illinois(f, a, b, fa, fb, xtol=1e-9, max_iter=60):
+    """
+    伊利诺伊法 (改进的试位法) 同时求多个区间内的根，每个区间收敛后不再求值
+    试位法在函数凸或凹时有一端不动，收敛退化为线性；伊利诺伊法在同一端连续两次保留时把该端的函数值减半，
+    恢复超线性收敛，对光滑函数通常只需几次求值
+    :param f: f(x, index)，对 index 所指的区间在 x 处逐元素求值，x 与 index 形状相同
+    :param a, b: 区间端点 (K,)
+    :param fa, fb: 端点处的函数值，要求异号
+    :param xtol: 根的绝对容差
+    :return: 根 (K,)
+    """
+    a = np.array(a, dtype=np.float64)
+    b = np.array(b, dtype=np.float64)
+    fa = np.array(fa, dtype=np.float64)
+    fb = np.array(fb, dtype=np.float64)
+    if np.any(fa * fb > 0):
+        raise ValueError("Error: root is not bracketed!")
+    root = np.where(fa == 0, a, b)
+    # 上一次保留的端点：-1 表示 a，+1 表示 b
+    side = np.zeros(len(a), dtype=np.int8)
+    active = np.flatnonzero((fa != 0) & (fb != 0))
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+        aa, bb, ffa, ffb = a[active], b[active], fa[active], fb[active]
+        c = (aa * ffb - bb * ffa) / (ffb - ffa)
+        fc = f(c, active)
+        previous = root[active]
+        root[active] = c
+
+        # 根落在 [a, c] 中，用 c 替换 b
+        left = fc * ffa < 0
+        i = active[left]
+        b[i], fb[i] = c[left], fc[left]
+        fa[i[side[i] == -1]] /= 2
+        side[i] = -1
+        # 根落在 [c, b] 中，用 c 替换 a
+        right = ~left
+        i = active[right]
+        a[i], fa[i] = c[right], fc[right]
+        fb[i[side[i] == 1]] /= 2
+        side[i] = 1
+
+        # 区间足够小，或相邻两次估计足够接近
+        done = (fc == 0) | (np.abs(b[active] - a[active]) <= xtol) | (np.abs(c - previous) <= xtol)
+        active = active[~done]
+    return root
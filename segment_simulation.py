@@ -0,0 +1,97 @@
+import numpy as np
+import time
+from concurrent.futures import ProcessPoolExecutor
+from simulate import ThreeBodySimulator
+from constants import YEAR, START_JD_TT
+from main import detect_events, print_header, print_events
+
+# 相邻分段向前、向后多积分的时长 (小时)，保证跨越分段边界的食过程能被完整检测
+OVERLAP_HOURS = 24
+# 拼接时认为是同一阶段的最大开始时间差 (小时)
+DEDUPE_HOURS = 1
+
+
+def segment_events(trajectories, dt, fine_steps, run_start, first_step, n_steps):
+    """
+    用 main.detect_events 检测一段轨迹中的日月食
+    :param run_start: 轨迹第0步对应的全局时间步
+    :return: {"solar": 事件记录, "lunar": 事件记录} (events.EVENT_DTYPE)，
+             只保留开始时刻落在 [first_step, first_step + n_steps) 内的阶段
+    """
+    solar_events, lunar_events = detect_events(trajectories, dt, fine_steps, START_JD_TT + run_start * dt / 24,
+                                               verbose=False)
+    lower = START_JD_TT + first_step * dt / 24
+    upper = START_JD_TT + (first_step + n_steps) * dt / 24
+    return {kind: events[(events["start"] >= lower) & (events["start"] < upper)]
+            for kind, events in (("solar", solar_events), ("lunar", lunar_events))}
+
+
+def simulate_segment(first_step, n_steps, dt, planet_names, aux_names, fine_steps, overlap_steps):
+    """
+    从星历表在分段起点 (向前扩展 overlap_steps 步) 重新取初值，模拟并检测该分段内的日月食
+    :param first_step: 分段起点，以全局的时间步计
+    :param n_steps: 分段长度 (步)
+    :return: 见 segment_events
+    """
+    from coords import get_initial
+    run_start = first_step - overlap_steps
+    hours = run_start * dt
+    bodies = [get_initial(name, hours) for name in planet_names]
+    aux_bodies = [get_initial(name, hours) for name in aux_names]
+    simulator = ThreeBodySimulator(bodies=bodies, aux_list=aux_bodies, dt=dt)
+    run_steps = n_steps + 2 * overlap_steps
+    trajectories, t_range = simulator.simulate_rk4(years=(run_steps + 0.5) * dt / YEAR)
+    return segment_events(trajectories, dt, fine_steps, run_start, first_step, n_steps)
+
+
+def stitch_segments(segment_results, dedupe_days):
+    """
+    拼接各分段的事件记录，并去掉分段边界附近重复检测到的同类型阶段
+    :param dedupe_days: 认为是同一阶段的最大开始时间差 (天)
+    :return: {"solar": 事件记录, "lunar": 事件记录}，与 main.detect_events 一样按结束时刻排序
+    """
+    stitched = {}
+    for kind in ("solar", "lunar"):
+        events = np.concatenate([result[kind] for result in segment_results])
+        # 按类型、开始时刻排序后，与前一个同类阶段的开始时刻相差不超过 dedupe_days 的视为重复
+        events = events[np.lexsort((events["start"], events["type"]))]
+        duplicate = np.zeros(len(events), dtype=bool)
+        duplicate[1:] = (events["type"][1:] == events["type"][:-1]) & (np.diff(events["start"]) <= dedupe_days)
+        events = events[~duplicate]
+        stitched[kind] = events[np.argsort(events["end"], kind='stable')]
+    return stitched
+
+
+def segmented_simulation(years=50, segment_years=5, dt=0.5, fine_steps=100,
+                         planet_names=("Sun", "Earth", "Moon"), aux_names=("Jupiter", "Venus", "Saturn"),
+                         max_workers=None):
+    """
+    将模拟时长分成若干段，每段从星历表重新取初值，在进程池中并行模拟，最后拼接日月食列表
+    误差只在各段内累积，因此可以用更粗的步长
+    :param segment_years: 每段的时长 (年)
+    :param max_workers: 进程数，默认为CPU核数
+    :return: 与 main.double_accuracy_simulation 相同的日食、月食事件记录
+    """
+    total_steps = int(years * YEAR / dt)
+    segment_steps = int(segment_years * YEAR / dt)
+    overlap_steps = int(np.ceil(OVERLAP_HOURS / dt))
+    firsts = range(0, total_steps, segment_steps)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(simulate_segment, first, min(segment_steps, total_steps - first), dt,
+                                   list(planet_names), list(aux_names), fine_steps, overlap_steps)
+                   for first in firsts]
+        segment_results = [future.result() for future in futures]
+
+    stitched = stitch_segments(segment_results, DEDUPE_HOURS / 24)
+    return stitched["solar"], stitched["lunar"]
+
+
+if __name__ == "__main__":
+    coarse_step = 0.5
+    total_lenth = 50
+    print_header(total_lenth)
+    start_time = time.time()
+    solar_events, lunar_events = segmented_simulation(years=total_lenth, dt=coarse_step)
+    print("Segmented simulation time:", time.time()-start_time)
+    print_events(solar_events, lunar_events)
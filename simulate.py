@@ -1,96 +1,908 @@
-import numpy as np
-from big_planet_orb import get_jupiter_orb_fn
-from constants import YEAR
-
-
-class ThreeBodySimulator:
-    def __init__(self, bodies, dt=1, aux_list=None):
-        """
-        :param bodies: list of CelestialBody objects
-        :param dt: 时间步长 (小时)
-        :param aux_list: 辅助天体列表，例如木星等
-        """
-        self.bodies = bodies
-        self.dt = dt
-        self.aux_list = aux_list if aux_list is not None else []
-        self.orb_fns = [get_jupiter_orb_fn(aux_body) for aux_body in self.aux_list]
-
-    def compute_pairwise_force(self, body1, body2):
-        """
-        计算两个天体之间的引力
-        """
-        r = body2.pos - body1.pos
-        r_mag = np.linalg.norm(r)
-        if r_mag == 0:
-            return np.zeros(3)  # 避免除以0
-        return body1.mass * body2.mass / (r_mag ** 3) * r
-
-    def compute_forces(self, bodies=None):
-        """
-        计算所有天体间的引力
-        """
-        if bodies is None:
-            bodies = self.bodies
-
-        forces = {body: np.zeros(3) for body in bodies}
-        velocities = {body: body.velocity.copy() for body in bodies}
-
-        # 主天体间引力
-        for i, body1 in enumerate(bodies):
-            for body2 in bodies[i + 1:]:
-                F = self.compute_pairwise_force(body1, body2)
-                forces[body1] += F
-                forces[body2] -= F
-
-        # 计算主天体受到辅助天体的引力
-        for body in bodies:
-            for aux_body in self.aux_list:
-                F = self.compute_pairwise_force(body, aux_body)
-                forces[body] += F
-
-        return velocities, forces
-
-    def rk4(self):
-        saved_positions = {b: b.pos.copy() for b in self.bodies}
-        saved_velocities = {b: b.velocity.copy() for b in self.bodies}
-
-        def update_all(velocities, forces, dt):
-            for b in self.bodies:
-                b.pos = saved_positions[b] + velocities[b] * dt
-                b.velocity = saved_velocities[b] + (forces[b] / b.mass) * dt
-
-        # K1
-        v1, f1 = self.compute_forces()
-
-        # K2
-        update_all(v1, f1, self.dt / 2)
-        v2, f2 = self.compute_forces()
-
-        # K3
-        update_all(v2, f2, self.dt / 2)
-        v3, f3 = self.compute_forces()
-
-        # K4
-        update_all(v3, f3, self.dt)
-        v4, f4 = self.compute_forces()
-
-        # 最终更新
-        for b in self.bodies:
-            b.pos = saved_positions[b] + self.dt * (v1[b] + 2 * v2[b] + 2 * v3[b] + v4[b]) / 6
-            b.velocity = saved_velocities[b] + self.dt * (f1[b] + 2 * f2[b] + 2 * f3[b] + f4[b]) / (6 * b.mass)
-
-    def simulate_rk4(self, years=50):
-        steps = int(years * YEAR / self.dt)
-        trajectories = {b.name: np.zeros((steps, 3)) for b in self.bodies}
-
-        for step in range(steps):
-            # 更新辅助天体轨道
-            for aux_body, orb_fn in zip(self.aux_list, self.orb_fns):
-                aux_body.pos = orb_fn(step * self.dt)
-
-            for body in self.bodies:
-                trajectories[body.name][step] = body.pos.copy()
-
-            self.rk4()
-
-        return trajectories, np.arange(steps)
+import numpy as np
+from big_planet_orb import get_jupiter_orb_fn, circular_orbit_3d_params, circular_orbit_3d_positions
+import os
+from constants import YEAR
+from kepler import kepler_drift
+from dense_output import hermite_quintic
+
+# 辅助天体位置批量计算的块长 (步)
+AUX_BLOCK = 4096
+# 检查点中保存的最近轨迹的时长 (小时)，续算时用于补全跨越续算起点的日月食
+HISTORY_HOURS = 24
+# Encke 方法中参考开普勒轨道的校正间隔 (小时)
+ENCKE_RECTIFY_HOURS = 12
+# 多时间步长积分中 Adams 多步法的阶数与参考轨道的校正间隔 (小时)
+MULTIRATE_ORDER = 10
+MULTIRATE_RECTIFY_HOURS = 96
+
+# Dormand-Prince 5(4) 的 Butcher 表，最后一级即为下一步的第一级 (FSAL)
+DOPRI_C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1, 1])
+DOPRI_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# 五阶解与四阶解系数之差，用于估计局部误差
+DOPRI_E = np.array([71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+
+# 辛积分器的组合系数：每一步由若干个权重为 w 的 kick-drift-kick 子步组成
+_YOSHIDA4_W1 = 1 / (2 - 2 ** (1 / 3))
+_YOSHIDA4_W0 = 1 - 2 * _YOSHIDA4_W1
+# Yoshida (1990) 六阶组合 solution A
+_YOSHIDA6_W = (-1.17767998417887, 0.235573213359357, 0.784513610477560)
+_YOSHIDA6_W0 = 1 - 2 * sum(_YOSHIDA6_W)
+SYMPLECTIC_WEIGHTS = {
+    "leapfrog": (1.0,),
+    "yoshida4": (_YOSHIDA4_W1, _YOSHIDA4_W0, _YOSHIDA4_W1),
+    "yoshida6": _YOSHIDA6_W[::-1] + (_YOSHIDA6_W0,) + _YOSHIDA6_W,
+    # Wisdom-Holman：开普勒部分解析推进，相互作用部分作为 kick
+    "wh": (1.0,),
+}
+
+
+def pairwise_accelerations(pos, gm, aux_pos=None, aux_gm=None):
+    """
+    一次广播计算所有主天体受到的引力加速度
+    :param pos: 主天体位置 (..., N, 3)
+    :param gm: 主天体的GM (N,)
+    :param aux_pos: 辅助天体位置 (..., A, 3)，可为None
+    :param aux_gm: 辅助天体的GM (A,)
+    :return: 加速度 (..., N, 3)
+    """
+    n = pos.shape[-2]
+    # 辅助天体只作为引力源，和主天体拼接在一起统一计算
+    if aux_pos is not None and len(aux_gm) > 0:
+        if aux_pos.shape[:-2] != pos.shape[:-2]:
+            aux_pos = np.broadcast_to(aux_pos, pos.shape[:-2] + aux_pos.shape[-2:])
+        src = np.concatenate([pos, aux_pos], axis=-2)
+        src_gm = np.concatenate([gm, aux_gm])
+    else:
+        src, src_gm = pos, gm
+    # r[..., i, j] = src_j - pos_i
+    r = src[..., None, :, :] - pos[..., :, None, :]
+    r2 = np.sum(r * r, axis=-1)
+    # 自身不计引力，避免除以0
+    idx = np.arange(n)
+    r2[..., idx, idx] = np.inf
+    w = src_gm / (r2 * np.sqrt(r2))
+    return (w[..., None, :] @ r)[..., 0, :]
+
+
+def _battin_f(x):
+    """
+    Battin 的 f(x) = (1 + x)^(3/2) - 1，|x| 很小时避免两个相近的数直接相减
+    """
+    return x * (3 + 3 * x + x * x) / (1 + (1 + x) ** 1.5)
+
+
+def lunar_tidal(r, d_e, src_gm):
+    """
+    外部天体对月球地心运动的潮汐加速度 (间接项)
+    d_m/|d_m|^3 - d_e/|d_e|^3 = -(r + f(x) d_e)/|d_m|^3，x = r·(r - 2d_e)/|d_e|^2
+    用 Battin 的 f(x) 公式计算，避免两个相近的加速度直接相减
+    :param r: 月球的地心位置 (..., 3)
+    :param d_e: 地球指向各外部天体的向量 (..., K, 3)
+    :param src_gm: 外部天体的GM (K,)
+    :return: 潮汐加速度 (..., 3)
+    """
+    r = r[..., None, :]
+    d_m = d_e - r
+    d_e2 = np.sum(d_e * d_e, axis=-1)
+    d_m2 = np.sum(d_m * d_m, axis=-1)
+    x = np.sum(r * (r - 2 * d_e), axis=-1) / d_e2
+    w = src_gm / (d_m2 * np.sqrt(d_m2))
+    # 对外部天体求和写成矩阵乘法
+    return -(w[..., None, :] @ (r + _battin_f(x)[..., None] * d_e))[..., 0, :]
+
+
+def encke_acceleration(delta, ref, mu):
+    """
+    Encke 方法中偏差的二体加速度：真实轨道与参考开普勒轨道上二体引力之差
+    -mu r/|r|^3 + mu ρ/|ρ|^3 = -mu (δ + f(x) r)/|ρ|^3，r = ρ + δ，x = δ·(δ - 2r)/|r|^2
+    :param delta: 相对参考轨道的偏差 δ (..., 3)
+    :param ref: 参考轨道上的位置 ρ (..., 3)
+    :param mu: 二体问题的引力参数 GM
+    :return: 加速度之差 (..., 3)
+    """
+    r = ref + delta
+    x = np.sum(delta * (delta - 2 * r), axis=-1) / np.sum(r * r, axis=-1)
+    ref2 = np.sum(ref * ref, axis=-1)
+    return -mu * (delta + _battin_f(x)[..., None] * r) / (ref2 * np.sqrt(ref2))[..., None]
+
+
+def adams_weights(nodes, s):
+    """
+    二阶方程 x'' = a(t) 的 Adams 型权重：以各节点上的 a 作插值多项式，从 0 积分到 s (以步长为单位)
+    x(s) = x(0) + s h x'(0) + h^2 sum c_j a_j，x'(s) = x'(0) + h sum b_j a_j
+    :param nodes: 插值节点 (k,)，以步长为单位，0 为当前步
+    :param s: 求值位置 (M,)
+    :return: b (M, k), c (M, k)
+    """
+    nodes = np.asarray(nodes, dtype=np.float64)
+    s = np.asarray(s, dtype=np.float64)
+    b = np.zeros(s.shape + nodes.shape)
+    c = np.zeros(s.shape + nodes.shape)
+    for j, node in enumerate(nodes):
+        others = np.delete(nodes, j)
+        # 拉格朗日基函数
+        basis = np.polynomial.Polynomial.fromroots(others) / np.prod(node - others)
+        b[..., j] = basis.integ()(s)
+        c[..., j] = basis.integ(2)(s)
+    return b, c
+
+
+class ThreeBodySimulator:
+    def __init__(self, bodies, dt=1, aux_list=None):
+        """
+        :param bodies: list of CelestialBody objects
+        :param dt: 时间步长 (小时)
+        :param aux_list: 辅助天体列表，例如木星等
+        """
+        self.bodies = bodies
+        self.dt = dt
+        self.aux_list = aux_list if aux_list is not None else []
+        self.orb_fns = [get_jupiter_orb_fn(aux_body) for aux_body in self.aux_list]
+
+        # 数组化的状态：GM (N,) 以及辅助天体的轨道参数 (A, 5)
+        self.gm = np.array([b.mass for b in self.bodies], dtype=np.float64)
+        self.aux_gm = np.array([b.mass for b in self.aux_list], dtype=np.float64)
+        self.aux_params = np.array([circular_orbit_3d_params(b.pos, b.velocity) for b in self.aux_list],
+                                   dtype=np.float64).reshape(-1, 5)
+        self._geo_indices = None
+        # 当前状态对应的时刻，相对初始历元的小时数
+        self.time = 0.0
+        # 最近的轨迹 (N, H, 3) 以及定期保存检查点的设置
+        self.history = None
+        self.checkpoint_path = None
+        self.checkpoint_every = None
+        # 最近一次集合预报的末状态 (位置 (B, N, 3), 速度 (B, N, 3))，由 simulate_ensemble 更新
+        self.ensemble_state = None
+
+    def get_state(self):
+        """
+        将各天体的位置、速度打包为连续数组
+        :return: 位置 (N, 3), 速度 (N, 3)
+        """
+        pos = np.array([b.pos for b in self.bodies], dtype=np.float64)
+        vel = np.array([b.velocity for b in self.bodies], dtype=np.float64)
+        return pos, vel
+
+    def set_state(self, pos, vel):
+        """
+        将数组形式的状态写回各个天体
+        """
+        for i, b in enumerate(self.bodies):
+            b.pos = pos[i].copy()
+            b.velocity = vel[i].copy()
+
+    def aux_positions(self, t):
+        """
+        计算辅助天体在时间 t (相对初始历元的小时数) 的位置
+        :return: 位置数组 (*t.shape, A, 3)
+        """
+        return circular_orbit_3d_positions(self.aux_params, t)
+
+    def accelerations(self, pos, aux_pos=None):
+        """
+        计算数组形式状态下所有主天体的加速度
+        """
+        return pairwise_accelerations(pos, self.gm, aux_pos, self.aux_gm)
+
+    def rk4_step(self, pos, vel, aux_pos, dt, accel=None, stage_args=None):
+        """
+        数组形式的一步经典RK4，辅助天体位置在步内保持不变
+        :param accel: 加速度函数 accel(pos, aux_pos)，默认为 self.accelerations
+        :param stage_args: 可选，步起点、中点、终点处传给 accel 的第二个参数 (三元组)，给出时不使用 aux_pos
+        :return: 新的位置和速度
+        """
+        if accel is None:
+            accel = self.accelerations
+        start, mid, end = (aux_pos,) * 3 if stage_args is None else stage_args
+        a1 = accel(pos, start)
+        v1 = vel
+
+        p2 = pos + v1 * (dt / 2)
+        v2 = vel + a1 * (dt / 2)
+        a2 = accel(p2, mid)
+
+        p3 = pos + v2 * (dt / 2)
+        v3 = vel + a2 * (dt / 2)
+        a3 = accel(p3, mid)
+
+        p4 = pos + v3 * dt
+        v4 = vel + a3 * dt
+        a4 = accel(p4, end)
+
+        new_pos = pos + dt * (v1 + 2 * v2 + 2 * v3 + v4) / 6
+        new_vel = vel + dt * (a1 + 2 * a2 + 2 * a3 + a4) / 6
+        return new_pos, new_vel
+
+    def compute_pairwise_force(self, body1, body2):
+        """
+        计算两个天体之间的引力
+        """
+        r = body2.pos - body1.pos
+        r_mag = np.linalg.norm(r)
+        if r_mag == 0:
+            return np.zeros(3)  # 避免除以0
+        return body1.mass * body2.mass / (r_mag ** 3) * r
+
+    def compute_forces(self, bodies=None):
+        """
+        计算所有天体间的引力
+        """
+        if bodies is None:
+            bodies = self.bodies
+
+        forces = {body: np.zeros(3) for body in bodies}
+        velocities = {body: body.velocity.copy() for body in bodies}
+
+        # 主天体间引力
+        for i, body1 in enumerate(bodies):
+            for body2 in bodies[i + 1:]:
+                F = self.compute_pairwise_force(body1, body2)
+                forces[body1] += F
+                forces[body2] -= F
+
+        # 计算主天体受到辅助天体的引力
+        for body in bodies:
+            for aux_body in self.aux_list:
+                F = self.compute_pairwise_force(body, aux_body)
+                forces[body] += F
+
+        return velocities, forces
+
+    def rk4(self):
+        saved_positions = {b: b.pos.copy() for b in self.bodies}
+        saved_velocities = {b: b.velocity.copy() for b in self.bodies}
+
+        def update_all(velocities, forces, dt):
+            for b in self.bodies:
+                b.pos = saved_positions[b] + velocities[b] * dt
+                b.velocity = saved_velocities[b] + (forces[b] / b.mass) * dt
+
+        # K1
+        v1, f1 = self.compute_forces()
+
+        # K2
+        update_all(v1, f1, self.dt / 2)
+        v2, f2 = self.compute_forces()
+
+        # K3
+        update_all(v2, f2, self.dt / 2)
+        v3, f3 = self.compute_forces()
+
+        # K4
+        update_all(v3, f3, self.dt)
+        v4, f4 = self.compute_forces()
+
+        # 最终更新
+        for b in self.bodies:
+            b.pos = saved_positions[b] + self.dt * (v1[b] + 2 * v2[b] + 2 * v3[b] + v4[b]) / 6
+            b.velocity = saved_velocities[b] + self.dt * (f1[b] + 2 * f2[b] + 2 * f3[b] + f4[b]) / (6 * b.mass)
+
+    def energy(self, pos, vel):
+        """
+        计算主天体的总能量 (动能 + 相互引力势能，不含辅助天体的外场)
+        :param pos: 位置 (..., N, 3)
+        :param vel: 速度 (..., N, 3)
+        """
+        kinetic = 0.5 * np.sum(self.gm * np.sum(vel * vel, axis=-1), axis=-1)
+        r = np.linalg.norm(pos[..., None, :, :] - pos[..., :, None, :], axis=-1)
+        i, j = np.triu_indices(len(self.bodies), k=1)
+        potential = -np.sum(self.gm[i] * self.gm[j] / r[..., i, j], axis=-1)
+        return kinetic + potential
+
+    def jacobi_matrix(self, order):
+        """
+        构造雅可比坐标的变换矩阵，第0行为质心，第j行为第j个天体相对前j个天体质心的位置
+        :param order: 天体的下标顺序
+        :return: 变换矩阵 (N, N)，以及各雅可比坐标对应的开普勒引力参数 (N,)
+        """
+        n = len(order)
+        gm = self.gm[order]
+        J = np.zeros((n, n))
+        J[0] = gm / gm.sum()
+        for j in range(1, n):
+            J[j, :j] = -gm[:j] / gm[:j].sum()
+            J[j, j] = 1
+        # 按原始天体顺序排列各列
+        mat = np.zeros((n, n))
+        mat[:, order] = J
+        # 第j个雅可比坐标绕前j+1个天体的总质量运动
+        kepler_mu = np.cumsum(gm)
+        kepler_mu[0] = 0
+        return mat, kepler_mu
+
+    def default_jacobi_order(self):
+        """
+        雅可比坐标的默认层级顺序：地月系最内层，其余天体按质量从大到小
+        """
+        names = [b.name for b in self.bodies]
+        order = []
+        if "Earth" in names and "Moon" in names:
+            order = [names.index("Earth"), names.index("Moon")]
+        rest = [i for i in np.argsort(-self.gm, kind="stable") if i not in order]
+        return order + rest
+
+    def _stream_fixed(self, years, step_fn, offsets=(0.0,), to_state=None, from_state=None, initial=None,
+                      chunk_steps=AUX_BLOCK, with_velocity=False):
+        """
+        定步长积分的公共驱动，按块产出轨迹，从 self.time 开始积分
+        :param step_fn: step_fn(pos, vel, aux_pos) -> (pos, vel)，
+                        aux_pos 为辅助天体在本步各子时刻的位置 (S, A, 3)
+        :param offsets: 本步中需要辅助天体位置的子时刻，以步长为单位
+        :param to_state, from_state: 积分所用坐标与原坐标之间的变换，积分全程保持在新坐标下，只在记录轨迹时换回
+        :param initial: 初始的位置和速度 (..., N, 3)，默认取各天体的当前状态；带批量维度时不写回天体
+        :param chunk_steps: 每块的步数，除第一块外每块的第一步与上一块的最后一步重合
+        :param with_velocity: 同时记录各天体的速度 (AU/h)，用于稠密输出插值
+        :return: 生成器，依次产出 ({name: (..., n, 3)}, 时间步序号 (n,))，序号从 self.time 对应的时间步算起；
+                 with_velocity=True 时额外产出速度 {name: (..., n, 3)}
+        """
+        steps = int(years * YEAR / self.dt)
+        offsets = np.asarray(offsets, dtype=np.float64)
+        pos, vel = self.get_state() if initial is None else initial
+        batch_shape = pos.shape[:-2]
+        chunk_shape = (len(self.bodies),) + batch_shape + (chunk_steps, 3)
+        if to_state is None:
+            to_state = from_state = lambda pos, vel: (pos, vel)
+        q, u = to_state(pos, vel)
+        t0 = self.time
+        step0 = int(round(t0 / self.dt))
+        history_steps = int(np.ceil(HISTORY_HOURS / self.dt))
+
+        # 轨迹块按 (N, ..., chunk_steps, 3) 存储，每个天体的轨迹是一块连续内存
+        chunk = np.zeros(chunk_shape)
+        vel_chunk = np.zeros(chunk_shape) if with_velocity else None
+        previous = chunk[..., :0, :]
+        first, filled = 0, 0
+        for step in range(steps):
+            # 更新辅助天体轨道，按块批量计算以减少调用开销
+            if step % AUX_BLOCK == 0:
+                block = np.arange(step, min(step + AUX_BLOCK, steps))
+                aux_block = self.aux_positions(t0 + (block[:, None] + offsets) * self.dt)
+            state = from_state(q, u)
+            chunk[..., filled, :] = np.moveaxis(state[0], -2, 0)
+            if with_velocity:
+                vel_chunk[..., filled, :] = np.moveaxis(state[1], -2, 0)
+            filled += 1
+            q, u = step_fn(q, u, aux_block[step % AUX_BLOCK])
+
+            if not batch_shape and self.checkpoint_every and (step + 1) % self.checkpoint_every == 0:
+                history = np.concatenate([previous, chunk[..., :filled, :]], axis=-2)[..., -history_steps:, :]
+                self.save_checkpoint(self.checkpoint_path, *from_state(q, u), t0 + (step + 1) * self.dt, history)
+
+            if filled == chunk_steps or step == steps - 1:
+                output = ({b.name: chunk[i, ..., :filled, :] for i, b in enumerate(self.bodies)},
+                          np.arange(step0 + first, step0 + first + filled))
+                if with_velocity:
+                    output += ({b.name: vel_chunk[i, ..., :filled, :] for i, b in enumerate(self.bodies)},)
+                yield output
+                # 新的一块以本块最后一步开头
+                previous = chunk[..., :filled - 1, :]
+                last = chunk[..., filled - 1, :]
+                chunk = np.zeros(chunk_shape)
+                chunk[..., 0, :] = last
+                if with_velocity:
+                    last_vel = vel_chunk[..., filled - 1, :]
+                    vel_chunk = np.zeros(chunk_shape)
+                    vel_chunk[..., 0, :] = last_vel
+                first, filled = step, 1
+
+        if batch_shape:
+            self.ensemble_state = from_state(q, u)
+            return
+        history = np.concatenate([previous, chunk[..., :filled, :]], axis=-2)[..., -history_steps:, :]
+        self._finish_run(*from_state(q, u), t0, steps, history)
+
+    def _finish_run(self, pos, vel, t0, steps, history):
+        """
+        定步长与自适应积分结束时的公共收尾：写回状态、时刻、最近的轨迹以及辅助天体位置
+        :param t0: 本次积分开始的时刻 (小时)
+        :param steps: 本次积分输出的时间步数
+        :param history: 轨迹的最后若干步 (N, H, 3)
+        """
+        self.set_state(pos, vel)
+        self.time = t0 + steps * self.dt
+        if steps > 0:
+            self.history = history
+            for aux_body, aux_pos in zip(self.aux_list, self.aux_positions(t0 + (steps - 1) * self.dt)):
+                aux_body.pos = aux_pos
+
+    def enable_checkpoints(self, path, every_steps):
+        """
+        积分过程中每隔 every_steps 步把完整状态保存到 path (覆盖写入)
+        """
+        self.checkpoint_path = path
+        self.checkpoint_every = every_steps
+
+    def save_checkpoint(self, path, pos=None, vel=None, time=None, history=None):
+        """
+        保存检查点：位置、速度、时刻、辅助天体的轨道参数 (相位由时刻确定) 以及最近的轨迹
+        默认保存当前状态
+        """
+        if pos is None:
+            pos, vel = self.get_state()
+            time, history = self.time, self.history
+        if history is None:
+            history = np.zeros((len(self.bodies), 0, 3))
+        # 先写临时文件再替换，避免中途崩溃留下损坏的检查点
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, pos=pos, vel=vel, time=time, dt=self.dt, history=history,
+                 names=np.array([b.name for b in self.bodies]), aux_names=np.array([b.name for b in self.aux_list]),
+                 gm=self.gm, aux_gm=self.aux_gm, aux_params=self.aux_params)
+        os.replace(tmp_path, path)
+
+    def load_checkpoint(self, path):
+        """
+        从检查点恢复状态，模拟器的天体须与保存时一致
+        """
+        data = np.load(path)
+        if list(data["names"]) != [b.name for b in self.bodies] or \
+                list(data["aux_names"]) != [b.name for b in self.aux_list]:
+            raise ValueError(f"Error: checkpoint '{path}' does not match the simulated bodies!")
+        self.set_state(data["pos"], data["vel"])
+        self.time = float(data["time"])
+        self.aux_params = data["aux_params"]
+        self.history = data["history"] if data["history"].shape[1] > 0 else None
+        self.dt = float(data["dt"])
+        for aux_body, pos in zip(self.aux_list, self.aux_positions(self.time)):
+            aux_body.pos = pos
+
+    def _run_fixed(self, years, step_fn, offsets=(0.0,), to_state=None, from_state=None, initial=None,
+                   with_velocity=False):
+        """
+        定步长积分，一次返回全部轨迹，参数见 _stream_fixed
+        with_velocity=True 时额外返回速度字典
+        """
+        steps = int(years * YEAR / self.dt)
+        pos = self.get_state()[0] if initial is None else initial[0]
+        # 轨迹按 (N, ..., steps, 3) 连续存储，每个天体的轨迹是一块连续内存
+        shape = (len(self.bodies),) + pos.shape[:-2] + (steps, 3)
+        trajectories = np.zeros(shape)
+        velocities = np.zeros(shape) if with_velocity else None
+        step0 = int(round(self.time / self.dt))
+        for output in self._stream_fixed(years, step_fn, offsets, to_state, from_state, initial,
+                                         with_velocity=with_velocity):
+            chunk, t_chunk = output[:2]
+            for i, b in enumerate(self.bodies):
+                trajectories[i][..., t_chunk - step0, :] = chunk[b.name]
+                if with_velocity:
+                    velocities[i][..., t_chunk - step0, :] = output[2][b.name]
+
+        result = {b.name: trajectories[i] for i, b in enumerate(self.bodies)}, np.arange(steps)
+        if with_velocity:
+            result += ({b.name: velocities[i] for i, b in enumerate(self.bodies)},)
+        return result
+
+    def simulate_rk4(self, years=50, with_velocity=False):
+        """
+        :param with_velocity: 为 True 时额外返回各天体的速度 {name: (steps, 3)} (AU/h)，
+                              可传给 detect_accurate_times 做埃尔米特插值
+        """
+        return self._run_fixed(years, lambda pos, vel, aux_pos: self.rk4_step(pos, vel, aux_pos[0], self.dt),
+                               with_velocity=with_velocity)
+
+    def stream_rk4(self, years=50, chunk_steps=65536, with_velocity=False):
+        """
+        流式RK4模拟，每次产出一块轨迹，内存占用与模拟时长无关
+        :param chunk_steps: 每块的步数，相邻两块重叠一步，保证块边界上的日月食转变不会丢失
+        :return: 生成器，依次产出 (trajectories, t_range)，格式与 simulate_rk4 相同；
+                 with_velocity=True 时产出 (trajectories, t_range, velocities)
+        """
+        return self._stream_fixed(years, lambda pos, vel, aux_pos: self.rk4_step(pos, vel, aux_pos[0], self.dt),
+                                  chunk_steps=chunk_steps, with_velocity=with_velocity)
+
+    def perturbed_states(self, members, sigma_pos=0.0, sigma_vel=0.0, seed=None):
+        """
+        在当前状态上叠加高斯噪声，生成集合预报的初始状态，第0个成员不加扰动
+        :param members: 成员数 B
+        :param sigma_pos: 位置扰动的标准差 (AU)，标量或 (N,) 数组
+        :param sigma_vel: 速度扰动的标准差 (AU/h)，标量或 (N,) 数组
+        :return: 位置 (B, N, 3), 速度 (B, N, 3)
+        """
+        rng = np.random.default_rng(seed)
+        pos, vel = self.get_state()
+        shape = (members,) + pos.shape
+        sigma_pos = np.asarray(sigma_pos, dtype=np.float64).reshape(-1, 1)
+        sigma_vel = np.asarray(sigma_vel, dtype=np.float64).reshape(-1, 1)
+        noise_pos = rng.standard_normal(shape) * sigma_pos
+        noise_vel = rng.standard_normal(shape) * sigma_vel
+        noise_pos[0] = 0
+        noise_vel[0] = 0
+        return pos + noise_pos, vel + noise_vel
+
+    def simulate_ensemble(self, pos, vel, years=50):
+        """
+        集合预报：一次RK4积分同时推进所有成员
+        :param pos: 各成员的初始位置 (B, N, 3)
+        :param vel: 各成员的初始速度 (B, N, 3)
+        :return: 轨迹字典 {name: (B, steps, 3)} 与时间步序号；末状态保存在 self.ensemble_state 中
+        """
+        return self._run_fixed(years, lambda pos, vel, aux_pos: self.rk4_step(pos, vel, aux_pos[0], self.dt),
+                               initial=(np.asarray(pos, dtype=np.float64), np.asarray(vel, dtype=np.float64)))
+
+    def _earth_moon_indices(self):
+        if self._geo_indices is None:
+            names = [b.name for b in self.bodies]
+            if "Earth" not in names or "Moon" not in names:
+                raise KeyError("Error: geocentric mode requires both 'Earth' and 'Moon' in bodies!")
+            ie, im = names.index("Earth"), names.index("Moon")
+            # 外部引力源：除地月外的主天体
+            others = [i for i in range(len(self.bodies)) if i not in (ie, im)]
+            self._geo_indices = (ie, im, others)
+        return self._geo_indices
+
+    def to_geocentric(self, pos, vel):
+        """
+        将地球、月球的状态换为地月质心 (日心系) 与月球的地心坐标，其余天体不变
+        :return: 新坐标下的位置和速度，地球一行为地月质心，月球一行为月球地心坐标
+        """
+        ie, im, _ = self._earth_moon_indices()
+        gm_e, gm_m = self.gm[ie], self.gm[im]
+        q, u = pos.copy(), vel.copy()
+        q[..., ie, :] = (gm_e * pos[..., ie, :] + gm_m * pos[..., im, :]) / (gm_e + gm_m)
+        u[..., ie, :] = (gm_e * vel[..., ie, :] + gm_m * vel[..., im, :]) / (gm_e + gm_m)
+        q[..., im, :] = pos[..., im, :] - pos[..., ie, :]
+        u[..., im, :] = vel[..., im, :] - vel[..., ie, :]
+        return q, u
+
+    def from_geocentric(self, q, u):
+        """
+        to_geocentric 的逆变换
+        """
+        return self._geocentric_to_absolute(q), self._geocentric_to_absolute(u)
+
+    def _geocentric_to_absolute(self, y):
+        ie, im, _ = self._earth_moon_indices()
+        gm_e, gm_m = self.gm[ie], self.gm[im]
+        x = y.copy()
+        x[..., ie, :] = y[..., ie, :] - gm_m / (gm_e + gm_m) * y[..., im, :]
+        x[..., im, :] = y[..., ie, :] + gm_e / (gm_e + gm_m) * y[..., im, :]
+        return x
+
+    def geocentric_accelerations(self, q, aux_pos=None, two_body=True):
+        """
+        地心月球形式下的加速度：
+        地月质心只受外部天体的引力，月球地心坐标的加速度 = 地月二体项 + 外部天体的潮汐项 (间接项)
+        :param two_body: 为 False 时月球一行只含潮汐项 (Encke 方法中的摄动部分)
+        """
+        ie, im, others = self._earth_moon_indices()
+        gm_e, gm_m = self.gm[ie], self.gm[im]
+        pos = self._geocentric_to_absolute(q)
+        acc = self.accelerations(pos, aux_pos)
+        # 地月之间的内力在加权平均中相互抵消，地月质心只剩外部天体的引力
+        acc[..., ie, :] = (gm_e * acc[..., ie, :] + gm_m * acc[..., im, :]) / (gm_e + gm_m)
+
+        # 外部引力源：除地月外的主天体以及辅助天体
+        src = pos[..., others, :]
+        src_gm = self.gm[others]
+        if aux_pos is not None and len(self.aux_gm) > 0:
+            if aux_pos.shape[:-2] != pos.shape[:-2]:
+                aux_pos = np.broadcast_to(aux_pos, pos.shape[:-2] + aux_pos.shape[-2:])
+            src = np.concatenate([src, aux_pos], axis=-2)
+            src_gm = np.concatenate([src_gm, self.aux_gm])
+
+        r = q[..., im, :]
+        # d_e: 地球指向外部天体
+        d_e = src - pos[..., ie, None, :]
+        acc[..., im, :] = lunar_tidal(r, d_e, src_gm)
+        if two_body:
+            r2 = np.sum(r * r, axis=-1)
+            acc[..., im, :] -= (gm_e + gm_m) * r / (r2 * np.sqrt(r2))[..., None]
+        return acc
+
+    def _encke_rk4_step_fn(self, rectify_hours):
+        """
+        Encke 方法的一步RK4 (见 simulate_geocentric)，用于地心月球坐标下的 _stream_fixed
+        :return: step_fn(q, u, aux_pos)，aux_pos 的前三行为步起点、中点、终点处辅助天体的位置
+        """
+        ie, im, _ = self._earth_moon_indices()
+        mu = self.gm[ie] + self.gm[im]
+        block = max(1, int(round(rectify_hours / self.dt)))
+        # 校正区间内各步中点、终点相对区间起点的时刻 (block, 2)
+        ref_times = (np.arange(block)[:, None] + np.array([0.5, 1.0])) * self.dt
+        cache = {"index": block}
+
+        def accel(p, args):
+            # p 中月球一行为相对参考轨道的偏差，ref 为该级所在时刻参考轨道上的位置
+            aux_pos, ref = args
+            q = p.copy()
+            q[im] += ref
+            acc = self.geocentric_accelerations(q, aux_pos, two_body=False)
+            acc[im] += encke_acceleration(p[im], ref, mu)
+            return acc
+
+        def step_fn(q, u, aux_pos):
+            if cache["index"] == block:
+                # 校正：以月球当前的地心状态作为新的参考轨道
+                cache["start"] = (q[im].copy(), u[im].copy())
+                cache["ref"] = kepler_drift(q[im], u[im], mu, ref_times)
+                cache["index"] = 0
+            k = cache["index"]
+            ref_pos, ref_vel = cache["ref"]
+            start_pos, start_vel = cache["start"] if k == 0 else (ref_pos[k - 1, 1], ref_vel[k - 1, 1])
+            p, w = q.copy(), u.copy()
+            p[im] -= start_pos
+            w[im] -= start_vel
+            stages = ((aux_pos[0], start_pos), (aux_pos[1], ref_pos[k, 0]), (aux_pos[2], ref_pos[k, 1]))
+            p, w = self.rk4_step(p, w, None, self.dt, accel=accel, stage_args=stages)
+            p[im] += ref_pos[k, 1]
+            w[im] += ref_vel[k, 1]
+            cache["index"] = k + 1
+            return p, w
+
+        return step_fn
+
+    def simulate_geocentric(self, years=50, rectify_hours=ENCKE_RECTIFY_HOURS):
+        """
+        以地月质心 (日心系) + 月球地心坐标为变量积分，月球用 Encke 方法：
+        地月二体的参考开普勒轨道用 kepler_drift 解析推进，RK4 只积分月球相对参考轨道的偏差，
+        偏差只受外部天体的潮汐项和很小的二体引力差 (encke_acceleration) 作用，
+        月球精度相同时步长可比 simulate_rk4 大数倍
+        每隔 rectify_hours 以月球的当前状态重新确定参考轨道，使偏差保持很小，
+        一个校正区间内各步中点、终点的参考位置一次批量求出；
+        辅助天体取RK4各级所在时刻的位置，而不是在步内保持不变
+        :param rectify_hours: 参考轨道的校正间隔 (小时)，不足一步时每步校正
+        :return: 与 simulate_rk4 相同，轨迹换回原来的坐标
+        """
+        return self._run_fixed(years, self._encke_rk4_step_fn(rectify_hours), (0.0, 0.5, 1.0), self.to_geocentric,
+                               self.from_geocentric)
+
+    def simulate_multirate(self, years=50, outer_steps=6, order=MULTIRATE_ORDER,
+                           rectify_hours=MULTIRATE_RECTIFY_HOURS):
+        """
+        多时间步长积分，在地心月球坐标下进行：
+        快变部分 (地月二体的开普勒运动) 用 kepler_drift 解析推进 (Encke 方法，见 simulate_geocentric)，
+        参考轨道在一个校正区间内各内层步时刻的位置一次批量求出；
+        慢变部分 (太阳、行星对各天体的引力以及对月球的潮汐项) 每个外层步 (outer_steps * self.dt) 只计算一次，
+        用 order 阶 Adams 预估-校正 (PEC) 多步法积分，内层步 (self.dt) 的状态由同一插值多项式给出，不再计算引力
+        开头 order - 1 个外层步用 Encke 方法的RK4按内层步长积分，积累多步法所需的节点
+        :param outer_steps: 每个外层步包含的内层步数
+        :param order: 多步法的阶数 (所用的节点数)
+        :param rectify_hours: 参考轨道的校正间隔 (小时)，按外层步取整
+        :return: 与 simulate_rk4 相同，每个内层步记录一次
+        """
+        ie, im, _ = self._earth_moon_indices()
+        mu = self.gm[ie] + self.gm[im]
+        m, k = outer_steps, order
+        h = m * self.dt
+        # 预估用当前及之前的 k 个节点，校正用新节点及之前的 k - 1 个节点 (节点均按新到旧排列)
+        _, pred_c = adams_weights(-np.arange(k), [1.0])
+        corr_b, corr_c = adams_weights(1 - np.arange(k), np.arange(1, m + 1) / m)
+        block = max(1, int(round(rectify_hours / h)))
+        # 参考轨道的求值时刻：校正节点之前 k - 1 个外层步到之后 block 个外层步内的各内层步
+        ref_steps = np.arange(-(k - 1) * m, block * m + 1)
+        startup = self._encke_rk4_step_fn(ENCKE_RECTIFY_HOURS)
+        cache = {"step": 0, "slow": [], "moon": []}
+
+        def step_fn(q, u, aux_pos):
+            step = cache["step"]
+            cache["step"] = step + 1
+            j = step % m
+            if step <= (k - 1) * m and j == 0:
+                # 启动阶段：每个外层节点上记录慢变加速度与月球位置
+                cache["slow"].insert(0, self.geocentric_accelerations(q, aux_pos[0], two_body=False))
+                cache["moon"].insert(0, q[im].copy())
+            if step < (k - 1) * m:
+                return startup(q, u, aux_pos[:3])
+            if j > 0:
+                return cache["states"][0][j], cache["states"][1][j]
+
+            node = step // m
+            if step == (k - 1) * m or node - cache["rectified"] == block:
+                # 校正：以月球当前的地心状态作为新的参考轨道，节点上的偏差随之重新计算
+                cache["ref"] = kepler_drift(q[im], u[im], mu, ref_steps * self.dt)
+                cache["rectified"] = node
+            ref_pos, ref_vel = cache["ref"]
+            offset = (node - cache["rectified"]) * m - ref_steps[0]
+            slow, moon = np.asarray(cache["slow"]), np.asarray(cache["moon"])
+
+            # 各节点上偏差的加速度 = 慢变加速度 + 二体引力差，只有后者需要对月球重新计算
+            acc = slow.copy()
+            past = ref_pos[offset - m * np.arange(k)]
+            acc[:, im] += encke_acceleration(moon - past, past, mu)
+            p, w = q.copy(), u.copy()
+            p[im] -= ref_pos[offset]
+            w[im] -= ref_vel[offset]
+
+            # 预估新节点，在预估位置上计算一次慢变加速度
+            pred = p + w * h + h * h * np.tensordot(pred_c[0], acc, 1)
+            pred[im] += ref_pos[offset + m]
+            new_slow = self.geocentric_accelerations(pred, aux_pos[3], two_body=False)
+            new_acc = new_slow.copy()
+            new_acc[im] += encke_acceleration(pred[im] - ref_pos[offset + m], ref_pos[offset + m], mu)
+
+            # 校正，同时给出外层步内各内层步的状态
+            acc = np.concatenate([new_acc[None], acc[:-1]])
+            frac = np.arange(1, m + 1)[:, None, None] / m
+            states = p + w * (frac * h) + h * h * np.tensordot(corr_c, acc, 1), w + h * np.tensordot(corr_b, acc, 1)
+            states[0][:, im] += ref_pos[offset + 1:offset + m + 1]
+            states[1][:, im] += ref_vel[offset + 1:offset + m + 1]
+            cache["states"] = states
+            cache["slow"] = np.concatenate([new_slow[None], slow[:-1]])
+            cache["moon"] = np.concatenate([states[0][-1:, im], moon[:-1]])
+            return states[0][0], states[1][0]
+
+        return self._run_fixed(years, step_fn, (0.0, 0.5, 1.0, float(m)), self.to_geocentric, self.from_geocentric)
+
+    def simulate_symplectic(self, years=50, method="yoshida4", jacobi_order=None, with_velocity=False):
+        """
+        用辛积分器模拟，长时间积分时能量误差有界
+        :param method: "leapfrog" (2阶), "yoshida4" (4阶), "yoshida6" (6阶) 或 "wh" (Wisdom-Holman)
+        :param jacobi_order: Wisdom-Holman 所用雅可比坐标的天体顺序 (天体名列表)，默认见 default_jacobi_order
+        :param with_velocity: 为 True 时额外返回各天体的速度 {name: (steps, 3)} (AU/h)
+        :return: 与 simulate_rk4 相同
+        """
+        if method not in SYMPLECTIC_WEIGHTS:
+            raise KeyError(f"Error: '{method}' is not a valid symplectic method!")
+        weights = np.array(SYMPLECTIC_WEIGHTS[method])
+        # 每个子步结束时刻，用于计算 kick 时辅助天体的位置
+        offsets = np.cumsum(weights)
+        aux0 = self.aux_positions(self.time)
+
+        if method == "wh":
+            names = [b.name for b in self.bodies]
+            order = self.default_jacobi_order() if jacobi_order is None else [names.index(n) for n in jacobi_order]
+            J, kepler_mu = self.jacobi_matrix(order)
+            J_inv = np.linalg.inv(J)
+            kepler_mu = kepler_mu[:, None]
+
+            def to_state(pos, vel):
+                return J @ pos, J @ vel
+
+            def from_state(q, u):
+                return J_inv @ q, J_inv @ u
+
+            def accel(q, aux_pos):
+                # 相互作用部分 = 全部引力 - 雅可比坐标下的开普勒引力
+                acc = J @ self.accelerations(J_inv @ q, aux_pos)
+                r = q[1:]
+                acc[1:] += kepler_mu[1:] * r / np.sum(r * r, axis=-1, keepdims=True) ** 1.5
+                return acc
+
+            def drift(q, u, h):
+                q = q.copy()
+                u = u.copy()
+                q[0] += u[0] * h
+                q[1:], u[1:] = kepler_drift(q[1:], u[1:], kepler_mu[1:, 0], h)
+                return q, u
+        else:
+            to_state = from_state = None
+
+            def accel(q, aux_pos):
+                return self.accelerations(q, aux_pos)
+
+            def drift(q, u, h):
+                return q + u * h, u
+
+        # 子步末尾的加速度即为下一子步开头的加速度，每个子步只需一次引力计算
+        pos, vel = self.get_state()
+        cache = {"acc": accel(pos if to_state is None else to_state(pos, vel)[0], aux0)}
+
+        def step_fn(q, u, aux_pos):
+            acc = cache["acc"]
+            for w, aux in zip(weights, aux_pos):
+                h = w * self.dt
+                u = u + acc * (h / 2)
+                q, u = drift(q, u, h)
+                acc = accel(q, aux)
+                u = u + acc * (h / 2)
+            cache["acc"] = acc
+            return q, u
+
+        return self._run_fixed(years, step_fn, offsets, to_state, from_state, with_velocity=with_velocity)
+
+    def simulate_adaptive(self, years=50, rtol=1e-10, atol=1e-14, h0=None, max_steps=10 ** 8, with_velocity=False):
+        """
+        用带误差控制的 Dormand-Prince 5(4) 自适应步长积分
+        输出仍按 self.dt 等间隔采样 (五次埃尔米特稠密输出)，与 simulate_rk4 的返回格式一致；
+        self.time、self.history 与检查点也按采样时刻更新，与定步长积分相同
+        :param rtol: 相对误差容限
+        :param atol: 绝对误差容限 (位置单位 AU，速度单位 AU/h)
+        :param h0: 初始步长 (小时)，默认取 self.dt
+        :param max_steps: 尝试步数上限
+        :param with_velocity: 为 True 时额外返回各天体在采样时刻的速度
+        :return: 与 simulate_rk4 相同；步长统计保存在 self.adaptive_stats 中
+        """
+        steps = int(years * YEAR / self.dt)
+        t_end = steps * self.dt
+        t0 = self.time
+        history_steps = int(np.ceil(HISTORY_HOURS / self.dt))
+        trajectories = np.zeros((len(self.bodies), steps, 3))
+        velocities = np.zeros((len(self.bodies), steps, 3)) if with_velocity else None
+        pos, vel = self.get_state()
+        if steps > 0:
+            trajectories[:, 0] = pos
+            if with_velocity:
+                velocities[:, 0] = vel
+
+        def derivative(t, p, v):
+            return v, self.accelerations(p, self.aux_positions(t0 + t))
+
+        t = 0.0
+        h = self.dt if h0 is None else h0
+        kv, ka = derivative(t, pos, vel)
+        nfev = 1
+        accepted = rejected = 0
+        h_min, h_max = np.inf, 0.0
+        next_sample = 1
+        every = self.checkpoint_every
+        next_checkpoint = every if every else steps + 1
+
+        while t < t_end:
+            if accepted + rejected >= max_steps:
+                raise RuntimeError(f"Error: adaptive integration exceeded {max_steps} steps!")
+            h = min(h, t_end - t)
+
+            # 计算各级斜率
+            k_pos = [kv]
+            k_vel = [ka]
+            for c, a_row in zip(DOPRI_C[1:], DOPRI_A[1:]):
+                p = pos + h * sum(a * k for a, k in zip(a_row, k_pos) if a != 0)
+                v = vel + h * sum(a * k for a, k in zip(a_row, k_vel) if a != 0)
+                dp, dv = derivative(t + c * h, p, v)
+                k_pos.append(dp)
+                k_vel.append(dv)
+            nfev += 6
+            # 最后一级的输入即为五阶解
+            new_pos, new_vel = p, v
+
+            err_pos = h * sum(e * k for e, k in zip(DOPRI_E, k_pos) if e != 0)
+            err_vel = h * sum(e * k for e, k in zip(DOPRI_E, k_vel) if e != 0)
+            scale_pos = atol + rtol * np.maximum(np.abs(pos), np.abs(new_pos))
+            scale_vel = atol + rtol * np.maximum(np.abs(vel), np.abs(new_vel))
+            err = np.sqrt((np.sum((err_pos / scale_pos) ** 2) + np.sum((err_vel / scale_vel) ** 2))
+                          / (2 * pos.size))
+
+            if err <= 1:
+                # 接受本步，并对落在本步内的采样时刻做稠密输出
+                t_new = t + h
+                last = min(steps - 1, int(np.floor(t_new / self.dt + 1e-9)))
+                if last >= next_sample:
+                    sample_t = np.arange(next_sample, last + 1) * self.dt
+                    sample_pos, sample_vel = hermite_quintic(pos, vel, ka, new_pos, new_vel, k_vel[-1],
+                                                             h, ((sample_t - t) / h)[:, None])
+                    trajectories[:, next_sample:last + 1] = np.swapaxes(sample_pos, 0, 1)
+                    if with_velocity:
+                        velocities[:, next_sample:last + 1] = np.swapaxes(sample_vel, 0, 1)
+                    next_sample = last + 1
+                # 落在本步内的检查点时刻 (第 s 步)，保存该时刻的状态与此前的轨迹
+                while next_checkpoint <= steps and next_checkpoint * self.dt <= t_new + 1e-9 * self.dt:
+                    s = next_checkpoint
+                    check_pos, check_vel = hermite_quintic(pos, vel, ka, new_pos, new_vel, k_vel[-1],
+                                                           h, (s * self.dt - t) / h)
+                    self.save_checkpoint(self.checkpoint_path, check_pos, check_vel, t0 + s * self.dt,
+                                         trajectories[:, max(0, s - history_steps):s])
+                    next_checkpoint += every
+
+                t = t_new
+                pos, vel = new_pos, new_vel
+                kv, ka = k_pos[-1], k_vel[-1]
+                accepted += 1
+                h_min, h_max = min(h_min, h), max(h_max, h)
+                factor = 5.0 if err == 0 else min(5.0, max(0.2, 0.9 * err ** -0.2))
+            else:
+                rejected += 1
+                factor = max(0.2, 0.9 * err ** -0.2)
+            h = h * factor
+
+        self._finish_run(pos, vel, t0, steps, trajectories[:, max(0, steps - history_steps):])
+        self.adaptive_stats = {
+            "accepted": accepted,
+            "rejected": rejected,
+            "nfev": nfev,
+            "h_min": float(h_min),
+            "h_max": float(h_max),
+            "h_mean": t_end / accepted if accepted else 0.0,
+            # 同样时长的定步长RK4所需的引力计算次数
+            "rk4_nfev": 4 * steps,
+        }
+        result = {b.name: trajectories[i] for i, b in enumerate(self.bodies)}, np.arange(steps)
+        if with_velocity:
+            result += ({b.name: velocities[i] for i, b in enumerate(self.bodies)},)
+        return result
@@ -0,0 +1,102 @@
+import numpy as np
+from check_eclipse import classify_eclipses
+from dense_output import interpolate_positions
+from roots import illinois
+
+# 粗扫描合/冲的采样间隔 (小时)，远小于半个朔望月，相邻两次采样之间最多只有一次合或冲
+SCAN_HOURS = 6
+# 合/冲前后需要判断日月食的时长 (小时)，覆盖整个食过程以及食甚与合/冲时刻之间的偏差
+WINDOW_HOURS = 12
+# 合/冲时月球黄纬的上限 (度)，超出时不可能发生日/月食，取值含余量
+SOLAR_LATITUDE_LIMIT = 1.7
+LUNAR_LATITUDE_LIMIT = 1.7
+
+
+def ecliptic_pole(sun_pos, earth_pos, samples=1024):
+    """
+    由地球绕日轨道的角动量方向估计黄道面法向
+    """
+    stride = max(1, len(sun_pos) // samples)
+    rel = earth_pos[::stride] - sun_pos[::stride]
+    pole = np.cross(rel[:-1], rel[1:]).sum(axis=0)
+    return pole / np.linalg.norm(pole)
+
+
+def _elongation(sun_pos, moon_pos, earth_pos, pole):
+    """
+    :return: 日月黄经差的正弦 (乘以正的因子)，在合、冲时变号；日月方向的点积，合时为正、冲时为负
+    """
+    g = moon_pos - earth_pos
+    u = sun_pos - earth_pos
+    return np.cross(g, u) @ pole, np.sum(g * u, axis=-1)
+
+
+def find_syzygies(trajectories, dt, velocities=None, xtol=1e-6, pole=None):
+    """
+    求模拟时段内所有的合 (朔) 与冲 (望)
+    先按 SCAN_HOURS 间隔粗扫描黄经差的变号，再在变号的区间内逐步定位，最后用伊利诺伊法求出准确时刻
+    :param trajectories: 模拟得到的轨迹 {name: (steps, 3)}
+    :param dt: 时间步长 (小时)
+    :param velocities: 各天体的速度，给出时步间用三次埃尔米特插值
+    :param xtol: 合/冲时刻的容差 (步)
+    :return: 时刻 (步)，是否为合 (bool)，月球黄纬 (度)
+    """
+    sun, moon, earth = trajectories['Sun'], trajectories['Moon'], trajectories['Earth']
+    if pole is None:
+        pole = ecliptic_pole(sun, earth)
+    stride = max(1, int(SCAN_HOURS / dt))
+    coarse = np.arange(0, len(sun), stride)
+    f, _ = _elongation(sun[coarse], moon[coarse], earth[coarse], pole)
+    brackets = coarse[np.flatnonzero((f[:-1] < 0) != (f[1:] < 0))]
+
+    # 在每个粗区间内逐步求值，找到变号的那一步
+    steps = np.minimum(brackets[:, None] + np.arange(stride + 1), len(sun) - 1)
+    f, _ = _elongation(sun[steps], moon[steps], earth[steps], pole)
+    change = np.argmax((f[:, :-1] < 0) != (f[:, 1:] < 0), axis=1)
+    rows = np.arange(len(steps))
+    index = steps[rows, change]
+    fa, fb = f[rows, change], f[rows, change + 1]
+
+    def fun(s, active):
+        return _elongation(*interpolate_positions(trajectories, index[active], s, velocities, dt), pole)[0]
+
+    s = illinois(fun, np.zeros(len(index)), np.ones(len(index)), fa, fb, xtol)
+    sun, moon, earth = interpolate_positions(trajectories, index, s, velocities, dt)
+    _, cos_term = _elongation(sun, moon, earth, pole)
+    g = moon - earth
+    latitude = np.degrees(np.arcsin(g @ pole / np.linalg.norm(g, axis=-1)))
+    return index + s, cos_term > 0, latitude
+
+
+def eclipse_windows(trajectories, dt, velocities=None, half_width=WINDOW_HOURS):
+    """
+    可能发生日/月食的时段：黄纬足够小的合/冲前后 half_width 小时
+    :return: {"solar": 各时段的起点 (步), "lunar": 各时段的起点 (步)}，以及每个时段的步数
+    """
+    times, is_new, latitude = find_syzygies(trajectories, dt, velocities)
+    width = int(np.ceil(half_width / dt))
+    starts = np.floor(times).astype(int) - width
+    solar = starts[is_new & (np.abs(latitude) < SOLAR_LATITUDE_LIMIT)]
+    lunar = starts[~is_new & (np.abs(latitude) < LUNAR_LATITUDE_LIMIT)]
+    return {"solar": solar, "lunar": lunar}, 2 * width + 2
+
+
+def classify_near_syzygies(trajectories, dt, velocities=None, half_width=WINDOW_HOURS):
+    """
+    只在合/冲附近的时段内判断日月食，其余时间步记为无食
+    所有时段的时间步拼接后一次调用 classify_eclipses
+    :return: 与 classify_eclipses 相同的日食、月食类型编码 (steps,)
+    """
+    steps = len(trajectories['Sun'])
+    windows, length = eclipse_windows(trajectories, dt, velocities, half_width)
+    solar_index = np.clip(windows["solar"][:, None] + np.arange(length), 0, steps - 1).ravel()
+    lunar_index = np.clip(windows["lunar"][:, None] + np.arange(length), 0, steps - 1).ravel()
+    index = np.concatenate([solar_index, lunar_index])
+    solar_codes, lunar_codes = classify_eclipses(trajectories['Sun'][index], trajectories['Moon'][index],
+                                                 trajectories['Earth'][index])
+
+    solar = np.zeros(steps, dtype=np.uint8)
+    lunar = np.zeros(steps, dtype=np.uint8)
+    solar[solar_index] = solar_codes[:len(solar_index)]
+    lunar[lunar_index] = lunar_codes[len(solar_index):]
+    return solar, lunar
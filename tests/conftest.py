@@ -0,0 +1,73 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import PLANET_MASS, PLANET_RADII, AU  # noqa: E402
+from simulate import ThreeBodySimulator  # noqa: E402
+
+
+class Body:
+    """
+    与 coords.CelestialBody 相同的属性，不依赖星历文件
+    """
+    def __init__(self, name, pos, velocity):
+        self.name = name
+        self.mass = PLANET_MASS[name]
+        self.radius = PLANET_RADII[name]
+        self.pos = np.array(pos, dtype=np.float64)
+        self.velocity = np.array(velocity, dtype=np.float64)
+
+
+def _circular(name, pos, direction):
+    """
+    绕太阳做圆轨道的天体 (太阳位于原点)
+    """
+    pos = np.array(pos, dtype=np.float64)
+    speed = np.sqrt(PLANET_MASS['Sun'] / np.linalg.norm(pos))
+    direction = np.array(direction, dtype=np.float64)
+    return Body(name, pos, direction / np.linalg.norm(direction) * speed)
+
+
+def make_bodies():
+    """
+    近似的日、地、月初始状态 (日心坐标，与模拟器的坐标方向相反) 以及木星、金星、土星
+    :return: 主天体列表, 辅助天体列表
+    """
+    sun = Body('Sun', [0, 0, 0], [0, 0, 0])
+    earth = _circular('Earth', [-0.17, 0.97, 0.0], [-0.97, -0.17, 0.0])
+    r_em = 384400 / AU
+    v_em = np.sqrt((PLANET_MASS['Earth'] + PLANET_MASS['Moon']) / r_em)
+    inc = np.radians(5.1)
+    moon = Body('Moon', earth.pos + [r_em, 0, 0], earth.velocity + v_em * np.array([0, np.cos(inc), np.sin(inc)]))
+    aux = [
+        _circular('Jupiter', [1.0, 5.0, -0.05], [-5.0, 1.0, 0.0]),
+        _circular('Venus', [0.7, -0.1, 0.02], [0.1, 0.7, 0.0]),
+        _circular('Saturn', [9.0, -3.0, -0.3], [3.0, 9.0, 0.0]),
+    ]
+    return [sun, earth, moon], aux
+
+
+@pytest.fixture(scope="session")
+def simulator():
+    """
+    返回按步长 (小时) 新建模拟器的函数；with_aux=False 时不含辅助天体，主天体的能量守恒
+    """
+    def make(dt=1.0, with_aux=True):
+        bodies, aux = make_bodies()
+        return ThreeBodySimulator(bodies, dt=dt, aux_list=aux if with_aux else None)
+    return make
+
+
+@pytest.fixture(scope="session")
+def trajectory():
+    """
+    两年的 RK4 轨迹与速度，步长 1 小时
+    :return: 轨迹 {name: (steps, 3)}, 时间步序号, 速度 {name: (steps, 3)}, 步长
+    """
+    bodies, aux = make_bodies()
+    sim = ThreeBodySimulator(bodies, dt=1.0, aux_list=aux)
+    trajectories, t_range, velocities = sim.simulate_rk4(2, with_velocity=True)
+    return trajectories, t_range, velocities, 1.0
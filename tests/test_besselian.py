@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from besselian import besselian_elements, gast, gmst, nutation, solar_eclipse_elements, ELEMENT_NAMES
+from check_eclipse import check_sun_eclipse, detect_accurate_times_batched, eclipse_names, PARTIAL
+from timescale import delta_t
+
+
+def test_eclipse_type_forms_give_same_elements(trajectory):
+    trajectories, t_range, velocities, dt = trajectory
+    _, types = check_sun_eclipse(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'], t_range,
+                                 as_codes=True)
+    start, codes, end = detect_accurate_times_batched(check_sun_eclipse, trajectories, types, 20,
+                                                      velocities=velocities, dt=dt, as_codes=True)
+    assert len(start) > 0
+    # 测试轨迹为日心坐标，与模拟器默认的坐标方向相反
+    from_codes = solar_eclipse_elements(trajectories, start, codes, end, dt, velocities, frame_sign=1)
+    from_names = solar_eclipse_elements(trajectories, start, eclipse_names(codes), end, dt, velocities,
+                                        frame_sign=1)
+    from_list = solar_eclipse_elements(trajectories, start, list(eclipse_names(codes)), end, dt, velocities,
+                                       frame_sign=1)
+    assert len(from_codes) == np.sum(codes == PARTIAL)
+    for elements in (from_names, from_list):
+        assert len(elements) == len(from_codes)
+        for a, b in zip(from_codes, elements):
+            assert a.t0 == b.t0
+            for name in ELEMENT_NAMES:
+                np.testing.assert_array_equal(a.coefs[name], b.coefs[name])
+
+
+def test_invalid_eclipse_type_dtype_raises(trajectory):
+    trajectories, _, velocities, dt = trajectory
+    with pytest.raises(TypeError):
+        solar_eclipse_elements(trajectories, [1.0], np.array([1.0]), [2.0], dt, velocities)
+    with pytest.raises(ValueError):
+        solar_eclipse_elements(trajectories, [1.0], np.array([7]), [2.0], dt, velocities)
+
+
+def test_default_delta_t_follows_timescale(trajectory):
+    trajectories, _, velocities, dt = trajectory
+    t_max = np.array([2010.0, 9973.5]) * dt
+    elements = besselian_elements(trajectories, t_max, dt, velocities, frame_sign=1)
+    for e in elements:
+        assert e.delta_t == pytest.approx(float(delta_t(e.jd_tt)))
+        # 给出相同的常数 ΔT 时根数一致
+        fixed = besselian_elements(trajectories, [e.t0], dt, velocities, delta_t=e.delta_t, frame_sign=1)[0]
+        np.testing.assert_allclose(fixed.coefs["mu"], e.coefs["mu"], rtol=0, atol=1e-6)
+
+
+def test_apparent_sidereal_time():
+    # Meeus 例 12.b / 22.a：1987-04-10 0h UT，黄经章动 -3.788 角秒，二分差 -0.2317 秒
+    jd_ut1 = 2446895.5
+    jd_tt = jd_ut1 + 55.6 / 86400
+    dpsi, _, _ = nutation(jd_tt)
+    assert np.degrees(dpsi) * 3600 == pytest.approx(-3.788, abs=0.5)
+    assert (gast(jd_ut1, jd_tt) - gmst(jd_ut1)) * 240 == pytest.approx(-0.2317, abs=0.03)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from catalog import extend_catalog
+from check_eclipse import detect_streaming
+from constants import YEAR
+
+
+def _years(steps, dt):
+    return (steps + 0.5) * dt / YEAR
+
+
+# 第 5991 步开始的月食：续算起点落在食过程之中，或食过程刚结束 (已在原列表中，续算时由最近轨迹再次检测到)
+@pytest.mark.parametrize("first_steps", [5992, 5998])
+def test_extend_catalog_matches_continuous_run(simulator, first_steps):
+    dt, more_steps = 1.0, 4000
+    sim = simulator(dt=dt)
+    catalog = detect_streaming(sim.stream_rk4(_years(first_steps, dt), chunk_steps=2000), 20)
+    extended = extend_catalog(sim, catalog, _years(more_steps, dt), 20)
+    continuous = detect_streaming(simulator(dt=dt).stream_rk4(_years(first_steps + more_steps, dt),
+                                                              chunk_steps=2000), 20)
+    for (start, types, end), (expected_start, expected_types, expected_end) in zip(extended, continuous):
+        assert len(expected_start) > 0
+        np.testing.assert_array_equal(types, expected_types)
+        np.testing.assert_allclose(start, expected_start, rtol=0, atol=1e-9)
+        np.testing.assert_allclose(end, expected_end, rtol=0, atol=1e-9)
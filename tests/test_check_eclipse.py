@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from check_eclipse import (check_sun_eclipse, check_moon_eclipse, classify_eclipses, detect_accurate_times,
+                           detect_accurate_times_batched, detect_streaming, ensemble_contact_spread, find_contacts,
+                           greatest_eclipse, sun_eclipse_magnitudes, sun_shadow_functions, trim_edge_eclipses)
+
+
+@pytest.fixture(scope="module")
+def ensemble(simulator):
+    sim = simulator(dt=1.0)
+    pos, vel = sim.perturbed_states(4, sigma_pos=2e-8, sigma_vel=2e-10, seed=1)
+    trajectories, t_range = sim.simulate_ensemble(pos, vel, 1.2)
+    return trajectories, t_range
+
+
+@pytest.mark.parametrize("check_fun", [check_sun_eclipse, check_moon_eclipse])
+def test_ensemble_spread_matches_per_member_detection(ensemble, check_fun):
+    trajectories, t_range = ensemble
+    window = 48
+    spread = ensemble_contact_spread(check_fun, trajectories, t_range, 20, window)
+    members = trajectories['Sun'].shape[0]
+    events = []
+    for b in range(members):
+        member = {name: traj[b] for name, traj in trajectories.items()}
+        _, types = check_fun(member['Sun'], member['Moon'], member['Earth'], t_range)
+        events.append(detect_accurate_times_batched(check_fun, member, types, 20))
+
+    base_start, base_type, _ = events[0]
+    assert len(spread) == len(base_start) > 0
+    for item, start, type in zip(spread, base_start, base_type):
+        assert item['type'] == type
+        for b, (m_start, m_type, m_end) in enumerate(events):
+            candidates = [i for i in range(len(m_start)) if m_type[i] == type and abs(m_start[i] - start) <= window]
+            if candidates:
+                i = min(candidates, key=lambda i: abs(m_start[i] - start))
+                assert item['start'][b] == pytest.approx(m_start[i], abs=1e-9)
+                assert item['end'][b] == pytest.approx(m_end[i], abs=1e-9)
+            else:
+                assert np.isnan(item['start'][b])
+        assert item['detected'] == 1.0
+
+
+@pytest.mark.parametrize("check_fun", [check_sun_eclipse, check_moon_eclipse])
+@pytest.mark.parametrize("hermite", [False, True])
+def test_batched_matches_looped_detection(trajectory, check_fun, hermite):
+    trajectories, t_range, velocities, dt = trajectory
+    velocities, dt = (velocities, dt) if hermite else (None, None)
+    filtered_times, types = check_fun(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'], t_range)
+    looped = detect_accurate_times(check_fun, trajectories, trim_edge_eclipses(filtered_times, types), types, 20,
+                                   offset=7, velocities=velocities, dt=dt)
+    batched = detect_accurate_times_batched(check_fun, trajectories, types, 20, offset=7, velocities=velocities,
+                                            dt=dt)
+    assert len(looped[0]) > 0
+    assert list(batched[1]) == looped[1]
+    np.testing.assert_allclose(batched[0], looped[0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(batched[2], looped[2], rtol=0, atol=1e-9)
+
+
+def test_classify_eclipses_matches_check_functions(trajectory):
+    trajectories, t_range, _, _ = trajectory
+    sun, moon, earth = trajectories['Sun'], trajectories['Moon'], trajectories['Earth']
+    # 块长不整除步数，检验块边界与最后一个不完整的块
+    solar, lunar = classify_eclipses(sun, moon, earth, chunk_size=1000)
+    _, solar_codes = check_sun_eclipse(sun, moon, earth, t_range, as_codes=True)
+    _, lunar_codes = check_moon_eclipse(sun, moon, earth, t_range, as_codes=True)
+    assert solar.dtype == lunar.dtype == np.uint8
+    assert set(np.unique(solar)) >= {0, 1, 3} and set(np.unique(lunar)) >= {0, 1, 2}
+    np.testing.assert_array_equal(solar, solar_codes)
+    np.testing.assert_array_equal(lunar, lunar_codes)
+
+
+def test_hermite_interpolation_requires_dt(trajectory):
+    trajectories, t_range, velocities, _ = trajectory
+    _, types = check_sun_eclipse(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'], t_range)
+    with pytest.raises(ValueError):
+        detect_accurate_times_batched(check_sun_eclipse, trajectories, types, 20, velocities=velocities)
+    with pytest.raises(ValueError):
+        find_contacts(sun_shadow_functions, trajectories, velocities=velocities)
+    with pytest.raises(ValueError):
+        greatest_eclipse(sun_eclipse_magnitudes, trajectories, [2008.0], [2012.0], velocities=velocities)
+
+
+def test_streaming_matches_batched(simulator):
+    sim = simulator(dt=1.0)
+    # 块长取得较短，使若干次日月食跨越块边界
+    streamed = detect_streaming(sim.stream_rk4(1.5, chunk_steps=1000, with_velocity=True), 20, dt=1.0)
+    sim = simulator(dt=1.0)
+    trajectories, t_range, velocities = sim.simulate_rk4(1.5, with_velocity=True)
+    for check_fun, (start, types, end) in zip((check_sun_eclipse, check_moon_eclipse), streamed):
+        _, codes = check_fun(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'], t_range, as_codes=True)
+        expected = detect_accurate_times_batched(check_fun, trajectories, codes, 20, velocities=velocities, dt=1.0,
+                                                 as_codes=True)
+        assert types.dtype == np.uint8
+        assert len(start) > 0
+        np.testing.assert_array_equal(types, expected[1])
+        np.testing.assert_allclose(start, expected[0], rtol=0, atol=1e-9)
+        np.testing.assert_allclose(end, expected[2], rtol=0, atol=1e-9)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from besselian import besselian_elements
+from check_eclipse import (check_sun_eclipse, detect_accurate_times_batched, greatest_eclipse, sun_eclipse_magnitudes,
+                           ANNULAR)
+from eclipse_geometry import eclipse_magnitude, obscuration
+from ground_track import ground_tracks
+from local_circumstances import local_circumstances
+
+
+def test_eclipse_magnitude_definition():
+    # 全食：本影内取视直径之比，本影外为日面直径被遮住的比例
+    L1, L2 = 0.55, -0.01
+    assert eclipse_magnitude(0.0, L1, L2) == pytest.approx((L1 - L2) / (L1 + L2))
+    assert eclipse_magnitude(0.3, L1, L2) == pytest.approx((L1 - 0.3) / (L1 + L2))
+    assert eclipse_magnitude(L1, L1, L2) == pytest.approx(0.0)
+    # 环食：伪本影边缘两种定义相等，食分连续
+    L1, L2 = 0.56, 0.02
+    inside = eclipse_magnitude(L2 * (1 - 1e-12), L1, L2)
+    outside = eclipse_magnitude(L2 * (1 + 1e-12), L1, L2)
+    assert inside == pytest.approx(outside)
+    assert obscuration(0.0, L1, L2) == pytest.approx(((L1 - L2) / (L1 + L2)) ** 2)
+
+
+def test_local_and_greatest_magnitudes_agree_on_central_line(trajectory):
+    trajectories, t_range, velocities, dt = trajectory
+    _, types = check_sun_eclipse(trajectories['Sun'], trajectories['Moon'], trajectories['Earth'], t_range,
+                                 as_codes=True)
+    start, codes, end = detect_accurate_times_batched(check_sun_eclipse, trajectories, types, 20,
+                                                      velocities=velocities, dt=dt, as_codes=True)
+    central = codes == ANNULAR
+    assert central.any()
+    t_max, values = greatest_eclipse(sun_eclipse_magnitudes, trajectories, start[central], end[central],
+                                     velocities, dt)
+    elements = besselian_elements(trajectories, t_max * dt, dt, velocities, frame_sign=1)
+    for e, track, magnitude in zip(elements, ground_tracks(elements), values["magnitude"]):
+        k = np.argmin(np.abs(track["time"] - e.t0))
+        local = local_circumstances(e, *track["central"][k])
+        assert local["central"]
+        # 两者的地球模型不同 (椭球与球)，中心食的视直径之比只随之略有变化
+        assert local["magnitude"] == pytest.approx(magnitude, abs=1e-4)
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from evaluate import compare_events
+
+
+def _old_compare_events(simulated, nasa):
+    """
+    原先逐对比较的匹配方法 (O(N*M))，作为对照
+    """
+    results = {'total_simulated': len(simulated), 'total_nasa': len(nasa), 'matches': [], 'missed': [], 'extra': []}
+
+    def parse(event):
+        return datetime.strptime(f"{event['date']} {event['max_time']}", '%Y-%m-%d %H:%M:%S')
+
+    matched_sim_events = set()
+    for nasa_event in nasa:
+        best_match = None
+        min_time_diff = float('inf')
+        for sim_event in simulated:
+            if sim_event['type'] != nasa_event['type']:
+                continue
+            time_diff = abs((parse(nasa_event) - parse(sim_event)).total_seconds() / 3600)
+            if time_diff > 12:
+                prev_day = parse(sim_event) - timedelta(days=1)
+                next_day = parse(sim_event) + timedelta(days=1)
+                time_diff = min(abs((parse(nasa_event) - prev_day).total_seconds() / 3600),
+                                abs((parse(nasa_event) - next_day).total_seconds() / 3600))
+            if time_diff < min_time_diff:
+                min_time_diff = time_diff
+                best_match = sim_event
+        if best_match and min_time_diff <= 1:
+            matched_sim_events.add((best_match['date'], best_match['max_time']))
+            results['matches'].append({'date': nasa_event['date'], 'type': nasa_event['type'],
+                                       'simulated_time': best_match['max_time'], 'nasa_time': nasa_event['max_time'],
+                                       'time_diff': min_time_diff})
+        else:
+            results['missed'].append({'date': nasa_event['date'], 'type': nasa_event['type'],
+                                      'max_time': nasa_event['max_time']})
+    for sim_event in simulated:
+        if (sim_event['date'], sim_event['max_time']) not in matched_sim_events:
+            results['extra'].append({'date': sim_event['date'], 'type': sim_event['type'],
+                                     'max_time': sim_event['max_time']})
+    return results
+
+
+def _event(time, type):
+    return {'date': time.strftime('%Y-%m-%d'), 'max_time': time.strftime('%H:%M:%S'), 'type': type}
+
+
+def _random_events(seed, n=200):
+    """
+    间隔一个月以上的NASA事件；模拟事件在其附近抖动、偏离数小时或缺失，另有多余事件
+    偏离量远离整日，使旧方法的跨日期修正不起作用
+    """
+    rng = np.random.default_rng(seed)
+    types = np.array(['partial', 'total', 'annular'])
+    start = datetime(2025, 1, 1)
+    nasa, simulated = [], []
+    for k in range(n):
+        time = start + timedelta(days=40 * k + int(rng.integers(10)), seconds=int(rng.integers(86400)))
+        type = str(rng.choice(types))
+        nasa.append(_event(time, type))
+        kind = rng.integers(4)
+        if kind == 0:
+            simulated.append(_event(time + timedelta(seconds=int(rng.integers(-3600, 3601))), type))
+        elif kind == 1:
+            offset = int(rng.integers(2 * 3600, 6 * 3600)) * int(rng.choice([-1, 1]))
+            simulated.append(_event(time + timedelta(seconds=offset), type))
+        elif kind == 2:
+            simulated.append(_event(time + timedelta(seconds=int(rng.integers(-1800, 1801))),
+                                    str(rng.choice(types[types != type]))))
+        if rng.random() < 0.1:
+            simulated.append(_event(time + timedelta(days=15), type))
+    return simulated, nasa
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_compare_events_matches_old_matcher(seed):
+    simulated, nasa = _random_events(seed)
+    new = compare_events(simulated, nasa, 'solar')
+    old = _old_compare_events(simulated, nasa)
+    assert len(old['matches']) > 0 and len(old['missed']) > 0 and len(old['extra']) > 0
+    for key in ('total_simulated', 'total_nasa', 'missed', 'extra'):
+        assert new[key] == old[key]
+    assert len(new['matches']) == len(old['matches'])
+    for a, b in zip(new['matches'], old['matches']):
+        assert a['time_diff'] == pytest.approx(b['time_diff'], abs=1e-9)
+        assert {k: v for k, v in a.items() if k != 'time_diff'} == {k: v for k, v in b.items() if k != 'time_diff'}
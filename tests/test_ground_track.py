@@ -0,0 +1,34 @@
+import numpy as np
+from besselian import besselian_elements
+from ground_track import ground_tracks, simplify_track, _surface_points, TRACK_TOLERANCE_KM
+
+
+def _max_deviation(raw_points, raw_time, points, time):
+    """
+    原始采样点到简化折线上对应线段 (按时刻查找) 的最大距离 (km)
+    """
+    xyz, kept = _surface_points(raw_points[:, 0], raw_points[:, 1]), _surface_points(points[:, 0], points[:, 1])
+    j = np.clip(np.searchsorted(time, raw_time, side='right') - 1, 0, len(time) - 2)
+    a, chord = kept[j], kept[j + 1] - kept[j]
+    s = np.clip(np.sum((xyz - a) * chord, axis=1) / np.sum(chord * chord, axis=1), 0, 1)
+    return np.linalg.norm(xyz - a - s[:, None] * chord, axis=1).max()
+
+
+def test_simplified_tracks_stay_within_tolerance(trajectory):
+    trajectories, _, velocities, dt = trajectory
+    elements = besselian_elements(trajectories, [2010.5, 9973.6], dt, velocities, frame_sign=1)
+    raw_tracks = ground_tracks(elements, tolerance=None)
+    for raw, track in zip(raw_tracks, ground_tracks(elements)):
+        assert len(raw["central"]) > 0
+        for name, time_key in (("central", "time"), ("north", "north_time"), ("south", "south_time")):
+            assert 2 <= len(track[name]) < len(raw[name])
+            assert track[time_key][0] == raw[time_key][0] and track[time_key][-1] == raw[time_key][-1]
+            deviation = _max_deviation(raw[name], raw[time_key], track[name], track[time_key])
+            assert deviation <= TRACK_TOLERANCE_KM
+
+
+def test_simplify_track_keeps_corners():
+    # 两段各长约 110 km 的折线，弦与大圆弧的偏差约 0.2 km，只需保留拐点
+    line = np.array([[0.0, lon] for lon in np.linspace(0, 1, 50)] + [[lat, 1.0] for lat in np.linspace(0.02, 1, 49)])
+    keep = simplify_track(line, tolerance=1.0)
+    assert np.array_equal(np.flatnonzero(keep), [0, 49, 98])
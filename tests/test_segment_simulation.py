@@ -0,0 +1,31 @@
+import numpy as np
+from main import detect_events
+from segment_simulation import DEDUPE_HOURS, segment_events, stitch_segments
+
+FINE_STEPS = 20
+
+
+def test_stitched_segments_match_continuous_run(trajectory):
+    trajectories, t_range, _, dt = trajectory
+    steps = len(t_range)
+    # 分段边界落在第 5991 步开始的月食之中，两段各向外多取一天
+    boundary, overlap = 5992, 24
+    first = {name: traj[:boundary + overlap] for name, traj in trajectories.items()}
+    second = {name: traj[boundary - overlap:] for name, traj in trajectories.items()}
+    results = [segment_events(first, dt, FINE_STEPS, 0, 0, boundary),
+               segment_events(second, dt, FINE_STEPS, boundary - overlap, boundary, steps - boundary)]
+    # 从星历表重新取初值的分段会把重叠部分中的阶段再检测一次，时刻略有差别
+    repeated = segment_events(second, dt, FINE_STEPS, boundary - overlap, boundary - overlap, overlap)
+    assert len(repeated["lunar"]) > 0
+    for kind in ("solar", "lunar"):
+        for field in ("start", "max", "end"):
+            repeated[kind][field] += 30 / 86400
+    results.append(repeated)
+
+    stitched = stitch_segments(results, DEDUPE_HOURS / 24)
+    continuous = dict(zip(("solar", "lunar"), detect_events(trajectories, dt, FINE_STEPS, verbose=False)))
+    for kind in ("solar", "lunar"):
+        assert len(continuous[kind]) > 0
+        np.testing.assert_array_equal(stitched[kind]["type"], continuous[kind]["type"])
+        for field in ("start", "max", "end", "magnitude", "gamma"):
+            np.testing.assert_allclose(stitched[kind][field], continuous[kind][field], rtol=0, atol=1e-9)
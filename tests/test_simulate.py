@@ -0,0 +1,167 @@
+import time
+import numpy as np
+import pytest
+from constants import YEAR
+from simulate import HISTORY_HOURS
+
+
+def _years(steps, dt):
+    """
+    恰好得到 steps 个时间步的模拟年数
+    """
+    return (steps + 0.5) * dt / YEAR
+
+
+def _stack(sim, trajectories):
+    return np.stack([trajectories[b.name] for b in sim.bodies])
+
+
+def _legacy_rk4(sim, steps):
+    """
+    原先逐天体的字典形式 RK4 循环 (compute_forces + rk4)
+    """
+    trajectories = {b.name: np.zeros((steps, 3)) for b in sim.bodies}
+    for step in range(steps):
+        for aux_body, orb_fn in zip(sim.aux_list, sim.orb_fns):
+            aux_body.pos = orb_fn(step * sim.dt)
+        for body in sim.bodies:
+            trajectories[body.name][step] = body.pos.copy()
+        sim.rk4()
+    return trajectories
+
+
+def test_simulate_rk4_matches_legacy_loop(simulator):
+    sim = simulator(dt=1.0)
+    trajectories, t_range = sim.simulate_rk4(_years(300, sim.dt))
+    assert len(t_range) == 300
+    legacy = _legacy_rk4(simulator(dt=1.0), 300)
+    for name, traj in trajectories.items():
+        np.testing.assert_allclose(traj, legacy[name], rtol=0, atol=1e-14)
+
+
+def test_adaptive_updates_history_and_checkpoints(simulator, tmp_path):
+    sim = simulator(dt=1.0)
+    path = str(tmp_path / "adaptive.npz")
+    sim.enable_checkpoints(path, 100)
+    trajectories, t_range, velocities = sim.simulate_adaptive(_years(450, sim.dt), with_velocity=True)
+    assert len(t_range) == 450
+    stacked = _stack(sim, trajectories)
+    assert sim.time == 450 * sim.dt
+    np.testing.assert_array_equal(sim.history, stacked[:, -int(np.ceil(HISTORY_HOURS / sim.dt)):])
+
+    # 最后一个检查点位于第 400 步，保存的是该时刻的状态及其之前的轨迹
+    data = np.load(path)
+    assert float(data["time"]) == 400 * sim.dt
+    np.testing.assert_array_equal(data["history"], stacked[:, 400 - data["history"].shape[1]:400])
+
+    reference = simulator(dt=1.0)
+    _, _, ref_vel = reference.simulate_rk4(_years(450, sim.dt), with_velocity=True)
+    np.testing.assert_allclose(_stack(sim, velocities), _stack(reference, ref_vel), rtol=0, atol=1e-11)
+    np.testing.assert_allclose(data["pos"], stacked[:, 400], rtol=0, atol=1e-13)
+
+
+def test_adaptive_checkpoint_at_end_matches_final_state(simulator, tmp_path):
+    path = str(tmp_path / "adaptive.npz")
+    sim = simulator(dt=1.0)
+    sim.enable_checkpoints(path, 50)
+    sim.simulate_adaptive(_years(200, sim.dt))
+    resumed = simulator(dt=1.0)
+    resumed.load_checkpoint(path)
+    assert resumed.time == sim.time
+    np.testing.assert_array_equal(resumed.history, sim.history)
+    np.testing.assert_allclose(resumed.get_state()[0], sim.get_state()[0], rtol=0, atol=1e-15)
+
+
+@pytest.fixture(scope="module")
+def moon_reference(simulator):
+    """
+    三个月的月球地心轨迹，以步长 0.25 小时的 RK4 为参考
+    """
+    reference, _ = simulator(dt=0.25).simulate_rk4(_years(90 * 24 * 4, 0.25))
+    return reference['Moon'] - reference['Earth']
+
+
+def _moon_error(trajectories, reference):
+    moon = trajectories['Moon'] - trajectories['Earth']
+    return np.abs(moon - reference[:len(moon)]).max()
+
+
+def test_geocentric_reaches_fine_rk4_accuracy_with_coarser_steps(simulator, moon_reference):
+    errors = {}
+    for method, dt in (("simulate_rk4", 0.5), ("simulate_geocentric", 2.0)):
+        every = int(dt / 0.25)
+        trajectories, t_range = getattr(simulator(dt=dt), method)(_years(len(moon_reference) // every, dt))
+        assert len(t_range) == len(moon_reference) // every
+        errors[method] = _moon_error(trajectories, moon_reference[::every])
+    # Encke 方法用 4 倍的步长达到 RK4 (0.5 小时) 的月球精度
+    assert errors["simulate_geocentric"] <= errors["simulate_rk4"]
+
+
+def test_multirate_beats_rk4_at_equal_accuracy(simulator, moon_reference):
+    # 两者都按 0.5 小时输出，多时间步长积分的外层步为 6 小时
+    errors, elapsed = {}, {}
+    for method, kwargs in (("simulate_rk4", {}), ("simulate_multirate", {"outer_steps": 12})):
+        sim = simulator(dt=0.5)
+        start = time.perf_counter()
+        trajectories, t_range = getattr(sim, method)(_years(len(moon_reference) // 2, 0.5), **kwargs)
+        elapsed[method] = time.perf_counter() - start
+        assert len(t_range) == len(moon_reference) // 2
+        errors[method] = _moon_error(trajectories, moon_reference[::2])
+    assert errors["simulate_multirate"] <= errors["simulate_rk4"]
+    assert elapsed["simulate_multirate"] < elapsed["simulate_rk4"]
+
+
+def test_ensemble_state(simulator):
+    sim = simulator(dt=1.0)
+    assert sim.ensemble_state is None
+    pos, vel = sim.perturbed_states(3, sigma_pos=1e-8, seed=0)
+    trajectories, t_range = sim.simulate_ensemble(pos, vel, _years(50, sim.dt))
+    final_pos, final_vel = sim.ensemble_state
+    assert final_pos.shape == final_vel.shape == pos.shape
+    # 第0个成员不加扰动，与单独的RK4积分一致
+    single, _ = simulator(dt=1.0).simulate_rk4(_years(51, sim.dt))
+    np.testing.assert_allclose(final_pos[0], _stack(sim, single)[:, -1], rtol=0, atol=1e-14)
+
+
+def _energy(sim, trajectories, velocities):
+    return sim.energy(_stack(sim, trajectories).swapaxes(0, 1), _stack(sim, velocities).swapaxes(0, 1))
+
+
+def test_symplectic_energy_error_is_bounded(simulator):
+    # 步长 6 小时、三年 (约 40 个月球公转周期)
+    dt, years = 6.0, 3.0
+    errors = {}
+    for method in ("rk4", "leapfrog", "yoshida4", "yoshida6", "wh"):
+        sim = simulator(dt=dt, with_aux=False)
+        if method == "rk4":
+            trajectories, _, velocities = sim.simulate_rk4(years, with_velocity=True)
+        else:
+            trajectories, _, velocities = sim.simulate_symplectic(years, method, with_velocity=True)
+        energy = _energy(sim, trajectories, velocities)
+        error = np.abs(energy / energy[0] - 1)
+        half = len(error) // 2
+        errors[method] = error[:half].max(), error[half:].max()
+
+    # RK4 的能量误差随时间线性增长
+    first, second = errors.pop("rk4")
+    assert second > 1.8 * first
+    # 辛积分器的能量误差只在一定范围内振荡，后半段不超过前半段 (舍入误差除外)
+    for method, (first, second) in errors.items():
+        assert second < 1.1 * first + 1e-13, method
+        assert second < 1e-8, method
+
+
+@pytest.mark.parametrize("method, order, dt", [("leapfrog", 2, 2.0), ("yoshida4", 4, 4.0), ("yoshida6", 6, 8.0),
+                                               ("wh", 2, 4.0)])
+def test_symplectic_order_of_convergence(simulator, method, order, dt):
+    days = 30
+
+    def final_position(method, dt):
+        sim = simulator(dt=dt, with_aux=False)
+        sim.simulate_symplectic(_years(int(round(days * 24 / dt)), dt), method)
+        return sim.get_state()[0]
+
+    reference = final_position("yoshida6", 0.5)
+    coarse = np.abs(final_position(method, dt) - reference).max()
+    fine = np.abs(final_position(method, dt / 2) - reference).max()
+    assert np.log2(coarse / fine) == pytest.approx(order, abs=0.3)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from check_eclipse import classify_eclipses
+from syzygy import classify_near_syzygies, find_syzygies
+
+# 朔望月 (天)
+SYNODIC_MONTH = 29.530589
+
+
+@pytest.mark.parametrize("hermite", [False, True])
+def test_classify_near_syzygies_matches_full_scan(trajectory, hermite):
+    trajectories, t_range, velocities, dt = trajectory
+    solar, lunar = classify_near_syzygies(trajectories, dt, velocities if hermite else None)
+    expected_solar, expected_lunar = classify_eclipses(trajectories['Sun'], trajectories['Moon'],
+                                                       trajectories['Earth'])
+    assert np.count_nonzero(expected_solar) > 0 and np.count_nonzero(expected_lunar) > 0
+    np.testing.assert_array_equal(solar, expected_solar)
+    np.testing.assert_array_equal(lunar, expected_lunar)
+
+
+def test_two_syzygies_per_synodic_month(trajectory):
+    trajectories, t_range, velocities, dt = trajectory
+    times, is_new, latitude = find_syzygies(trajectories, dt, velocities)
+    days = len(t_range) * dt / 24
+    assert abs(len(times) - 2 * days / SYNODIC_MONTH) <= 2
+    # 合与冲交替出现，间隔约半个朔望月
+    assert np.all(is_new[1:] != is_new[:-1])
+    spacing = np.diff(times) * dt / 24
+    assert np.all(np.abs(spacing - SYNODIC_MONTH / 2) < 1.5)
+    # 月球轨道倾角约 5 度
+    assert np.all(np.abs(latitude) < 5.5)
@@ -0,0 +1,54 @@
+import numpy as np
+from constants import START_JD_TT
+from timescale import (UNIX_EPOCH_JD, delta_t, iso_format, steps_to_jd_tt, tai_minus_utc, tt_to_tdb, tt_to_ut1,
+                       tt_to_utc, utc_to_tt)
+
+
+def _jd(date):
+    return (np.datetime64(date, 's') - np.datetime64('1970-01-01T00:00:00', 's')).astype(np.float64) / 86400 \
+        + UNIX_EPOCH_JD
+
+
+def test_utc_tt_round_trip():
+    rng = np.random.default_rng(0)
+    jd_utc = _jd('1973-01-01T00:00:00') + rng.uniform(0, 70 * 365.25, 10000)
+    np.testing.assert_allclose(tt_to_utc(utc_to_tt(jd_utc)), jd_utc, rtol=0, atol=1e-9)
+    jd_tt = utc_to_tt(jd_utc)
+    np.testing.assert_allclose(utc_to_tt(tt_to_utc(jd_tt)), jd_tt, rtol=0, atol=1e-9)
+
+
+def test_leap_seconds():
+    before, after = _jd('2016-12-31T23:59:00'), _jd('2017-01-01T00:00:00')
+    assert tai_minus_utc(before) == 36
+    assert tai_minus_utc(after) == 37
+    assert abs((utc_to_tt(before) - before) * 86400 - 68.184) < 1e-4
+    assert abs((utc_to_tt(after) - after) * 86400 - 69.184) < 1e-4
+    # 1972 年以前按 10 秒计
+    assert tai_minus_utc(_jd('1960-01-01T00:00:00')) == 10
+    # 闰秒前后的 UTC 在换算为 TT 后也能还原
+    for jd_utc in (before, after):
+        assert abs(tt_to_utc(utc_to_tt(jd_utc)) - jd_utc) * 86400 < 1e-4
+
+
+def test_start_epoch_and_steps():
+    assert iso_format(tt_to_utc(START_JD_TT)) == '2025-01-01 00:00:00.000'
+    assert steps_to_jd_tt(0, 1.0) == START_JD_TT
+    np.testing.assert_allclose(steps_to_jd_tt([24, 36], 2.0), START_JD_TT + np.array([2.0, 3.0]), rtol=0,
+                               atol=1e-12)
+
+
+def test_delta_t_and_ut1():
+    assert abs(delta_t(_jd('2000-01-01T00:00:00')) - 63.83) < 1e-9
+    # 表末以后 ΔT 取 TT - UTC
+    jd_tt = utc_to_tt(_jd('2030-06-01T12:00:00'))
+    assert abs(delta_t(jd_tt) - 69.184) < 1e-9
+    assert abs(tt_to_ut1(jd_tt) - tt_to_utc(jd_tt)) * 86400 < 1e-4
+    assert np.all(np.abs(tt_to_tdb(START_JD_TT + np.arange(0, 366)) - (START_JD_TT + np.arange(0, 366))) * 86400
+                  < 0.002)
+
+
+def test_iso_format():
+    jd = _jd('2024-04-08T18:17:20') + np.array([0.0, 0.4996, 0.5004]) / 86400
+    assert list(iso_format(jd)) == ['2024-04-08 18:17:20.000', '2024-04-08 18:17:20.500', '2024-04-08 18:17:20.500']
+    assert list(iso_format(jd, unit='s')) == ['2024-04-08 18:17:20', '2024-04-08 18:17:20', '2024-04-08 18:17:21']
+    assert iso_format(jd.reshape(3, 1)).shape == (3, 1)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from trajectory_store import ChebyshevTrajectory
+
+
+@pytest.fixture(scope="module")
+def store(trajectory):
+    """
+    只用偶数步拟合，奇数步的采样点作为不在拟合网格上的检验时刻
+    """
+    trajectories, _, _, dt = trajectory
+    return ChebyshevTrajectory.fit({name: traj[::2] for name, traj in trajectories.items()}, 2 * dt, t_start=5.0)
+
+
+def test_fit_reproduces_positions_and_velocities_off_grid(trajectory, store):
+    trajectories, _, velocities, dt = trajectory
+    n = len(trajectories['Sun'][::2])
+    # 步数不是分段长度的整数倍，最后一段不足一段
+    assert (n - 1) % int(store.segments['Moon'][0] / (2 * dt)) != 0
+    odd = np.arange(1, 2 * (n - 1), 2)
+    for name in trajectories:
+        pos, vel = store.evaluate(name, 5.0 + odd * dt, velocity=True)
+        np.testing.assert_allclose(pos, trajectories[name][odd], rtol=0, atol=1e-13)
+        np.testing.assert_allclose(vel, velocities[name][odd], rtol=0, atol=1e-13)
+    # 任意形状的时刻数组
+    t = 5.0 + odd[:12].reshape(3, 4) * dt
+    assert store.evaluate('Moon', t).shape == (3, 4, 3)
+    np.testing.assert_array_equal(store.trajectories(t)['Earth'], store.evaluate('Earth', t))
+
+
+def test_save_load_identity(store, tmp_path):
+    path = str(tmp_path / "store.npz")
+    store.save(path)
+    loaded = ChebyshevTrajectory.load(path)
+    assert (loaded.t_start, loaded.dt, loaded.t_end) == (store.t_start, store.dt, store.t_end)
+    assert list(loaded.segments) == list(store.segments)
+    t = np.linspace(store.t_start, store.t_end, 1001)
+    for name in store.segments:
+        assert loaded.segments[name][0] == store.segments[name][0]
+        np.testing.assert_array_equal(loaded.segments[name][1], store.segments[name][1])
+        for a, b in zip(loaded.evaluate(name, t, velocity=True), store.evaluate(name, t, velocity=True)):
+            np.testing.assert_array_equal(a, b)
+
+
+def test_out_of_range_times(store):
+    # 端点可以求值
+    store.evaluate('Moon', [store.t_start, store.t_end])
+    for t in (store.t_start - 1.0, store.t_end + 1.0, [store.t_start, store.t_end + 0.01]):
+        with pytest.raises(ValueError):
+            store.evaluate('Moon', t)
@@ -0,0 +1,111 @@
+import numpy as np
+from constants import START_JD_TT
+
+# TT - TAI (秒)
+TT_MINUS_TAI = 32.184
+# 1970-01-01 00:00 的儒略日，numpy 的 datetime64 以此为起点
+UNIX_EPOCH_JD = 2440587.5
+
+# 闰秒表：自该日期 (UTC) 起 TAI - UTC 的秒数；2017 年以后没有新的闰秒，之后的日期沿用最后一项
+LEAP_SECONDS = (
+    ("1972-01-01", 10), ("1972-07-01", 11), ("1973-01-01", 12), ("1974-01-01", 13), ("1975-01-01", 14),
+    ("1976-01-01", 15), ("1977-01-01", 16), ("1978-01-01", 17), ("1979-01-01", 18), ("1980-01-01", 19),
+    ("1981-07-01", 20), ("1982-07-01", 21), ("1983-07-01", 22), ("1985-07-01", 23), ("1988-01-01", 24),
+    ("1990-01-01", 25), ("1991-01-01", 26), ("1992-07-01", 27), ("1993-07-01", 28), ("1994-07-01", 29),
+    ("1996-01-01", 30), ("1997-07-01", 31), ("1999-01-01", 32), ("2006-01-01", 33), ("2009-01-01", 34),
+    ("2012-07-01", 35), ("2015-07-01", 36), ("2017-01-01", 37),
+)
+# ΔT = TT - UT1 (秒) 的观测值，按年初取值，之间线性插值；
+# 表末以后假定 UT1 与 UTC 相差不到 1 秒，取 ΔT = TT - UTC
+DELTA_T_TABLE = (
+    (1990, 56.86), (1995, 60.78), (2000, 63.83), (2005, 64.69), (2010, 66.07), (2015, 67.64),
+    (2020, 69.36), (2025, 69.2),
+)
+
+
+def _date_jd(dates):
+    """
+    日期字符串 (YYYY-MM-DD) 的儒略日
+    """
+    days = np.array(dates, dtype='datetime64[D]').astype(np.float64)
+    return days + UNIX_EPOCH_JD
+
+
+_LEAP_JD = _date_jd([date for date, _ in LEAP_SECONDS])
+_LEAP_VALUES = np.array([value for _, value in LEAP_SECONDS], dtype=np.float64)
+_DELTA_T_JD = _date_jd([f"{year}-01-01" for year, _ in DELTA_T_TABLE])
+_DELTA_T_VALUES = np.array([value for _, value in DELTA_T_TABLE], dtype=np.float64)
+
+
+def steps_to_jd_tt(steps, dt, jd_start=START_JD_TT):
+    """
+    模拟的时间步 (可为小数) 换算为儒略日 (TT)；积分使用均匀的时间，与 TT 一致
+    :param dt: 时间步长 (小时)
+    :param jd_start: 第0步的儒略日 (TT)
+    """
+    return jd_start + np.asarray(steps, dtype=np.float64) * dt / 24
+
+
+def tt_to_tdb(jd_tt):
+    """
+    TDB 与 TT 只相差周期项 (振幅约 1.7 毫秒)
+    """
+    jd_tt = np.asarray(jd_tt, dtype=np.float64)
+    g = np.radians(357.53 + 0.98560028 * (jd_tt - 2451545.0))
+    return jd_tt + (0.001657 * np.sin(g) + 0.000014 * np.sin(2 * g)) / 86400
+
+
+def tai_minus_utc(jd_utc):
+    """
+    查闰秒表，1972 年以前按 10 秒计
+    """
+    index = np.searchsorted(_LEAP_JD, np.asarray(jd_utc, dtype=np.float64), side='right') - 1
+    return _LEAP_VALUES[np.maximum(index, 0)]
+
+
+def tt_to_utc(jd_tt):
+    """
+    儒略日 TT -> UTC；闰秒表按 UTC 日期查找，先用 TT 的近似值定位再修正一次
+    """
+    jd_tt = np.asarray(jd_tt, dtype=np.float64)
+    offset = TT_MINUS_TAI + tai_minus_utc(jd_tt)
+    offset = TT_MINUS_TAI + tai_minus_utc(jd_tt - offset / 86400)
+    return jd_tt - offset / 86400
+
+
+def utc_to_tt(jd_utc):
+    """
+    儒略日 UTC -> TT
+    """
+    jd_utc = np.asarray(jd_utc, dtype=np.float64)
+    return jd_utc + (TT_MINUS_TAI + tai_minus_utc(jd_utc)) / 86400
+
+
+def delta_t(jd_tt):
+    """
+    ΔT = TT - UT1 (秒)，表内线性插值，表末以后取 TT - UTC
+    """
+    jd_tt = np.asarray(jd_tt, dtype=np.float64)
+    table = np.interp(jd_tt, _DELTA_T_JD, _DELTA_T_VALUES)
+    after = TT_MINUS_TAI + tai_minus_utc(jd_tt)
+    return np.where(jd_tt > _DELTA_T_JD[-1], after, table)
+
+
+def tt_to_ut1(jd_tt):
+    """
+    儒略日 TT -> UT1
+    """
+    jd_tt = np.asarray(jd_tt, dtype=np.float64)
+    return jd_tt - delta_t(jd_tt) / 86400
+
+
+def iso_format(jd, unit='ms'):
+    """
+    批量把儒略日格式化为 ISO 字符串 "YYYY-MM-DD HH:MM:SS.sss"，不区分时间尺度
+    :param unit: 保留到的时间单位，'s' 或 'ms'，按四舍五入取整
+    :return: 与 jd 同形状的字符串数组
+    """
+    scale = {'s': 86400, 'ms': 86400000}[unit]
+    ticks = np.round((np.asarray(jd, dtype=np.float64) - UNIX_EPOCH_JD) * scale).astype(np.int64)
+    strings = np.datetime_as_string(ticks.astype(f'datetime64[{unit}]'), unit=unit)
+    return np.char.replace(strings, 'T', ' ')
@@ -0,0 +1,115 @@
+import numpy as np
+from numpy.polynomial import chebyshev
+
+# 每段切比雪夫多项式覆盖的时长 (小时) 和阶数，仿照 SPK 文件对不同天体取不同的分段长度
+# 地球绕地月质心的摆动与月球同周期，因此与月球取相同的分段
+INTERVAL_HOURS = {"Moon": 96, "Earth": 96}
+DEFAULT_INTERVAL_HOURS = 384
+DEGREE = 13
+
+
+class ChebyshevTrajectory:
+    def __init__(self, t_start, dt, t_end, segments):
+        """
+        分段切比雪夫多项式压缩的轨迹
+        :param t_start: 第一段的起点 (小时)
+        :param dt: 原始轨迹的采样间隔 (小时)
+        :param t_end: 轨迹终点 (小时)，超出 [t_start, t_end] 的时刻不能求值
+        :param segments: {name: (interval, coefs)}，interval 为分段长度 (小时)，coefs 为系数 (段数, 阶数+1, 3)
+        """
+        self.t_start = t_start
+        self.dt = dt
+        self.t_end = t_end
+        self.segments = segments
+        # 速度对应的导数系数，求值时不必重复计算
+        self._deriv = {name: chebyshev.chebder(coefs, axis=1) * (2 / interval)
+                       for name, (interval, coefs) in segments.items()}
+
+    @classmethod
+    def fit(cls, trajectories, dt, t_start=0.0, degree=DEGREE, interval_hours=None):
+        """
+        对模拟得到的等间隔轨迹逐段拟合切比雪夫系数
+        :param trajectories: {name: (steps, 3)}，如 simulate_rk4 的返回值
+        :param dt: 采样间隔 (小时)
+        :param t_start: 第0个采样点的时刻 (小时)
+        :param interval_hours: {name: 分段长度}，未给出的天体使用 INTERVAL_HOURS / DEFAULT_INTERVAL_HOURS
+        """
+        lengths = dict(INTERVAL_HOURS)
+        lengths.update(interval_hours or {})
+        segments = {}
+        steps = None
+        for name, positions in trajectories.items():
+            steps = len(positions)
+            # 每段包含 m+1 个采样点，相邻两段共用端点
+            m = max(int(round(lengths.get(name, DEFAULT_INTERVAL_HOURS) / dt)), degree)
+            n_full = (steps - 1) // m
+            x = np.linspace(-1, 1, m + 1)
+            coefs = []
+            if n_full > 0:
+                # 所有整段的采样时刻相同，共用一个范德蒙德矩阵的伪逆一次求解
+                pinv = np.linalg.pinv(chebyshev.chebvander(x, degree))
+                idx = np.arange(n_full)[:, None] * m + np.arange(m + 1)
+                coefs.append(np.einsum('kj,ijd->ikd', pinv, positions[idx]))
+            rest = steps - 1 - n_full * m
+            if rest > 0 or n_full == 0:
+                # 最后不足一段的部分仍按整段长度归一化，只用已有的采样点拟合
+                tail = positions[n_full * m:]
+                tail_x = x[:len(tail)]
+                tail_degree = min(degree, len(tail) - 1)
+                tail_coefs = np.zeros((1, degree + 1, 3))
+                tail_coefs[0, :tail_degree + 1] = np.linalg.lstsq(chebyshev.chebvander(tail_x, tail_degree), tail,
+                                                                  rcond=None)[0]
+                coefs.append(tail_coefs)
+            segments[name] = (m * dt, np.concatenate(coefs))
+        return cls(t_start, dt, t_start + (steps - 1) * dt, segments)
+
+    def evaluate(self, name, t, velocity=False):
+        """
+        求天体在任意时刻的位置 (以及速度)
+        :param t: 时刻 (小时)，任意形状的数组
+        :return: 位置 (*t.shape, 3)；velocity=True 时同时返回速度 (AU/h)
+        """
+        t = np.asarray(t, dtype=np.float64)
+        if np.any(t < self.t_start - 1e-9) or np.any(t > self.t_end + 1e-9):
+            raise ValueError(f"Error: time outside [{self.t_start}, {self.t_end}]!")
+        interval, coefs = self.segments[name]
+        index = np.clip(((t - self.t_start) // interval).astype(int), 0, len(coefs) - 1)
+        x = 2 * (t - self.t_start - index * interval) / interval - 1
+        pos = _clenshaw(coefs[index], x)
+        if not velocity:
+            return pos
+        return pos, _clenshaw(self._deriv[name][index], x)
+
+    def trajectories(self, t):
+        """
+        在给定时刻求所有天体的位置，格式与 simulate_rk4 返回的轨迹相同
+        """
+        return {name: self.evaluate(name, t) for name in self.segments}
+
+    def save(self, path):
+        arrays = {"t_start": self.t_start, "dt": self.dt, "t_end": self.t_end,
+                  "names": np.array(list(self.segments))}
+        for name, (interval, coefs) in self.segments.items():
+            arrays[f"interval_{name}"] = interval
+            arrays[f"coefs_{name}"] = coefs
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        segments = {name: (float(data[f"interval_{name}"]), data[f"coefs_{name}"]) for name in data["names"]}
+        return cls(float(data["t_start"]), float(data["dt"]), float(data["t_end"]), segments)
+
+
+def _clenshaw(coefs, x):
+    """
+    逐点用 Clenshaw 递推求切比雪夫级数的值
+    :param coefs: 每个点的系数 (..., 阶数+1, 3)
+    :param x: 归一化时刻 (...)
+    """
+    x = x[..., None]
+    b1 = np.zeros(coefs.shape[:-2] + (3,))
+    b2 = np.zeros_like(b1)
+    for k in range(coefs.shape[-2] - 1, 0, -1):
+        b1, b2 = coefs[..., k, :] + 2 * x * b1 - b2, b1
+    return coefs[..., 0, :] + x * b1 - b2